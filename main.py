@@ -1,18 +1,163 @@
+import os
 import sys
+import argparse
 import threading
 from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
 from PySide6.QtGui import QIcon, QAction
 
 from PySide6.QtCore import Qt
 from telemetry.telemetry_engine import TelemetryEngine
+from telemetry.adapters.registry import default_registry
+from telemetry.delta import reference_from_session
+from telemetry.channels import default_channels
+from telemetry.shared_buffer import SharedTelemetryBuffer
+from telemetry.acquisition import AcquisitionService, RemoteEngine, DEFAULT_NAME
+from telemetry.broadcast import UdpTarget, TcpTarget, DEFAULT_RATE_HZ
+from telemetry.scheduler import POLICIES, SKIP
+from telemetry.instrumentation import MetricsExporter
 from ui.overlay_window import OverlayWindow
 
+def address(text):
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got '{text}'")
+    return host, int(port)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sim racing telemetry overlay")
+    parser.add_argument("--adapter", metavar="NAME", help="use only this adapter instead of auto-detecting (e.g. assetto_corsa)")
+    parser.add_argument("--adapters-config", metavar="FILE", help="JSON file adding, reordering or disabling adapters")
+    parser.add_argument("--replay", metavar="FILE", help="play a recorded .srtl session instead of a live sim")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier (default: real time)")
+    parser.add_argument("--max-speed", action="store_true", help="replay without pacing, as fast as the engine can read samples")
+    parser.add_argument("--seek", type=float, default=0.0, metavar="SECONDS", help="start the replay this far into the session")
+    parser.add_argument("--lap", type=int, metavar="N", help="start the replay at the beginning of lap N")
+    parser.add_argument("--reference", metavar="FILE", help="show the delta to the best lap of this .srtl recording")
+    parser.add_argument("--reference-lap", type=int, metavar="N", help="use lap N of --reference instead of its best lap")
+    parser.add_argument("--channels", metavar="NAMES", help="comma-separated optional channels to acquire and record (e.g. g_lat,tyre_temp_fl)")
+    parser.add_argument("--list-channels", action="store_true", help="list the optional channels and exit")
+    parser.add_argument("--out-of-process", action="store_true", help="acquire in a separate process; attaches to a running one, or starts it")
+    parser.add_argument("--acquisition-service", action="store_true", help="acquire headless for --out-of-process overlays until asked to stop")
+    parser.add_argument("--shm-name", default=DEFAULT_NAME, metavar="NAME", help="shared memory name of the acquisition service")
+    parser.add_argument("--broadcast-udp", type=address, action="append", default=[], metavar="HOST:PORT", help="stream telemetry over UDP, e.g. to multicast group 239.255.0.1:9988 (repeatable)")
+    parser.add_argument("--broadcast-tcp", type=address, action="append", default=[], metavar="HOST:PORT", help="stream telemetry over TCP, e.g. to an aggregation server (repeatable)")
+    parser.add_argument("--broadcast-ws", type=address, metavar="HOST:PORT", help="serve telemetry to WebSocket clients (needs the websockets package)")
+    parser.add_argument("--broadcast-channels", metavar="NAMES", help="comma-separated channels for UDP streams and WebSocket clients that don't choose")
+    parser.add_argument("--broadcast-rate", type=float, default=DEFAULT_RATE_HZ, metavar="HZ", help=f"frames per second to stream (default: {DEFAULT_RATE_HZ:.0f})")
+    parser.add_argument("--tick-policy", choices=POLICIES, default=SKIP, help="when acquisition falls behind, skip the missed polls or run them back to back (default: skip)")
+    parser.add_argument("--spin-us", type=int, default=0, metavar="US", help="busy-wait the last US microseconds before each poll for a steadier cadence, at some CPU cost")
+    parser.add_argument("--metrics-file", metavar="PATH", help="write per stage timings in the Prometheus text format to PATH every few seconds")
+    parser.add_argument("--metrics-http", type=address, metavar="HOST:PORT", help="serve per stage timings in the Prometheus text format at http://HOST:PORT/metrics")
+    parser.add_argument("--rig-name", metavar="NAME", help="name streams are identified by on an aggregation server (default: host name)")
+    # Leave Qt's own arguments to QApplication
+    return parser.parse_known_args()
+
+def build_engine(args, channels, buffer=None):
+    try:
+        registry = default_registry(args.adapters_config)
+    except (OSError, ValueError) as e:
+        print(f"Could not load adapter config: {e}")
+        sys.exit(1)
+    engine = TelemetryEngine(registry=registry, channels=channels, buffer=buffer,
+                             tick_policy=args.tick_policy, spin_us=args.spin_us)
+    if args.channels:
+        try:
+            channels.subscribe([name.strip() for name in args.channels.split(",") if name.strip()])
+        except KeyError as e:
+            print(e.args[0])
+    if args.replay:
+        replay = registry.create("replay", path=args.replay, speed=None if args.max_speed else args.speed)
+        replay.seek(args.seek)
+        if args.lap is not None and not replay.seek_lap(args.lap):
+            print(f"Lap {args.lap} is not in {args.replay}, laps: {sorted(replay.laps.laps)}")
+        engine.set_adapter(replay)
+    elif args.adapter:
+        engine.set_adapter(registry.create(args.adapter))
+    if args.reference:
+        try:
+            engine.delta.set_reference(reference_from_session(args.reference, args.reference_lap))
+        except (OSError, ValueError) as e:
+            print(f"Could not load reference lap: {e}")
+    if args.rig_name:
+        engine.rig_name = args.rig_name
+    if args.broadcast_udp or args.broadcast_tcp or args.broadcast_ws:
+        options = {'rate_hz': args.broadcast_rate}
+        if args.broadcast_channels:
+            options['channels'] = [name.strip() for name in args.broadcast_channels.split(",") if name.strip()]
+        try:
+            engine.start_broadcast(udp=[UdpTarget(host, port) for host, port in args.broadcast_udp],
+                                   tcp=[TcpTarget(host, port) for host, port in args.broadcast_tcp],
+                                   websocket=args.broadcast_ws, **options)
+        except KeyError as e:
+            print(f"Not broadcasting: {e.args[0]}")
+    return engine
+
+def start_metrics(args, engine):
+    if not (args.metrics_file or args.metrics_http):
+        return None
+    try:
+        exporter = MetricsExporter(engine.timings, path=args.metrics_file, http=args.metrics_http)
+    except OSError as e:
+        print(f"Not exporting metrics: {e}")
+        return None
+    exporter.start()
+    return exporter
+
+def run_acquisition_service(args, channels):
+    # Every optional channel gets a column up front, the shared segment can't grow later
+    try:
+        buffer = SharedTelemetryBuffer.create(args.shm_name, [(name, channels.get(name).dtype) for name in channels.names()])
+    except FileExistsError:
+        print(f"An acquisition service is already running as '{args.shm_name}'")
+        return 1
+    engine = build_engine(args, channels, buffer)
+    metrics = start_metrics(args, engine)
+    AcquisitionService(engine).serve()
+    if metrics:
+        metrics.stop()
+    return 0
+
+def connect_acquisition_service(args, qt_args, channels):
+    # Started with the same options, minus the GUI only ones. Metrics are exported by the
+    # overlay, which has the timings of both processes.
+    forwarded = []
+    skip = False
+    for arg in sys.argv[1:]:
+        option = arg.split("=", 1)[0]
+        if skip or arg == "--out-of-process" or arg in qt_args:
+            skip = False
+        elif option in ("--metrics-file", "--metrics-http"):
+            skip = "=" not in arg # the value is the next argument
+        else:
+            forwarded.append(arg)
+    launch = [sys.executable, os.path.abspath(__file__), "--acquisition-service", *forwarded]
+    engine = RemoteEngine.attach(args.shm_name, launch=launch, channels=channels)
+    print(f"Attached to acquisition service '{args.shm_name}' (pid {engine.pid})")
+    return engine
+
 def main():
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args()
+    channels = default_channels()
+    if args.list_channels:
+        for name in channels.names():
+            channel = channels.get(name)
+            print(f"{name:<24}{channel.unit:<7}{channel.description} [{', '.join(channel.sources)}]")
+        return
+    if args.acquisition_service:
+        sys.exit(run_acquisition_service(args, channels))
+    app = QApplication(sys.argv[:1] + qt_args)
     
-    # Create Telemetry Backend
-    engine = TelemetryEngine()
+    # Create Telemetry Backend, here or in the acquisition service
+    if args.out_of_process:
+        try:
+            engine = connect_acquisition_service(args, qt_args, channels)
+        except (ConnectionError, TimeoutError) as e:
+            print(f"Could not start or attach to the acquisition service: {e}")
+            sys.exit(1)
+    else:
+        engine = build_engine(args, channels)
     engine.start()
+    metrics = start_metrics(args, engine)
     
     # Create Overlay
     window = OverlayWindow(engine)
@@ -38,6 +183,15 @@ def main():
     action_lock.triggered.connect(window.toggle_lock)
     tray_menu.addAction(action_lock)
     
+    if args.out_of_process:
+        # Leaves the service acquiring; starting the overlay again attaches to it with its history
+        def close_overlay():
+            engine.keep_running = True
+            app.quit()
+        action_detach = QAction("Close Overlay, Keep Acquiring", app)
+        action_detach.triggered.connect(close_overlay)
+        tray_menu.addAction(action_detach)
+
     action_exit = QAction("Exit", app)
     action_exit.triggered.connect(app.quit)
     tray_menu.addAction(action_exit)
@@ -46,6 +200,8 @@ def main():
     tray.show()
 
     ret = app.exec()
+    if metrics:
+        metrics.stop()
     engine.stop()
     sys.exit(ret)
 
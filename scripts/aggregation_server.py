@@ -0,0 +1,171 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+import threading
+import multiprocessing
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from telemetry.aggregator import AggregationServer
+from telemetry.broadcast import TelemetryBroadcaster, UdpTarget, TcpTarget
+from telemetry.ring_buffer import TelemetryBuffer
+from telemetry.adapters.mock import MockAdapter
+
+# Headless aggregation server for team sessions; rigs stream to it with main.py --broadcast-udp/--broadcast-tcp:
+#
+#   python scripts/aggregation_server.py --udp 0.0.0.0:9988 --tcp 0.0.0.0:9990 --http 0.0.0.0:8080
+#   curl "http://localhost:8080/query?channel=speed_kph&lap=last&points=200"
+#
+# --load-test runs the server in its own process, pinned to one core where the OS allows,
+# against --rigs synthetic rigs (MockAdapter, TelemetryBuffer and TelemetryBroadcaster,
+# like a real instance) sampling at --rate, and reports what the server kept up with.
+
+def address(text):
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got '{text}'")
+    return host, int(port)
+
+def _pin_to_one_core():
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+        return True
+    return False
+
+def _load_test_server(transport, addresses, stop, results):
+    """Server process of the load test: serves until `stop`, then posts its measurements."""
+    pinned = _pin_to_one_core()
+    server = AggregationServer(**{transport: ('127.0.0.1', 0)})
+    measured = {'queries': {}}
+
+    async def measure():
+        # CPU time is counted from the first packet, so start-up isn't part of it
+        while server.packets == 0:
+            await asyncio.sleep(0.01)
+        measured['wall'], measured['cpu'] = time.perf_counter(), time.process_time()
+        queries = {
+            'merged current lap': lambda: server.merged('speed_kph', lap='current', points=500),
+            'merged last 30s': lambda: server.merged('speed_kph', seconds=30, points=500),
+            'query last 30s': lambda: server.query('speed_kph', seconds=30),
+        }
+        while True:
+            await asyncio.sleep(0.5)
+            for name, query in queries.items():
+                start = time.perf_counter()
+                query()
+                measured['queries'].setdefault(name, []).append(time.perf_counter() - start)
+
+    def ready():
+        asyncio.get_running_loop().create_task(measure())
+        addresses.put(server.addresses[transport])
+
+    threading.Thread(target=lambda: (stop.wait(), server.stop()), daemon=True).start()
+    asyncio.run(server.serve(ready))
+    results.put({
+        'pinned': pinned,
+        'wall': time.perf_counter() - measured.get('wall', time.perf_counter()),
+        'cpu': time.process_time() - measured.get('cpu', time.process_time()),
+        'stats': server.stats(),
+        'cars': {key: car.buffer.count for key, car in server.cars.items()},
+        'queries': measured['queries'],
+    })
+
+class SyntheticRig:
+    """A MockAdapter fed buffer broadcasting like `main.py --broadcast-udp/--broadcast-tcp` would."""
+
+    def __init__(self, name, transport, address, frame_rate):
+        self.name = name
+        self.adapter = MockAdapter()
+        self.buffer = TelemetryBuffer()
+        target = (UdpTarget if transport == 'udp' else TcpTarget)(*address)
+        self.broadcaster = TelemetryBroadcaster(
+            self.buffer, **{transport: [target]}, rate_hz=frame_rate,
+            metadata=lambda: {'rig': name, 'adapter': self.adapter.name,
+                              'unix_time': time.time(), 'timestamp': time.perf_counter()},
+        )
+
+    def sample(self):
+        self.buffer.append(self.adapter.update(), time.perf_counter())
+
+def load_test(rigs=36, rate=333.0, frame_rate=30.0, seconds=10.0, transport='udp'):
+    addresses, results = multiprocessing.Queue(), multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=_load_test_server, args=(transport, addresses, stop, results))
+    process.start()
+    address = addresses.get(timeout=10)
+
+    fleet = [SyntheticRig(f"rig{i:02d}", transport, address, frame_rate) for i in range(rigs)]
+    for rig in fleet:
+        rig.broadcaster.start()
+
+    # One acquisition thread samples every rig, on a fixed cadence
+    running = True
+    late_ticks = 0
+    def acquire():
+        nonlocal late_ticks
+        interval = 1.0 / rate
+        next_tick = time.perf_counter()
+        while running:
+            for rig in fleet:
+                rig.sample()
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                late_ticks += 1
+    thread = threading.Thread(target=acquire, daemon=True)
+    thread.start()
+    time.sleep(seconds)
+    running = False
+    thread.join()
+    time.sleep(2.0 / frame_rate) # the last frame
+    for rig in fleet:
+        rig.broadcaster.stop()
+    stop.set()
+    result = results.get(timeout=30)
+    process.join()
+
+    produced = {rig.name: rig.buffer.count for rig in fleet}
+    received = result['cars']
+    stats = result['stats']
+    behind = sum(max(0, produced[name] - received.get(name, 0)) for name in produced)
+    total = sum(produced.values())
+    print(f"{rigs} rigs at {rate:.0f} Hz, {frame_rate:.0f} frames/s each, over {transport}, {seconds:.0f}s")
+    print(f"  sampled    {total} samples ({total / seconds:.0f}/s), {late_ticks} late acquisition ticks")
+    print(f"  received   {sum(received.values())} samples from {stats['cars']} cars in {stats['packets']} packets, "
+          f"{stats['lost_samples']} lost, {behind} not received at the end")
+    print(f"  server CPU {result['cpu']:.2f}s in {result['wall']:.2f}s = {100 * result['cpu'] / max(result['wall'], 1e-9):.1f}% "
+          f"of one core{'' if result['pinned'] else ' (not pinned, no sched_setaffinity here)'}")
+    for name, durations in result['queries'].items():
+        durations = np.array(durations) * 1000
+        print(f"  {name:<20} p50 {np.percentile(durations, 50):6.2f} ms  max {durations.max():6.2f} ms")
+    # Kept up: every car arrived and nothing was lost on the way
+    return stats['cars'] == rigs and stats['lost_samples'] == 0 and behind <= rigs * rate * 2 / frame_rate
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregation server collecting the telemetry broadcasts of many rigs")
+    parser.add_argument("--udp", type=address, metavar="HOST:PORT", help="receive UDP streams here (a multicast group is joined)")
+    parser.add_argument("--tcp", type=address, metavar="HOST:PORT", help="accept TCP streams here")
+    parser.add_argument("--http", type=address, metavar="HOST:PORT", help="serve /cars, /query and /stats as JSON here")
+    parser.add_argument("--capacity", type=int, default=65536, help="samples kept per car (default: 65536)")
+    parser.add_argument("--load-test", action="store_true", help="measure the server against synthetic rigs and exit")
+    parser.add_argument("--rigs", type=int, default=36, help="load test: number of rigs (default: 36)")
+    parser.add_argument("--rate", type=float, default=333.0, help="load test: samples per second per rig (default: 333, AC physics)")
+    parser.add_argument("--frame-rate", type=float, default=30.0, help="load test: frames per second each rig sends (default: 30)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load test: duration (default: 10)")
+    parser.add_argument("--transport", choices=("udp", "tcp"), default="udp", help="load test: how rigs stream (default: udp)")
+    args = parser.parse_args()
+
+    if args.load_test:
+        sys.exit(0 if load_test(args.rigs, args.rate, args.frame_rate, args.seconds, args.transport) else 1)
+    if not (args.udp or args.tcp):
+        parser.error("give --udp and/or --tcp to receive streams on")
+    AggregationServer(udp=args.udp, tcp=args.tcp, http=args.http, capacity=args.capacity).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telemetry.analysis import analyze_session, BLOCK_SAMPLES
+from telemetry.session_file import FILE_EXTENSION
+
+# Batch analysis of recorded sessions, one process per file:
+#
+#   python scripts/analyze_sessions.py recordings/ --laps -o report.json
+#
+# Each file is read BLOCK_SAMPLES samples at a time (--block), so memory stays bounded
+# however long a stint is. See telemetry.analysis for what is computed per lap.
+
+def find_sessions(paths):
+    """Session files among `paths`, searching directories recursively, sorted."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in files if name.endswith(FILE_EXTENSION))
+        else:
+            found.append(path)
+    return sorted(found)
+
+def _analyze(path, block_size):
+    # Worker process: errors come back as results, one bad file doesn't stop the batch
+    start = time.perf_counter()
+    try:
+        result = analyze_session(path, block_size)
+    except Exception as e:
+        # Anything a damaged file can throw, so it is reported with the others
+        result = {'path': os.path.abspath(path), 'error': str(e) if isinstance(e, (OSError, ValueError)) else f"{type(e).__name__}: {e}"}
+    result['analysis_s'] = time.perf_counter() - start
+    return result
+
+def _lap_time(seconds):
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:.0f}:{seconds:06.3f}"
+
+def print_summary(result):
+    name = os.path.basename(result['path'])
+    if 'error' in result:
+        print(f"{name}: {result['error']}")
+        return
+    complete = sum(lap['complete'] for lap in result['laps'])
+    print(f"{name}: {result.get('track') or '?'}, {result.get('car') or '?'}, "
+          f"{result['seconds'] / 60:.1f} min, {complete} complete laps, best {_lap_time(result['best_lap_time_s'])} "
+          f"(lap {result['best_lap']}), max {result['max_speed_kph']:.0f} km/h")
+
+def print_laps(result):
+    if 'error' in result or not result['laps']:
+        return
+    print(f"  {'lap':>5} {'time':>10} {'max km/h':>9} {'coast s':>8} {'full thr':>9} {'brake pts':>10}")
+    for lap in result['laps']:
+        print(f"  {lap['lap']:>5} {_lap_time(lap['time_s']):>10} {lap['max_speed_kph']:>9.1f} "
+              f"{lap['coasting_s']:>8.2f} {100 * lap['full_throttle_share']:>8.1f}% {len(lap['braking_points']):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per lap statistics of recorded .srtl sessions")
+    parser.add_argument("paths", nargs="+", help="session files, or directories to search for them")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes (default: one per CPU)")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write every result, with braking points and pedal histograms, as JSON")
+    parser.add_argument("--laps", action="store_true", help="print a line per lap, not only per session")
+    parser.add_argument("--block", type=int, default=BLOCK_SAMPLES, help=f"samples read at a time per file (default: {BLOCK_SAMPLES})")
+    args = parser.parse_args()
+
+    paths = find_sessions(args.paths)
+    if not paths:
+        print("No session files found")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = []
+    # Printed as they finish, written in path order
+    with ProcessPoolExecutor(max_workers=min(args.jobs, len(paths))) as pool:
+        futures = [pool.submit(_analyze, path, args.block) for path in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print_summary(result)
+            if args.laps:
+                print_laps(result)
+    results.sort(key=lambda result: result['path'])
+
+    failed = sum('error' in result for result in results)
+    samples = sum(result.get('samples', 0) for result in results)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(results) - failed} sessions, {samples} samples analysed in {elapsed:.1f}s "
+          f"with {min(args.jobs, len(paths))} processes" + (f", {failed} failed" if failed else ""))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'sessions': results}, f, indent=1)
+        print(f"Wrote {args.output}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
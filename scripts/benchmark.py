@@ -0,0 +1,290 @@
+import sys
+import os
+import json
+import time
+import struct
+import argparse
+import platform
+import subprocess
+import tempfile
+
+# Widgets are painted offscreen, no display needed
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from telemetry.adapters.mock import MockAdapter
+from telemetry.adapters.assetto_corsa import AssettoCorsaAdapter
+from telemetry.adapters.ac_fake_shm import FakeACSharedMemory
+from telemetry.adapters.ac_types import AC_STATUS_LIVE
+
+SCALES = (0.4, 0.7, 1.0)
+# Long trace windows, drawn from the min/max pyramids
+TRACE_WINDOWS = (30, 120)
+
+def summarize(name, group, samples_ns, **extra):
+    """One result row; all timings in microseconds."""
+    us = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    row = {
+        'name': name,
+        'group': group,
+        'unit': 'us',
+        'n': int(len(us)),
+        'mean': float(us.mean()),
+        'p50': float(np.percentile(us, 50)),
+        'p99': float(np.percentile(us, 99)),
+        'max': float(us.max()),
+    }
+    row.update(extra)
+    return row
+
+def time_calls(fn, iterations, setup=None):
+    samples = np.empty(iterations, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        if setup:
+            setup()
+        t0 = clock()
+        fn()
+        samples[i] = clock() - t0
+    return samples
+
+# --- Adapter decode ---------------------------------------------------------
+
+def write_fake_irsdk_dump(path):
+    """Writes a minimal irsdk memory dump with the vars IRacingAdapter reads."""
+    variables = [
+        ('Throttle', 4, 0.6), ('Brake', 4, 0.2), ('Clutch', 4, 0.0), ('RPM', 4, 6500.0),
+        ('Speed', 4, 50.0), ('Gear', 2, 3), ('SteeringWheelAngle', 4, 0.1),
+        ('IsOnTrack', 1, True), ('TickCount', 2, 1), ('Lap', 2, 3), ('LapDistPct', 4, 0.4),
+        ('LapLastLapTime', 4, 92.5), ('LapBestLapTime', 4, 91.8),
+    ]
+    formats = {1: '?', 2: 'i', 4: 'f'}
+    session_info = b"WeekendInfo:\n TrackDisplayName: Benchmark\n"
+    header_size = 48 + 4 * 16
+    var_header_offset = header_size
+    session_info_offset = var_header_offset + len(variables) * 144
+    buf_offset = session_info_offset + len(session_info) + 16
+    buf_len = 4 * len(variables)
+
+    data = bytearray(buf_offset + buf_len)
+    struct.pack_into('<iiiiiiiiiiiB', data, 0, 2, 1, 60, 1, len(session_info), session_info_offset,
+                     len(variables), var_header_offset, 1, buf_len, 1, 0)
+    struct.pack_into('<iii', data, 48, 1, buf_offset, 1)
+    for i, (name, var_type, value) in enumerate(variables):
+        struct.pack_into('<iii?3x32s64s32s', data, var_header_offset + i * 144,
+                         var_type, i * 4, 1, False, name.encode(), b'', b'')
+        struct.pack_into(formats[var_type], data, buf_offset + i * 4, value)
+    data[session_info_offset:session_info_offset + len(session_info)] = session_info
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def bench_adapters(iterations, ir_test_file=None):
+    results = []
+
+    mock = MockAdapter()
+    results.append(summarize('MockAdapter.update', 'adapter', time_calls(mock.update, iterations)))
+
+    shm = FakeACSharedMemory()
+    shm.graphics.status = AC_STATUS_LIVE
+    for fast in (True, False):
+        adapter = AssettoCorsaAdapter(page_opener=shm.open_page, fast_reader=fast)
+        adapter.connect()
+        label = 'fast' if fast else 'full_copy'
+        step = lambda: shm.step(gas=0.5, brake=0.1, rpms=5000, speedKmh=120.0)
+        results.append(summarize(f'AssettoCorsaAdapter.update[{label},new_frame]', 'adapter',
+                                 time_calls(adapter.update, iterations, setup=step)))
+        results.append(summarize(f'AssettoCorsaAdapter.update[{label},unchanged]', 'adapter',
+                                 time_calls(adapter.update, iterations)))
+        adapter._disconnect()
+    shm.close()
+
+    from telemetry.adapters.iracing import IRacingAdapter
+    if ir_test_file is None:
+        ir_test_file = os.path.join(tempfile.mkdtemp(prefix="irsdk_"), "bench.bin")
+        write_fake_irsdk_dump(ir_test_file)
+    adapter = IRacingAdapter(test_file=ir_test_file)
+    adapter.connect()
+    if adapter.connected:
+        def force_new_tick():
+            adapter._last_tick = None
+        results.append(summarize('IRacingAdapter.update[new_frame]', 'adapter',
+                                 time_calls(adapter.update, iterations, setup=force_new_tick),
+                                 test_file=ir_test_file))
+        results.append(summarize('IRacingAdapter.update[unchanged]', 'adapter',
+                                 time_calls(adapter.update, iterations), test_file=ir_test_file))
+    else:
+        print(f"Skipping IRacingAdapter: could not open {ir_test_file}", file=sys.stderr)
+    return results
+
+# --- Engine loop jitter -----------------------------------------------------
+
+def bench_engine(duration, rates, spins=(0,)):
+    from telemetry.telemetry_engine import TelemetryEngine
+
+    results = []
+    for rate, spin_us in [(rate, spin_us) for spin_us in spins for rate in rates]:
+        engine = TelemetryEngine(acquisition_hz=rate, spin_us=spin_us)
+        adapter = MockAdapter()
+        adapter.native_rate_hz = None # uncap so acquisition_hz decides
+        engine.set_adapter(adapter)
+        start = engine.buffer.count
+        engine.start()
+        time.sleep(duration)
+        engine.stop()
+
+        timestamps = engine.buffer.window('timestamp', start, engine.buffer.count)
+        intervals_ns = np.diff(timestamps) * 1e9
+        lateness_ns = intervals_ns - 1e9 / rate
+        ticks = engine.scheduler.stats()
+        name = f'tick_lateness[{rate}Hz]' if not spin_us else f'tick_lateness[{rate}Hz,spin{spin_us}us]'
+        results.append(summarize(name, 'engine', lateness_ns,
+                                 target_hz=rate, achieved_hz=float(len(timestamps) / duration),
+                                 # Start time against the deadline, as measured by the scheduler
+                                 deadline_p50_us=ticks['p50_us'], deadline_p99_us=ticks['p99_us'],
+                                 deadline_max_us=ticks['max_us'], skipped=ticks['skipped']))
+    return results
+
+# --- Widget painting --------------------------------------------------------
+
+class BufferFeeder:
+    """Appends mock samples to a buffer on a synthetic clock at `rate`."""
+
+    def __init__(self, buffer, rate=333):
+        self.buffer = buffer
+        self.rate = rate
+        self.mock = MockAdapter()
+        self.t = time.perf_counter()
+
+    def feed(self, n):
+        for _ in range(n):
+            self.buffer.append(self.mock.update(), self.t)
+            self.t += 1.0 / self.rate
+
+    def feed_frame(self, fps=60):
+        self.feed(max(1, round(self.rate / fps)))
+
+def bench_widgets(iterations):
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QPixmap
+    from PySide6.QtCore import Qt
+    from telemetry.ring_buffer import TelemetryBuffer
+    from ui.widgets.trace_graph import TraceGraphWidget
+    from ui.widgets.dashboard_gauge import DashboardGaugeWidget
+    from ui.widgets.input_bars import InputBarsWidget
+
+    app = QApplication.instance() or QApplication([])
+    buffer = TelemetryBuffer()
+    feeder = BufferFeeder(buffer)
+    feeder.feed(max(TRACE_WINDOWS) * feeder.rate)
+    data = MockAdapter().update()
+
+    results = []
+    for scale in SCALES:
+        graph = TraceGraphWidget(buffer)
+        graph.resize(int(300 * scale), int(96 * scale))
+
+        dashboard = DashboardGaugeWidget()
+        dashboard.setFixedSize(int(64 * scale), int(64 * scale))
+
+        bars = InputBarsWidget()
+        bars.set_scale(scale)
+        bars.resize(bars.sizeHint())
+
+        # (name, widget, called before every timed paint)
+        widgets = (
+            ('TraceGraphWidget', graph, feeder.feed_frame),
+            ('DashboardGaugeWidget', dashboard,
+             lambda: dashboard.update_data(data.gear, data.speed_kph, data.rpm, data.steering_angle)),
+            ('InputBarsWidget', bars, lambda: bars.update_data(data.clutch, data.brake, data.throttle)),
+        )
+        for name, widget, feed in widgets:
+            pixmap = QPixmap(widget.size())
+            pixmap.fill(Qt.transparent)
+            feed()
+            widget.render(pixmap) # warm up caches, e.g. the graph's backing store
+            results.append(summarize(f'{name}.paintEvent[{scale}x]', 'widget',
+                                     time_calls(lambda: widget.render(pixmap), iterations, setup=feed),
+                                     scale=scale, width=widget.width(), height=widget.height()))
+
+    for window in TRACE_WINDOWS:
+        graph = TraceGraphWidget(buffer, window_s=window)
+        graph.resize(300, 96)
+        pixmap = QPixmap(graph.size())
+        pixmap.fill(Qt.transparent)
+        feeder.feed_frame()
+        graph.render(pixmap)
+        results.append(summarize(f'TraceGraphWidget.paintEvent[1.0x,{window}s]', 'widget',
+                                 time_calls(lambda: graph.render(pixmap), iterations, setup=feeder.feed_frame),
+                                 scale=1.0, window_s=window))
+        results.append(summarize(f'TraceGraphWidget.redraw[1.0x,{window}s]', 'widget',
+                                 time_calls(lambda: graph.render(pixmap), iterations, setup=graph.invalidate),
+                                 scale=1.0, window_s=window))
+    return results
+
+# --- Reporting --------------------------------------------------------------
+
+def git_revision():
+    try:
+        root = os.path.join(os.path.dirname(__file__), '..')
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {row['name']: row for row in json.load(f)['results']}
+    print(f"\n{'benchmark':<52}{'base p50':>10}{'p50':>10}{'ratio':>8}")
+    for row in results:
+        old = baseline.get(row['name'])
+        if old is None or old['p50'] == 0:
+            print(f"{row['name']:<52}{'-':>10}{row['p50']:>10.2f}{'-':>8}")
+            continue
+        print(f"{row['name']:<52}{old['p50']:>10.2f}{row['p50']:>10.2f}{row['p50'] / old['p50']:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for adapters, engine loop and widgets")
+    parser.add_argument("--only", choices=["adapters", "engine", "widgets"], action="append",
+                        help="run only these groups (repeatable)")
+    parser.add_argument("--iterations", type=int, default=2000, help="calls per adapter benchmark")
+    parser.add_argument("--paint-iterations", type=int, default=200, help="repaints per widget and scale")
+    parser.add_argument("--engine-seconds", type=float, default=3.0, help="run time per engine rate")
+    parser.add_argument("--rates", type=int, nargs="+", default=[60, 333], help="acquisition rates to test")
+    parser.add_argument("--spin-us", type=int, nargs="+", default=[0, 500], help="engine spin-wait settings to test")
+    parser.add_argument("--ir-test-file", help="irsdk memory dump to decode (default: a synthetic one)")
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="print p50 ratios against an earlier JSON result")
+    args = parser.parse_args()
+
+    groups = args.only or ["adapters", "engine", "widgets"]
+    results = []
+    if "adapters" in groups:
+        results += bench_adapters(args.iterations, args.ir_test_file)
+    if "engine" in groups:
+        results += bench_engine(args.engine_seconds, args.rates, args.spin_us)
+    if "widgets" in groups:
+        results += bench_widgets(args.paint_iterations)
+
+    report = {
+        'revision': git_revision(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    for row in results:
+        print(f"{row['name']:<52} p50 {row['p50']:>9.2f}us  p99 {row['p99']:>9.2f}us  max {row['max']:>9.2f}us")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import sys
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+import threading
+import ipaddress
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from telemetry.broadcast import StreamDecoder, TelemetryBroadcaster, UdpTarget
+from telemetry.ring_buffer import TelemetryBuffer
+from telemetry.adapters.mock import MockAdapter
+
+# Reference receiver for the telemetry broadcast (main.py --broadcast-udp / --broadcast-ws):
+#
+#   python scripts/broadcast_client.py udp 239.255.0.1:9988
+#   python scripts/broadcast_client.py ws localhost:9989 --channels timestamp,rpm,g_lat --rate 10
+#   python scripts/broadcast_client.py --self-test
+
+def address(text):
+    host, _, port = text.rpartition(":")
+    return host, int(port)
+
+class Receiver:
+    """Decodes packets and keeps per-second counters; optionally keeps every sample."""
+
+    def __init__(self, keep=False):
+        self.decoder = StreamDecoder()
+        self.keep = keep
+        self.received = [] # (first_seq, columns) when keep
+        self.packets = 0
+        self.samples = 0
+        self.latest = {}
+
+    def feed(self, packet):
+        self.packets += 1
+        frame = self.decoder.feed(packet)
+        if frame is None:
+            return
+        columns = frame['columns']
+        n = len(next(iter(columns.values())))
+        self.samples += n
+        self.latest = {name: column[-1].item() for name, column in columns.items()}
+        if self.keep:
+            self.received.append((frame['first_seq'], {name: column.copy() for name, column in columns.items()}))
+
+    def report(self, elapsed):
+        latest = ", ".join(f"{name}={value:.2f}" for name, value in self.latest.items() if name != 'timestamp')
+        print(f"{self.packets / elapsed:6.1f} packets/s {self.samples / elapsed:7.1f} samples/s "
+              f"lost {self.decoder.lost_samples:5d} | {latest}")
+        self.packets = self.samples = 0
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        try:
+            self.receiver.feed(data)
+        except ValueError:
+            pass # not ours
+
+def udp_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if ipaddress.ip_address(host).is_multicast:
+        sock.bind(('', port))
+        membership = struct.pack('4s4s', socket.inet_aton(host), socket.inet_aton('0.0.0.0'))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    else:
+        sock.bind((host, port))
+    return sock
+
+async def receive_udp(host, port, receiver, seconds, report=True):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(receiver), sock=udp_socket(host, port))
+    try:
+        await _report_until(receiver, seconds, report)
+    finally:
+        transport.close()
+
+async def receive_websocket(host, port, receiver, seconds, channels=None, rate_hz=None, report=True):
+    import websockets
+    async with websockets.connect(f"ws://{host}:{port}") as ws:
+        hello = {}
+        if channels:
+            hello['channels'] = channels
+        if rate_hz:
+            hello['rate_hz'] = rate_hz
+        await ws.send(json.dumps(hello))
+
+        async def pump():
+            async for message in ws:
+                receiver.feed(message)
+        task = asyncio.create_task(pump())
+        try:
+            await _report_until(receiver, seconds, report)
+        finally:
+            task.cancel()
+
+async def _report_until(receiver, seconds, report):
+    start = time.perf_counter()
+    last = start
+    while seconds is None or time.perf_counter() - start < seconds:
+        await asyncio.sleep(1.0 if seconds is None else min(1.0, seconds))
+        now = time.perf_counter()
+        if report:
+            receiver.report(now - last)
+        last = now
+
+def check(name, receiver, buffer):
+    """Everything received must be contiguous and equal to what the buffer holds."""
+    if not receiver.received:
+        print(f"{name}: FAIL, nothing received")
+        return False
+    seqs = [first for first, _ in receiver.received]
+    first = seqs[0]
+    end = seqs[-1] + len(receiver.received[-1][1]['timestamp'])
+    timestamps = np.concatenate([columns['timestamp'] for _, columns in receiver.received])
+    rpm = np.concatenate([columns['rpm'] for _, columns in receiver.received])
+    ok = (receiver.decoder.lost_samples == 0 and len(timestamps) == end - first
+          and np.array_equal(timestamps, buffer.window('timestamp', first, end))
+          and np.array_equal(rpm, buffer.window('rpm', first, end)))
+    print(f"{name}: {'ok' if ok else 'FAIL'}, {len(timestamps)} samples in {len(seqs)} packets, "
+          f"{receiver.decoder.lost_samples} lost")
+    return ok
+
+def self_test(seconds=2.0):
+    """Loopback round trip: a MockAdapter fed buffer, broadcast and received over UDP and WebSocket."""
+    buffer = TelemetryBuffer()
+    adapter = MockAdapter()
+    running = True
+
+    def acquire():
+        while running:
+            buffer.append(adapter.update(), time.perf_counter())
+            time.sleep(1 / 333)
+    threading.Thread(target=acquire, daemon=True).start()
+
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(('127.0.0.1', 0))
+    udp_port = probe.getsockname()[1]
+    probe.close()
+    try:
+        import websockets # noqa: F401
+        websocket = ('127.0.0.1', 0)
+    except ImportError:
+        print("websocket: skipped, the websockets package isn't installed")
+        websocket = None
+
+    broadcaster = TelemetryBroadcaster(buffer, udp=[UdpTarget('127.0.0.1', udp_port)], websocket=websocket, rate_hz=30)
+    udp = Receiver(keep=True)
+    ws = Receiver(keep=True)
+
+    async def run():
+        jobs = [receive_udp('127.0.0.1', udp_port, udp, seconds, report=False)]
+        if broadcaster.websocket_address:
+            host, port = broadcaster.websocket_address
+            jobs.append(receive_websocket(host, port, ws, seconds, channels=['timestamp', 'rpm', 'gear'], rate_hz=10, report=False))
+        await asyncio.gather(*jobs)
+
+    broadcaster.start()
+    try:
+        asyncio.run(run())
+    finally:
+        running = False
+        broadcaster.stop()
+    ok = check("udp", udp, buffer)
+    if broadcaster.websocket_address:
+        ok = check("websocket", ws, buffer) and ok
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference client for the telemetry broadcast")
+    parser.add_argument("transport", nargs="?", choices=("udp", "ws"))
+    parser.add_argument("address", nargs="?", type=address, help="HOST:PORT; for udp the group or local address to listen on")
+    parser.add_argument("--channels", help="comma-separated channels to request (ws only)")
+    parser.add_argument("--rate", type=float, help="frames per second to request (ws only)")
+    parser.add_argument("--seconds", type=float, help="stop after this long (default: until Ctrl+C)")
+    parser.add_argument("--self-test", action="store_true", help="run a loopback round trip against a mock source and exit")
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    if not args.transport or not args.address:
+        parser.error("transport and address are required unless --self-test is given")
+
+    receiver = Receiver()
+    host, port = args.address
+    try:
+        if args.transport == "udp":
+            asyncio.run(receive_udp(host, port, receiver, args.seconds))
+        else:
+            channels = args.channels.split(",") if args.channels else None
+            asyncio.run(receive_websocket(host, port, receiver, args.seconds, channels, args.rate))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telemetry.export import export_session, parse_laps, FORMATS, PARQUET, CSV, BLOCK_SAMPLES
+
+# Converts a recorded session for external analysis tools, a block at a time:
+#
+#   python scripts/export_session.py recordings/stint.srtl stint.parquet
+#   python scripts/export_session.py recordings/stint.srtl stint.csv --channels throttle,brake,speed_kph --laps 3-5
+#   python scripts/export_session.py recordings/stint.srtl stint_motec.csv --format motec --rate 100
+
+def guess_format(output):
+    if output.endswith(".parquet"):
+        return PARQUET
+    if output.endswith(".csv"):
+        return CSV
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a recorded .srtl session to Parquet, CSV or MoTeC CSV")
+    parser.add_argument("session", help="recorded session file")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("-f", "--format", choices=FORMATS, help="output format (default: from the output extension, .parquet or .csv)")
+    parser.add_argument("--channels", metavar="NAMES", help="comma-separated channels to export (default: all); time is always included")
+    parser.add_argument("--laps", metavar="LAPS", help="laps to export, e.g. 3-5,8 (default: all)")
+    parser.add_argument("--rate", type=float, metavar="HZ", help="MoTeC sample rate (default: the sim's native rate)")
+    parser.add_argument("--block", type=int, default=BLOCK_SAMPLES, help=f"samples read at a time (default: {BLOCK_SAMPLES})")
+    args = parser.parse_args()
+
+    format = args.format or guess_format(args.output)
+    if format is None:
+        parser.error("can't tell the format from the output name, give --format")
+    channels = [name.strip() for name in args.channels.split(",") if name.strip()] if args.channels else None
+    try:
+        laps = parse_laps(args.laps) if args.laps else None
+    except ValueError:
+        parser.error(f"--laps expects lap numbers and ranges like 3-5,8, got '{args.laps}'")
+
+    start = time.perf_counter()
+    try:
+        result = export_session(args.session, args.output, format, channels, laps, args.rate, args.block)
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        print(f"Export failed: {e.args[0] if isinstance(e, KeyError) else e}")
+        sys.exit(1)
+    details = ""
+    if 'row_groups' in result:
+        details = f", {result['row_groups']} row groups"
+    if 'rate_hz' in result:
+        details = f", resampled to {result['rate_hz']:g} Hz"
+    print(f"Wrote {result['samples']} samples of {len(result['channels'])} channels to {args.output} "
+          f"({format}{details}) in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ def main():
     print("Waiting for connection (Press Ctrl+C to stop)...")
     try:
         while True:
+            if not adapter.connected:
+                adapter.connect()
             data = adapter.update()
             if adapter.connected:
                 print(f"\rConnected! RPM: {data.rpm:.0f}, Speed: {data.speed_kph:.0f} km/h, Gear: {data.gear}, Active: {data.active}    ", end='')
@@ -0,0 +1,331 @@
+import os
+import time
+import secrets
+import threading
+import subprocess
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from PySide6.QtCore import QObject, Signal, QTimer
+from .shared_buffer import SharedTelemetryBuffer
+from .mailbox import FrameMailbox
+from .governor import RateGovernor
+from .channels import default_channels
+from .instrumentation import probes, stage_order
+
+# Shared memory name of the acquisition service's buffer
+DEFAULT_NAME = "srtl_acquisition"
+
+class AcquisitionService:
+    """Runs a TelemetryEngine headless, for overlays running in other processes.
+
+    The engine writes into a SharedTelemetryBuffer that GUI processes attach to and read
+    directly, so Qt painting never competes with acquisition for the GIL. The status
+    fields of the buffer (adapter, governor state, recording) are refreshed every
+    STATUS_INTERVAL; anything else (detection state, recording, channel subscriptions)
+    goes through request/reply calls on a multiprocessing.connection socket whose address
+    and key are published in the buffer too.
+
+    The service outlives its clients: a GUI that crashes or is closed with
+    `keep_running` can attach again and finds the whole history still there.
+    """
+    STATUS_INTERVAL = 0.05
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.buffer = engine.buffer
+        authkey = secrets.token_bytes(32)
+        # Default family: a named pipe on Windows, a Unix socket elsewhere
+        self._listener = Listener(authkey=authkey)
+        self.buffer.set_status(control=str(self._listener.address), authkey=authkey.hex())
+        self._stop = threading.Event()
+
+    def serve(self):
+        """Acquires until a client asks for a shutdown or the process is interrupted."""
+        self.engine.start()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        try:
+            while not self._stop.wait(self.STATUS_INTERVAL):
+                self._publish_status()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self.engine.stop()
+            self._listener.close()
+            self.buffer.close()
+
+    def shutdown(self):
+        self._stop.set()
+
+    def _publish_status(self):
+        engine = self.engine
+        self.buffer.set_status(
+            adapter=engine.adapter.name,
+            governor=engine.governor.state,
+            recording=engine.recorder is not None,
+        )
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                break # listener closed
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def _serve_client(self, conn):
+        tokens = [] # channel subscriptions, dropped with the client
+        try:
+            while True:
+                command, *args = conn.recv()
+                try:
+                    reply = ('ok', self._handle(command, args, tokens))
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                conn.send(reply)
+        except (EOFError, OSError):
+            pass
+        finally:
+            for token in tokens:
+                self.engine.channels.unsubscribe(token)
+            conn.close()
+
+    def _handle(self, command, args, tokens):
+        engine = self.engine
+        if command == 'detection_state':
+            return engine.detection_state()
+        if command == 'rates':
+            return engine.rates()
+        if command == 'timings':
+            return engine.timings()
+        if command == 'car_positions':
+            return engine.car_positions()
+        if command == 'session_info':
+            return engine.session_info()
+        if command == 'recording':
+            return _recording_info(engine.recorder)
+        if command in ('start_recording', 'stop_recording'):
+            recorder = engine.start_recording(*args) if command == 'start_recording' else engine.stop_recording()
+            self._publish_status() # the caller reads the recording flag right after
+            return _recording_info(recorder)
+        if command == 'subscribe':
+            token = engine.channels.subscribe(*args)
+            tokens.append(token)
+            return token
+        if command == 'unsubscribe':
+            if args[0] in tokens:
+                tokens.remove(args[0])
+            engine.channels.unsubscribe(args[0])
+            return None
+        if command == 'shutdown':
+            self.shutdown()
+            return None
+        raise ValueError(f"Unknown command '{command}'")
+
+def _recording_info(recorder):
+    if recorder is None:
+        return None
+    return {
+        'path': recorder.path,
+        'samples_written': recorder.samples_written,
+        'dropped_samples': recorder.dropped_samples,
+    }
+
+def launch_service(argv) -> subprocess.Popen:
+    """Starts `argv` (e.g. main.py --acquisition-service ...) detached, so it outlives us."""
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(argv, stdin=subprocess.DEVNULL, **kwargs)
+
+class RecordingInfo:
+    """A service side recording as seen by the GUI; mirrors the SessionRecorder attributes it prints."""
+
+    def __init__(self, path=None, samples_written=0, dropped_samples=0):
+        self.path = path
+        self.samples_written = samples_written
+        self.dropped_samples = dropped_samples
+
+class RingMailbox(FrameMailbox):
+    """FrameMailbox for a buffer written by another process: each take posts the newest sample.
+
+    Latency is measured from the sample's acquisition timestamp. perf_counter is one
+    system-wide monotonic clock on Windows and Linux, so it compares across processes.
+    """
+
+    def __init__(self, buffer):
+        super().__init__(buffer)
+        self._seen = None
+        self._rate_start = time.perf_counter()
+        self._rate_delivered = 0
+
+    def take(self):
+        count = self.buffer.count
+        if count and count != self._seen:
+            self._seen = count
+            seq = count - 1
+            slot = self._slot
+            timestamp = float(self.buffer.columns['timestamp'][seq % self.buffer.capacity])
+            self._slot = (slot[0] + 1 if slot else 1, self.buffer.sample(seq), count, timestamp)
+        return super().take()
+
+    def delivery_rate(self) -> float:
+        """Frames taken per second since the previous call."""
+        now = time.perf_counter()
+        rate = (self.delivered - self._rate_delivered) / max(now - self._rate_start, 1e-9)
+        self._rate_start, self._rate_delivered = now, self.delivered
+        return rate
+
+class RemoteChannels:
+    """ChannelRegistry stand-in whose subscriptions are made in the service."""
+
+    def __init__(self, engine, catalog):
+        self._engine = engine
+        self._catalog = catalog
+
+    def get(self, name):
+        return self._catalog.get(name)
+
+    def names(self):
+        return self._catalog.names()
+
+    def subscribe(self, names) -> int:
+        return self._engine.call('subscribe', [self.get(name).name for name in names])
+
+    def unsubscribe(self, token):
+        self._engine.call('unsubscribe', token)
+
+class RemoteEngine(QObject):
+    """Stands in for TelemetryEngine in the GUI when acquisition runs in an AcquisitionService.
+
+    Offers what OverlayWindow uses (buffer, mailbox, governor, signals, recording and
+    status calls) on top of the service's shared buffer and control socket. Status fields
+    are polled from the buffer every STATUS_INTERVAL_MS to emit the signals.
+    """
+    adapter_changed = Signal(str)
+    governor_changed = Signal(str)
+
+    STATUS_INTERVAL_MS = 50
+
+    def __init__(self, buffer: SharedTelemetryBuffer, channels=None):
+        super().__init__()
+        self.buffer = buffer
+        status = buffer.status()
+        if not status['control']:
+            raise ConnectionError(f"Acquisition service '{buffer.name}' is not accepting connections yet")
+        self._conn = Client(status['control'], authkey=bytes.fromhex(status['authkey']))
+        self._lock = threading.Lock()
+        self.pid = status['pid']
+        self.mailbox = RingMailbox(buffer)
+        # Mirrors the service's governor state; the overlay reads idle and idle_ui_hz from it
+        self.governor = RateGovernor()
+        self.governor.state = status['governor'] or self.governor.state
+        self.channels = RemoteChannels(self, channels or default_channels())
+        self.ui_hz = 60.0 # set by the overlay, the service doesn't post UI frames
+        # Leave the service running when the GUI stops, to attach again later
+        self.keep_running = False
+        self._adapter_name = status['adapter']
+        self._recording = None
+        self._timer = None
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME, launch=None, timeout=10.0, channels=None):
+        """Attaches to the service publishing `name`, after starting `launch` (argv) if there is none."""
+        process = None
+        deadline = time.monotonic() + timeout
+        while True:
+            buffer = None
+            try:
+                buffer = SharedTelemetryBuffer.attach(name)
+                return cls(buffer, channels)
+            except (FileNotFoundError, ConnectionError, ValueError):
+                # Not running, or started but not serving yet
+                if buffer is not None:
+                    buffer.close()
+                if launch is None and process is None:
+                    raise
+            if process is None:
+                process = launch_service(launch)
+            elif process.poll() is not None:
+                raise ConnectionError(f"Acquisition service exited with code {process.returncode}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Acquisition service '{name}' did not start within {timeout:.0f}s")
+            time.sleep(0.1)
+
+    def call(self, command, *args):
+        """Request/reply call to the service; errors raised there are raised here as RuntimeError."""
+        with self._lock:
+            self._conn.send((command, *args))
+            status, value = self._conn.recv()
+        if status == 'error':
+            raise RuntimeError(value)
+        return value
+
+    def start(self):
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._poll_status)
+        self._timer.start(self.STATUS_INTERVAL_MS)
+
+    def stop(self):
+        """Detaches; also stops the service unless keep_running is set."""
+        if self._timer:
+            self._timer.stop()
+        try:
+            if not self.keep_running:
+                self.call('shutdown')
+            self._conn.close()
+        except (OSError, EOFError):
+            pass
+
+    def _poll_status(self):
+        status = self.buffer.status()
+        if status['adapter'] != self._adapter_name:
+            self._adapter_name = status['adapter']
+            self.adapter_changed.emit(self._adapter_name)
+        if status['governor'] and status['governor'] != self.governor.state:
+            self.governor.state = status['governor']
+            self.governor_changed.emit(self.governor.state)
+
+    def detection_state(self) -> dict:
+        return self.call('detection_state')
+
+    def car_positions(self):
+        return self.call('car_positions')
+
+    def session_info(self) -> dict:
+        return self.call('session_info')
+
+    def rates(self) -> dict:
+        rates = self.call('rates')
+        # The service doesn't draw; report how often this GUI actually got frames
+        rates['ui_hz'] = self.mailbox.delivery_rate()
+        return rates
+
+    def timings(self) -> dict:
+        """Stage timings of the service (acquisition) and of this process (queue wait, painting)."""
+        timings = self.call('timings')
+        timings.update((name, stats) for name, stats in probes.stats().items() if stats['count'])
+        return dict(sorted(timings.items(), key=lambda item: stage_order(item[0])))
+
+    @property
+    def recorder(self):
+        """RecordingInfo of the recording in progress in the service, None if there is none."""
+        if not self.buffer.status()['recording']:
+            self._recording = None
+        elif self._recording is None:
+            info = self.call('recording')
+            self._recording = RecordingInfo(**info) if info else None
+        return self._recording
+
+    def start_recording(self, path=None, directory="recordings") -> RecordingInfo:
+        self._recording = RecordingInfo(**self.call('start_recording', path, directory))
+        return self._recording
+
+    def stop_recording(self):
+        info = self.call('stop_recording')
+        self._recording = None
+        return RecordingInfo(**info) if info else None
@@ -0,0 +1,66 @@
+import os
+import mmap
+import ctypes
+import tempfile
+from .ac_types import SPageFilePhysics, SPageFileGraphics, SPageFileStatic
+
+_PAGES = {
+    "Local\\acpmf_physics": ("acpmf_physics", SPageFilePhysics),
+    "Local\\acpmf_graphics": ("acpmf_graphics", SPageFileGraphics),
+    "Local\\acpmf_static": ("acpmf_static", SPageFileStatic),
+}
+
+class FakeACSharedMemory:
+    """File-backed stand-in for AC's named shared memory pages, usable on any OS.
+
+    Each page is a file with exactly the ac_types layout. The writer side edits the
+    pages through ctypes views, the adapter side opens them read-only via `open_page`:
+
+        shm = FakeACSharedMemory()
+        adapter = AssettoCorsaAdapter(page_opener=shm.open_page)
+        adapter.connect()
+        shm.physics.gas = 0.5
+        shm.physics.packetId += 1
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or tempfile.mkdtemp(prefix="acpmf_")
+        self._maps = {}
+        self._readers = []
+        for tagname, (filename, structure) in _PAGES.items():
+            path = os.path.join(self.directory, filename)
+            size = ctypes.sizeof(structure)
+            with open(path, "wb") as f:
+                f.write(b"\0" * size)
+            with open(path, "r+b") as f:
+                self._maps[tagname] = mmap.mmap(f.fileno(), size)
+
+        # Writable views straight onto the mapped files
+        self.physics = SPageFilePhysics.from_buffer(self._maps["Local\\acpmf_physics"])
+        self.graphics = SPageFileGraphics.from_buffer(self._maps["Local\\acpmf_graphics"])
+        self.static = SPageFileStatic.from_buffer(self._maps["Local\\acpmf_static"])
+
+    def open_page(self, tagname, size):
+        """Drop-in replacement for the adapter's page_opener."""
+        if tagname not in _PAGES:
+            raise FileNotFoundError(tagname)
+        path = os.path.join(self.directory, _PAGES[tagname][0])
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._readers.append(mm)
+        return mm
+
+    def step(self, **physics):
+        """Writes the given physics fields and publishes them as a new packet."""
+        for name, value in physics.items():
+            setattr(self.physics, name, value)
+        self.physics.packetId += 1
+
+    def close(self):
+        # ctypes views keep exported buffers alive, drop them before closing the maps
+        self.physics = self.graphics = self.static = None
+        for mm in self._readers:
+            if not mm.closed:
+                mm.close()
+        for mm in self._maps.values():
+            mm.close()
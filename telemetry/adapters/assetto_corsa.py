@@ -1,41 +1,209 @@
 import mmap
 import ctypes
+import struct
 import time
-from .base import GameAdapter, TelemetryData
+import numpy as np
+from dataclasses import replace
+from .base import GameAdapter, TelemetryData, CarPositions
+from ..instrumentation import probes
 from .ac_types import SPageFilePhysics, SPageFileGraphics, SPageFileStatic, AC_STATUS_PAUSE, AC_STATUS_LIVE, AC_STATUS_REPLAY
 
+_CTYPE_FORMATS = {ctypes.c_int: 'i', ctypes.c_float: 'f'}
+
+def page_reader(structure, names):
+    """Builds a struct.Struct decoding only `names` of a shared memory page in one unpack_from call.
+
+    Offsets come from the ctypes definition in ac_types, and the gaps between the
+    requested fields are skipped as pad bytes, so nothing else in the page is touched.
+    Values are returned in offset order.
+    """
+    types = dict(structure._fields_)
+    fields = sorted(names, key=lambda n: getattr(structure, n).offset)
+    fmt = '<'
+    pos = 0
+    for name in fields:
+        offset = getattr(structure, name).offset
+        if offset > pos:
+            fmt += f'{offset - pos}x'
+        fmt += _CTYPE_FORMATS[types[name]]
+        pos = offset + getattr(structure, name).size
+    return struct.Struct(fmt), fields
+
+def element_reader(structure, sources):
+    """Like page_reader, for single elements given as Sources (field, flat index into arrays).
+
+    Returns the Struct and the position of each source's value in its unpacked tuple.
+    """
+    elements = []
+    for source in sources:
+        ctype = dict(structure._fields_)[source.field]
+        offset = getattr(structure, source.field).offset
+        if source.index is not None:
+            # Walk down nested arrays (e.g. c_float * 60 * 3) to the element type
+            while hasattr(ctype, '_length_'):
+                ctype = ctype._type_
+            offset += source.index * ctypes.sizeof(ctype)
+        elements.append((offset, ctypes.sizeof(ctype), _CTYPE_FORMATS[ctype]))
+    order = sorted(range(len(elements)), key=lambda i: elements[i][0])
+    fmt = '<'
+    pos = 0
+    positions = [0] * len(elements)
+    slot = -1
+    last_offset = None
+    for i in order:
+        offset, size, code = elements[i]
+        if offset != last_offset: # two channels may share one value
+            if offset > pos:
+                fmt += f'{offset - pos}x'
+            fmt += code
+            pos = offset + size
+            slot += 1
+            last_offset = offset
+        positions[i] = slot
+    return struct.Struct(fmt), positions
+
+def open_shared_page(tagname, size):
+    # Named shared memory only exists on Windows
+    return mmap.mmap(-1, size, tagname=tagname, access=mmap.ACCESS_READ)
+
+_PACKET_ID = struct.Struct('<i')
+
+# Only these physics fields feed TelemetryData; everything else in the page is skipped
+_PHYSICS_STRUCT, _PHYSICS_FIELDS = page_reader(
+    SPageFilePhysics, ['gas', 'brake', 'clutch', 'gear', 'rpms', 'steerAngle', 'speedKmh']
+)
+_GRAPHICS_STRUCT, _GRAPHICS_FIELDS = page_reader(SPageFileGraphics, ['packetId', 'status'])
+# Lap progress changes every frame, unlike status; read with each new physics packet
+_LAP_STRUCT, _LAP_FIELDS = page_reader(
+    SPageFileGraphics, ['completedLaps', 'iLastTime', 'iBestTime', 'normalizedCarPosition']
+)
+
+# Every car on track: activeCars, then carCoordinates as [60][3] floats and carID as [60] ints
+_ACTIVE_CARS = struct.Struct('<i')
+_ACTIVE_CARS_OFFSET = SPageFileGraphics.activeCars.offset
+_CAR_COORDINATES_OFFSET = SPageFileGraphics.carCoordinates.offset
+_CAR_ID_OFFSET = SPageFileGraphics.carID.offset
+_PLAYER_CAR_ID = struct.Struct('<i')
+_PLAYER_CAR_ID_OFFSET = SPageFileGraphics.playerCarID.offset
+_MAX_CARS = 60
+
+# Stage timings, see telemetry.instrumentation
+_READ_PROBE = probes.stage("adapter.read")
+_DECODE_PROBE = probes.stage("adapter.decode")
+
+def _lap_time(ms):
+    # AC reports no time as 0 (or INT_MAX for the best lap before one is set)
+    return ms / 1000.0 if 0 < ms < 2**31 - 1 else 0.0
+
 class AssettoCorsaAdapter(GameAdapter):
-    def __init__(self):
+    # Graphics (status) and static (car/track) pages change far less often than physics
+    GRAPHICS_INTERVAL = 0.1
+    STATIC_INTERVAL = 5.0
+    # AC physics step rate
+    native_rate_hz = 333
+    source_key = "assetto_corsa"
+
+    def __init__(self, page_opener=open_shared_page, fast_reader=True):
+        # page_opener(tagname, size) returns a readable buffer, swap it for a file-backed mmap to run off Windows
+        self._page_opener = page_opener
+        # fast_reader: skip unchanged packets and decode only the fields we use, without copying whole pages
+        self.fast_reader = fast_reader
         self._physics_mm = None
         self._graphics_mm = None
         self._static_mm = None
         self._connected = False
-        self._last_connect_attempt = 0
         self.static_data = None # Cache static data
 
+        self._last_packet_id = None
+        self._last_data = TelemetryData()
+        self._is_active = False
+        self._graphics_read_at = 0.0
+        self._static_read_at = 0.0
+        # Subscribed optional channels, per page: (Struct, [(name, position, scale)]) or None
+        self._physics_extras = None
+        self._graphics_extras = None
+
+    @property
+    def frame_id(self):
+        """Physics packetId of the last decoded frame, None until the first read."""
+        return self._last_packet_id
+
     @property
     def name(self) -> str:
         return "Assetto Corsa"
 
+    def set_channels(self, channels):
+        self._physics_extras = self._extras_reader(SPageFilePhysics, 'physics', channels)
+        self._graphics_extras = self._extras_reader(SPageFileGraphics, 'graphics', channels)
+
+    def _extras_reader(self, structure, page, channels):
+        wanted = [(channel.name, channel.sources[self.source_key]) for channel in channels
+                  if self.source_key in channel.sources and channel.sources[self.source_key].page == page]
+        if not wanted:
+            return None
+        reader, positions = element_reader(structure, [source for _, source in wanted])
+        return reader, [(name, position, source.scale) for (name, source), position in zip(wanted, positions)]
+
+    def _read_extras(self):
+        # One unpack_from per page that has subscribed channels, nothing otherwise
+        channels = {}
+        for extras, mm in ((self._physics_extras, self._physics_mm), (self._graphics_extras, self._graphics_mm)):
+            if extras is not None:
+                reader, layout = extras
+                values = reader.unpack_from(mm)
+                for name, position, scale in layout:
+                    channels[name] = values[position] * scale
+        return channels
+
+    def session_info(self) -> dict:
+        static = self.static_data
+        if static is None:
+            return {}
+        return {
+            'car': static.carModel,
+            'track': static.track,
+            'track_configuration': static.trackConfiguration,
+            'track_length_m': static.trackSplineLength,
+            'max_rpm': static.maxRpm,
+            'driver': f"{static.playerName} {static.playerSurname}".strip(),
+            'ac_version': static.acVersion,
+        }
+
+    def car_positions(self) -> CarPositions:
+        if not self._connected:
+            return None
+        mm = self._graphics_mm
+        try:
+            n = min(max(_ACTIVE_CARS.unpack_from(mm, _ACTIVE_CARS_OFFSET)[0], 0), _MAX_CARS)
+            # Straight views of the page, copied once so the snapshot doesn't change under the reader
+            positions = np.frombuffer(mm, np.float32, n * 3, _CAR_COORDINATES_OFFSET).reshape(n, 3).copy()
+            ids = np.frombuffer(mm, np.int32, n, _CAR_ID_OFFSET).copy()
+            player_id = _PLAYER_CAR_ID.unpack_from(mm, _PLAYER_CAR_ID_OFFSET)[0]
+        except (ValueError, TypeError):
+            return None # pages closed by a disconnect
+        return CarPositions(ids, positions, player_id)
+
     @property
     def connected(self) -> bool:
         return self._connected
 
-    def _connect(self):
-        # Rate limit connection attempts
-        if time.time() - self._last_connect_attempt < 2.0:
-            return False
-        
-        self._last_connect_attempt = time.time()
+    def connect(self) -> bool:
+        if self._connected:
+            return True
+        return self._open_pages()
 
+    def _open_pages(self):
         try:
             # AC uses specific shared memory names
-            self._physics_mm = mmap.mmap(-1, ctypes.sizeof(SPageFilePhysics), tagname="Local\\acpmf_physics", access=mmap.ACCESS_READ)
-            self._graphics_mm = mmap.mmap(-1, ctypes.sizeof(SPageFileGraphics), tagname="Local\\acpmf_graphics", access=mmap.ACCESS_READ)
-            self._static_mm = mmap.mmap(-1, ctypes.sizeof(SPageFileStatic), tagname="Local\\acpmf_static", access=mmap.ACCESS_READ)
+            self._physics_mm = self._page_opener("Local\\acpmf_physics", ctypes.sizeof(SPageFilePhysics))
+            self._graphics_mm = self._page_opener("Local\\acpmf_graphics", ctypes.sizeof(SPageFileGraphics))
+            self._static_mm = self._page_opener("Local\\acpmf_static", ctypes.sizeof(SPageFileStatic))
             
             # If we got here, we connected. Read static data once.
             self.static_data = SPageFileStatic.from_buffer_copy(self._static_mm)
+            self._static_read_at = time.time()
+            self._last_packet_id = None
+            self._graphics_read_at = 0.0
             self._connected = True
             return True
         except FileNotFoundError:
@@ -55,20 +223,29 @@ class AssettoCorsaAdapter(GameAdapter):
         self._graphics_mm = None
         self._static_mm = None
         self.static_data = None
+        self._last_packet_id = None
         self._connected = False
 
     def update(self) -> TelemetryData:
+        # Connecting is up to AdapterDiscovery, which retries with backoff off the hot loop
         if not self._connected:
-            if not self._connect():
-                return TelemetryData() # Return empty if not connected
+            return TelemetryData() # Return empty if not connected
 
         try:
+            if self.fast_reader:
+                return self._read_fast()
+
             # Read from shared memory
+            t0 = time.perf_counter_ns()
             self._physics_mm.seek(0)
             physics = SPageFilePhysics.from_buffer_copy(self._physics_mm)
             
             self._graphics_mm.seek(0)
             graphics = SPageFileGraphics.from_buffer_copy(self._graphics_mm)
+            channels = self._read_extras() if self._physics_extras or self._graphics_extras else {}
+            t1 = time.perf_counter_ns()
+            _READ_PROBE.record(t1 - t0)
+            self._last_packet_id = physics.packetId
 
             # Map to TelemetryData
             
@@ -90,7 +267,7 @@ class AssettoCorsaAdapter(GameAdapter):
             # Note says "radians" in TelemetryData.
             # ac_types has 'steerAngle' (float). In AC it is usually radians.
             
-            return TelemetryData(
+            data = TelemetryData(
                 throttle=physics.gas,
                 brake=physics.brake,
                 clutch=physics.clutch, # physics.clutch is available
@@ -98,11 +275,70 @@ class AssettoCorsaAdapter(GameAdapter):
                 speed_kph=physics.speedKmh,
                 steering_angle=-physics.steerAngle, 
                 gear=gear,
-                active=is_active
+                active=is_active,
+                lap=graphics.completedLaps + 1,
+                lap_dist_pct=graphics.normalizedCarPosition,
+                last_lap_time=_lap_time(graphics.iLastTime),
+                best_lap_time=_lap_time(graphics.iBestTime),
+                channels=channels,
             )
+            _DECODE_PROBE.record(time.perf_counter_ns() - t1)
+            return data
 
         except Exception as e:
             # If reading fails, maybe game closed or crashed
             print(f"Error reading AC shared memory: {e}")
             self._disconnect()
             return TelemetryData()
+
+    def _read_fast(self) -> TelemetryData:
+        now = time.time()
+        if now - self._graphics_read_at >= self.GRAPHICS_INTERVAL:
+            self._graphics_read_at = now
+            _, status = _GRAPHICS_STRUCT.unpack_from(self._graphics_mm)
+            self._is_active = status == AC_STATUS_LIVE
+
+        if now - self._static_read_at >= self.STATIC_INTERVAL:
+            # Static page only changes between sessions, a full copy here is cheap
+            self._static_read_at = now
+            self.static_data = SPageFileStatic.from_buffer_copy(self._static_mm)
+
+        # packetId only advances when AC publishes a new physics step
+        packet_id = _PACKET_ID.unpack_from(self._physics_mm)[0]
+        if packet_id == self._last_packet_id:
+            if self._last_data.active != self._is_active:
+                self._last_data = replace(self._last_data, active=self._is_active)
+            return self._last_data
+        self._last_packet_id = packet_id
+
+        t0 = time.perf_counter_ns()
+        gas, brake, gear_raw, rpms, steer, speed, clutch = _PHYSICS_STRUCT.unpack_from(self._physics_mm)
+        completed_laps, last_ms, best_ms, lap_dist = _LAP_STRUCT.unpack_from(self._graphics_mm)
+        channels = self._read_extras() if self._physics_extras or self._graphics_extras else {}
+        t1 = time.perf_counter_ns()
+        _READ_PROBE.record(t1 - t0)
+        # Same mapping as the full-copy path: 0=R, 1=N, 2=1st
+        if gear_raw == 0:
+            gear = -1
+        elif gear_raw == 1:
+            gear = 0
+        else:
+            gear = gear_raw - 1
+
+        self._last_data = TelemetryData(
+            throttle=gas,
+            brake=brake,
+            clutch=clutch,
+            rpm=float(rpms),
+            speed_kph=speed,
+            steering_angle=-steer,
+            gear=gear,
+            active=self._is_active,
+            lap=completed_laps + 1,
+            lap_dist_pct=lap_dist,
+            last_lap_time=_lap_time(last_ms),
+            best_lap_time=_lap_time(best_ms),
+            channels=channels,
+        )
+        _DECODE_PROBE.record(time.perf_counter_ns() - t1)
+        return self._last_data
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class TelemetryData:
@@ -11,8 +11,74 @@ class TelemetryData:
     steering_angle: float = 0.0 # radians, 0 = center, positive = left? Need to check convention. Usually CCW is positive.
     gear: int = 0          # 0 = N, -1 = R, 1-N = Gears
     active: bool = False   # True if game is active/driving
+    lap: int = 0           # Current lap number as counted by the sim, 0 if unknown
+    lap_dist_pct: float = 0.0 # 0.0 to 1.0 around the lap from the start/finish line
+    last_lap_time: float = 0.0 # seconds, 0 if no lap completed yet
+    best_lap_time: float = 0.0 # seconds, 0 if no lap completed yet
+    # Subscribed optional channels (see telemetry.channels), name -> value
+    channels: dict = field(default_factory=dict)
+
+@dataclass
+class CarPositions:
+    """Every car on track at one instant, as numpy arrays (see GameAdapter.car_positions)."""
+    ids: object # (n,) int32 car ids
+    positions: object # (n, 3) float32 world x, y (up), z in meters
+    player_id: int = 0
 
 class GameAdapter(ABC):
+    # Rate at which the sim publishes new samples, None if there is no such limit
+    native_rate_hz = None
+    # Adapters backed by a sim override this with their live connection state
+    connected = True
+    # Key of this adapter in Channel.sources, None if it can't provide optional channels
+    source_key = None
+
+    def connect(self) -> bool:
+        """Tries once to attach to the sim and returns whether it is connected.
+
+        Called from the discovery thread, which owns retry scheduling, so it should
+        fail fast and not rate limit itself.
+        """
+        return self.connected
+
+    @property
+    def frame_id(self):
+        """Counter of the sim's last published sample (e.g. AC packetId, iRacing TickCount).
+
+        The engine uses it to drop polls that returned an already seen sample.
+        None means the adapter can't tell, and every poll is treated as a new sample.
+        """
+        return None
+
+    @property
+    def sample_time(self):
+        """Session time of the last sample, for adapters with their own clock (a replay).
+
+        Lap times and the delta use it instead of the time the engine stored the sample,
+        so they stay right when samples arrive faster or slower than they were recorded.
+        None for live sims.
+        """
+        return None
+
+    def session_info(self) -> dict:
+        """Session metadata (car, track, max rpm...) for recording headers. Empty if unknown."""
+        return {}
+
+    def car_positions(self) -> CarPositions:
+        """Positions of every car in the session, None if the sim doesn't publish them.
+
+        Polled by the engine at display rate while a consumer (the track map) asks for them.
+        """
+        return None
+
+    def set_channels(self, channels):
+        """Optional channels to decode from now on, in TelemetryData.channels.
+
+        Called by the engine whenever the subscriptions change, with every subscribed
+        Channel; adapters pick the ones they have a source for and skip the rest.
+        """
+        pass
+
     @abstractmethod
     def update(self) -> TelemetryData:
         """Called periodically to fetch the latest telemetry state."""
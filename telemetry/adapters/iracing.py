@@ -1,29 +1,83 @@
+import time
 import irsdk
 from .base import GameAdapter, TelemetryData
+from ..instrumentation import probes
+
+# Stage timings, see telemetry.instrumentation
+_READ_PROBE = probes.stage("adapter.read")
+_DECODE_PROBE = probes.stage("adapter.decode")
 
 class IRacingAdapter(GameAdapter):
-    def __init__(self):
+    # Live telemetry is published at 60Hz (360Hz only goes to .ibt disk files)
+    native_rate_hz = 60
+    source_key = "iracing"
+
+    def __init__(self, test_file=None):
         self.ir = irsdk.IRSDK()
+        # irsdk memory dump (irsdk --dump) to read instead of the live sim
+        self.test_file = test_file
         self.connected = False
+        self._last_tick = None
+        self._last_data = TelemetryData(active=False)
+        # Subscribed optional channels: (channel name, irsdk var, scale)
+        self._extras = []
+
+    @property
+    def frame_id(self):
+        return self._last_tick
 
     @property
     def name(self) -> str:
         return "iRacing"
 
+    def set_channels(self, channels):
+        sources = [(channel.name, channel.sources.get(self.source_key)) for channel in channels]
+        self._extras = [(name, source.field, source.scale) for name, source in sources if source is not None]
+
+    def session_info(self) -> dict:
+        if not self.connected:
+            return {}
+        # Session info is YAML parsed by irsdk into dicts
+        weekend = self.ir['WeekendInfo'] or {}
+        driver_info = self.ir['DriverInfo'] or {}
+        info = {
+            'track': weekend.get('TrackDisplayName'),
+            'track_configuration': weekend.get('TrackConfigName'),
+            'max_rpm': driver_info.get('DriverCarRedLineRPM'),
+        }
+        car_idx = driver_info.get('DriverCarIdx')
+        for driver in driver_info.get('Drivers') or []:
+            if driver.get('CarIdx') == car_idx:
+                info['car'] = driver.get('CarScreenName')
+                info['driver'] = driver.get('UserName')
+                break
+        return info
+
+    def connect(self) -> bool:
+        if not self.connected:
+            self.connected = self.ir.startup(test_file=self.test_file)
+        return self.connected
+
     def update(self) -> TelemetryData:
-        # Check connection on every update
+        # Connecting is up to AdapterDiscovery, which retries with backoff off the hot loop
         if not self.connected:
-            self.connected = self.ir.startup()
-            if not self.connected:
-                # Return empty/default data if not connected
-                return TelemetryData(active=False)
+            return TelemetryData(active=False)
 
-        # Still connected?
-        if not self.ir.is_initialized:
+        # Still connected? is_connected flips once the sim closes or stops publishing
+        if not self.ir.is_initialized or not self.ir.is_connected:
+            self.ir.shutdown()
             self.connected = False
+            self._last_tick = None
             return TelemetryData(active=False)
 
+        # Same sim tick as last time, nothing new to decode
+        tick = self.ir['TickCount']
+        if tick is not None and tick == self._last_tick:
+            return self._last_data
+        self._last_tick = tick
+
         # Read Data
+        t0 = time.perf_counter_ns()
         # iRacing gives inputs as 0.0-1.0 usually
         throttle = self.ir['Throttle'] or 0.0
         brake = self.ir['Brake'] or 0.0
@@ -47,8 +101,18 @@ class IRacingAdapter(GameAdapter):
         steering_angle = self.ir['SteeringWheelAngle'] or 0.0
         
         is_on_track = self.ir['IsOnTrack']
+
+        # Lap counts laps started, LapDistPct runs 0-1 from the start/finish line
+        lap = self.ir['Lap'] or 0
+        lap_dist_pct = self.ir['LapDistPct'] or 0.0
+        # Lap times are -1 until a lap is completed
+        last_lap_time = max(0.0, self.ir['LapLastLapTime'] or 0.0)
+        best_lap_time = max(0.0, self.ir['LapBestLapTime'] or 0.0)
+        channels = {name: (self.ir[var] or 0.0) * scale for name, var, scale in self._extras}
+        t1 = time.perf_counter_ns()
+        _READ_PROBE.record(t1 - t0)
         
-        return TelemetryData(
+        self._last_data = TelemetryData(
             throttle=throttle,
             brake=brake,
             clutch=clutch,
@@ -56,5 +120,12 @@ class IRacingAdapter(GameAdapter):
             speed_kph=speed_kph,
             gear=gear,
             steering_angle=steering_angle,
-            active=bool(is_on_track)
+            active=bool(is_on_track),
+            lap=lap,
+            lap_dist_pct=lap_dist_pct,
+            last_lap_time=last_lap_time,
+            best_lap_time=best_lap_time,
+            channels=channels,
         )
+        _DECODE_PROBE.record(time.perf_counter_ns() - t1)
+        return self._last_data
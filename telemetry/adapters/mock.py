@@ -1,18 +1,60 @@
 import math
 import time
 import random
-from .base import GameAdapter, TelemetryData
+import numpy as np
+from .base import GameAdapter, TelemetryData, CarPositions
 
 class MockAdapter(GameAdapter):
+    # The speed smoothing below is tuned per call, keep it at the original 60Hz
+    native_rate_hz = 60
+
+    # Length of the imaginary track the mock car laps, in meters
+    TRACK_LENGTH_M = 2000.0
+    # Other cars on the imaginary track, for the track map
+    OPPONENTS = 7
+
+    @staticmethod
+    def track_position(lap_dist_pct):
+        """World (x, z) of a point `lap_dist_pct` around the imaginary track; works on arrays too."""
+        angle = 2 * np.pi * lap_dist_pct
+        radius = 300.0 * (1.0 + 0.2 * np.cos(3 * angle))
+        return radius * np.cos(angle), 0.6 * radius * np.sin(angle)
+
     def __init__(self):
         self.start_time = time.time()
         self.gear = 1
         self.speed = 0.0
 
+        # Lap progress, integrated from the simulated speed
+        self.lap = 1
+        self.lap_dist_pct = 0.0
+        self.lap_start = 0.0
+        self.last_lap_time = 0.0
+        self.best_lap_time = 0.0
+        self._last_t = 0.0
+
+        # Opponents run at their own pace, spread around the lap
+        self._opponent_start = np.linspace(0.0, 1.0, self.OPPONENTS, endpoint=False) + 0.05
+        self._opponent_pace = np.linspace(0.012, 0.016, self.OPPONENTS) # laps per second
+        self._world_channels = ()
+
     @property
     def name(self) -> str:
         return "Mock Simulator"
 
+    def session_info(self) -> dict:
+        return {'track': "Mock Track", 'track_configuration': ""}
+
+    def set_channels(self, channels):
+        self._world_channels = [channel.name for channel in channels if channel.name in ('world_x', 'world_y', 'world_z')]
+
+    def car_positions(self) -> CarPositions:
+        t = time.time() - self.start_time
+        pct = np.concatenate(([self.lap_dist_pct], (self._opponent_start + self._opponent_pace * t) % 1.0))
+        x, z = self.track_position(pct)
+        positions = np.stack([x, np.zeros_like(x), z], axis=1).astype(np.float32)
+        return CarPositions(np.arange(len(pct), dtype=np.int32), positions, 0)
+
     def update(self) -> TelemetryData:
         t = time.time() - self.start_time
         
@@ -41,6 +83,17 @@ class MockAdapter(GameAdapter):
         # Steering angle simulation (sine wave, +/- 180 degrees approx in radians)
         steering_angle = math.sin(t * 0.5) * (math.pi) 
 
+        # Drive around the track
+        self.lap_dist_pct += self.speed / 3.6 * (t - self._last_t) / self.TRACK_LENGTH_M
+        self._last_t = t
+        if self.lap_dist_pct >= 1.0:
+            self.lap_dist_pct -= 1.0
+            self.lap += 1
+            self.last_lap_time = t - self.lap_start
+            self.lap_start = t
+            if self.best_lap_time == 0.0 or self.last_lap_time < self.best_lap_time:
+                self.best_lap_time = self.last_lap_time
+
         return TelemetryData(
             throttle=throttle,
             brake=brake,
@@ -49,5 +102,17 @@ class MockAdapter(GameAdapter):
             speed_kph=self.speed,
             steering_angle=steering_angle,
             gear=self.gear,
-            active=True
+            active=True,
+            lap=self.lap,
+            lap_dist_pct=self.lap_dist_pct,
+            last_lap_time=self.last_lap_time,
+            best_lap_time=self.best_lap_time,
+            channels=self._world(),
         )
+
+    def _world(self):
+        if not self._world_channels:
+            return {}
+        x, z = self.track_position(self.lap_dist_pct)
+        world = {'world_x': float(x), 'world_y': 0.0, 'world_z': float(z)}
+        return {name: world[name] for name in self._world_channels}
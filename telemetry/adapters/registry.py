@@ -0,0 +1,127 @@
+import os
+import json
+import importlib
+from dataclasses import dataclass, field, fields
+from importlib.metadata import entry_points
+
+# Third-party packages ship adapters by declaring an entry point in this group, e.g.
+#   [project.entry-points."sim_race_telemetry.adapters"]
+#   rfactor2 = "my_package.rf2:RFactor2Adapter"
+ENTRY_POINT_GROUP = "sim_race_telemetry.adapters"
+
+# Optional JSON file to add, reorder or disable adapters without touching code:
+#   {"adapters": [{"name": "rfactor2", "target": "my_package.rf2:RFactor2Adapter", "priority": 30}],
+#    "disabled": ["iracing"]}
+DEFAULT_CONFIG = "adapters.json"
+
+# Created by the engine up front as the stand-in while no sim is found; can't be disabled
+FALLBACK_ADAPTER = "mock"
+
+@dataclass
+class AdapterSpec:
+    """Describes an adapter without importing it. Only `load`/`create` import the module."""
+    name: str
+    target: str # "package.module:ClassName"
+    title: str = "" # display name before the adapter exists
+    priority: int = 100 # lower is probed first
+    autodetect: bool = True # probed by discovery; False for adapters that must be selected (mock, replay)
+    options: dict = field(default_factory=dict) # constructor kwargs
+
+    def __post_init__(self):
+        if not self.title:
+            self.title = self.name
+
+    def load(self):
+        module_name, _, class_name = self.target.partition(":")
+        module = importlib.import_module(module_name)
+        return getattr(module, class_name)
+
+    def create(self, **kwargs):
+        options = dict(self.options)
+        options.update(kwargs)
+        return self.load()(**options)
+
+BUILTIN_ADAPTERS = (
+    AdapterSpec("iracing", "telemetry.adapters.iracing:IRacingAdapter", "iRacing", priority=10),
+    AdapterSpec("assetto_corsa", "telemetry.adapters.assetto_corsa:AssettoCorsaAdapter", "Assetto Corsa", priority=20),
+    AdapterSpec("mock", "telemetry.adapters.mock:MockAdapter", "Mock Simulator", autodetect=False),
+    AdapterSpec("replay", "telemetry.adapters.replay:ReplayAdapter", "Replay", autodetect=False),
+)
+
+class AdapterRegistry:
+    def __init__(self, specs=()):
+        self._specs = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: AdapterSpec):
+        self._specs[spec.name] = spec
+
+    def unregister(self, name):
+        self._specs.pop(name, None)
+
+    def get(self, name) -> AdapterSpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise KeyError(f"Unknown adapter '{name}', available: {', '.join(sorted(self._specs))}") from None
+
+    def names(self):
+        return sorted(self._specs)
+
+    def create(self, name, **kwargs):
+        return self.get(name).create(**kwargs)
+
+    def autodetect_specs(self):
+        """Adapters discovery should probe, highest priority first."""
+        return sorted((s for s in self._specs.values() if s.autodetect), key=lambda s: s.priority)
+
+    def load_entry_points(self):
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            self.register(AdapterSpec(ep.name, ep.value))
+
+    def load_config(self, path):
+        """Applies an adapters.json file; ValueError naming the file if it's malformed."""
+        with open(path) as f:
+            try:
+                config = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{path} is not valid JSON: {e}") from None
+        if not isinstance(config, dict):
+            raise ValueError(f"{path}: expected an object with 'adapters' and 'disabled'")
+        keys = [spec_field.name for spec_field in fields(AdapterSpec)]
+        for entry in config.get("adapters", []):
+            if not isinstance(entry, dict):
+                raise ValueError(f"{path}: adapter entries are objects, got {entry!r}")
+            unknown = [key for key in entry if key not in keys]
+            if unknown:
+                raise ValueError(f"{path}: unknown key '{unknown[0]}' for adapter '{entry.get('name')}', "
+                                 f"expected {', '.join(keys)}")
+            if "name" not in entry:
+                raise ValueError(f"{path}: adapter entry without a 'name'")
+            if entry["name"] not in self._specs and "target" not in entry:
+                raise ValueError(f"{path}: new adapter '{entry['name']}' needs a 'target'")
+            if entry["name"] in self._specs and "target" not in entry:
+                # Tweak a known adapter (priority, options...) without restating its target
+                spec = self._specs[entry["name"]]
+                for key, value in entry.items():
+                    setattr(spec, key, value)
+            else:
+                self.register(AdapterSpec(**entry))
+        for name in config.get("disabled", []):
+            if name == FALLBACK_ADAPTER:
+                raise ValueError(f"{path}: '{name}' is the fallback adapter and can't be disabled")
+            self.unregister(name)
+
+def default_registry(config_path=None) -> AdapterRegistry:
+    """Built-in adapters, plus entry point plugins, plus the config file if there is one."""
+    registry = AdapterRegistry(
+        AdapterSpec(s.name, s.target, s.title, s.priority, s.autodetect, dict(s.options)) for s in BUILTIN_ADAPTERS
+    )
+    registry.load_entry_points()
+    path = config_path or DEFAULT_CONFIG
+    if os.path.exists(path):
+        registry.load_config(path)
+    elif config_path:
+        raise FileNotFoundError(config_path)
+    return registry
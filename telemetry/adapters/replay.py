@@ -0,0 +1,157 @@
+import time
+import numpy as np
+from dataclasses import fields
+from .base import GameAdapter, TelemetryData
+from ..session_file import SessionReader
+from ..laps import LapIndex
+
+_FIELDS = [f.name for f in fields(TelemetryData) if f.name != 'channels']
+
+class ReplayAdapter(GameAdapter):
+    """Plays a recorded session file back through the engine as if it were a live sim.
+
+    speed=1.0 is real time, speed=N plays N times faster (or slower below 1), and
+    speed=None hands out one sample per update as fast as the engine polls, which makes
+    a run fully deterministic.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.reader = SessionReader(path)
+        self.loop = loop
+        self.connected = True
+        self._chunk_index = -1
+        self._chunk = None
+        self._position = -1 # index of the last sample handed out
+        self._laps = None
+        self._last_data = TelemetryData()
+        self._last_time = None # recorded timestamp of _last_data
+        self._fields = [name for name in _FIELDS if name in self.reader.channel_names]
+        self._extras = [] # subscribed optional channels present in the file
+        # First timestamp of every chunk, to find the chunk for a session time by binary search
+        self._chunk_times = np.array(
+            [self.reader.chunk(i, ['timestamp'])['timestamp'][0] for i in range(len(self.reader.chunks))],
+            dtype=np.float64
+        )
+        self.set_speed(speed)
+
+    @property
+    def name(self) -> str:
+        return "Replay"
+
+    @property
+    def frame_id(self):
+        return self._position if self._position >= 0 else None
+
+    @property
+    def sample_time(self):
+        return self._last_time
+
+    @property
+    def finished(self) -> bool:
+        return self._position >= self.reader.num_samples - 1
+
+    @property
+    def duration(self) -> float:
+        if self.reader.num_samples == 0:
+            return 0.0
+        return self._timestamp(self.reader.num_samples - 1) - self._timestamp(0)
+
+    def session_info(self) -> dict:
+        info = dict(self.reader.metadata)
+        info['replay_of'] = self.reader.path
+        return info
+
+    def set_channels(self, channels):
+        # Whatever was recorded, whichever sim it came from
+        self._extras = [channel.name for channel in channels if channel.name in self.reader.channel_names]
+
+    def set_speed(self, speed):
+        self.speed = speed
+        recorded_rate = self.reader.metadata.get('native_rate_hz') or 60
+        # Let the engine poll fast enough to pick up every sample at this speed
+        self.native_rate_hz = None if speed is None else recorded_rate * speed
+        self._anchor(max(self._position, 0))
+
+    @property
+    def laps(self) -> LapIndex:
+        """Lap index of the recording in sample indices, built on first use."""
+        if self._laps is None:
+            self._laps = LapIndex.from_session(self.reader)
+        return self._laps
+
+    def seek_lap(self, number) -> bool:
+        """Jumps to the start of lap `number`; False if the recording has no such lap."""
+        lap = self.laps.get(number)
+        if lap is None:
+            return False
+        self._position = lap.start - 1
+        self._anchor(lap.start)
+        return True
+
+    def seek(self, seconds: float):
+        """Jumps to `seconds` after the start of the session."""
+        if self.reader.num_samples == 0:
+            return
+        sample = self._sample_at(self._chunk_times[0] + seconds)
+        self._position = sample - 1
+        self._anchor(sample)
+
+    def update(self) -> TelemetryData:
+        total = self.reader.num_samples
+        if total == 0:
+            return self._last_data
+
+        if self.speed is None:
+            target = self._position + 1
+        else:
+            target = max(self._position, self._sample_at(self._t0 + (time.perf_counter() - self._wall_start) * self.speed))
+
+        if target >= total:
+            if not self.loop:
+                target = total - 1
+            else:
+                self._position = -1
+                self._anchor(0)
+                target = 0
+
+        if target != self._position:
+            self._position = target
+            self._last_data = self._decode(target)
+        return self._last_data
+
+    def close(self):
+        self._chunk = None
+        self.reader.close()
+
+    def _anchor(self, sample):
+        # Playback clock: session time _t0 corresponds to wall time _wall_start
+        self._wall_start = time.perf_counter()
+        self._t0 = self._timestamp(sample) if self.reader.num_samples else 0.0
+
+    def _load_chunk(self, index):
+        if index != self._chunk_index:
+            self._chunk = self.reader.chunk(index)
+            self._chunk_index = index
+        return self._chunk
+
+    def _timestamp(self, sample):
+        index = self.reader.chunk_of(sample)
+        first, _, _ = self.reader.chunks[index]
+        return float(self._load_chunk(index)['timestamp'][sample - first])
+
+    def _sample_at(self, session_time):
+        # Binary search over chunk start times, then inside the chunk
+        index = max(0, int(self._chunk_times.searchsorted(session_time, side='right')) - 1)
+        first = self.reader.chunks[index][0]
+        timestamps = self._load_chunk(index)['timestamp']
+        return first + max(0, int(timestamps.searchsorted(session_time, side='right')) - 1)
+
+    def _decode(self, sample):
+        index = self.reader.chunk_of(sample)
+        chunk = self._load_chunk(index)
+        i = sample - self.reader.chunks[index][0]
+        self._last_time = float(chunk['timestamp'][i])
+        data = TelemetryData(**{name: chunk[name][i].item() for name in self._fields})
+        if self._extras:
+            data.channels = {name: chunk[name][i].item() for name in self._extras}
+        return data
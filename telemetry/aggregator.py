@@ -0,0 +1,364 @@
+import json
+import time
+import socket
+import struct
+import asyncio
+import numpy as np
+from urllib.parse import urlsplit, parse_qs
+from .ring_buffer import TelemetryBuffer, DEFAULT_CAPACITY
+from .laps import LapIndex
+from .broadcast import StreamDecoder, is_multicast, _FRAME
+
+# A car that sent nothing for this long is reported as not live (its history is kept)
+STALE_AFTER = 10.0
+# Largest TCP packet accepted, anything bigger means the stream is out of sync
+MAX_PACKET = 1 << 20
+# Kernel receive buffer for the UDP socket; every rig's frames tend to arrive in the same instant
+UDP_RCVBUF = 4 << 20
+
+class CarStream:
+    """One rig's telemetry on the aggregation server: its history, laps and stream state.
+
+    Samples are stored like on the rig itself (a TelemetryBuffer plus a LapIndex), except
+    that timestamps are converted to wall clock time with the anchors every stream layout
+    carries, so cars can be compared on one time axis.
+    """
+
+    def __init__(self, key, capacity=DEFAULT_CAPACITY):
+        self.key = key
+        self.buffer = TelemetryBuffer(capacity)
+        self.laps = LapIndex()
+        self.metadata = {}
+        self.stream_id = None
+        self.layout = None
+        self.streamed = set() # channels the rig sends; the buffer has a column for every CHANNELS entry
+        self.clock_offset = 0.0 # rig timestamp -> unix time
+        self.next_seq = None
+        self.lost_samples = 0
+        self.last_seen = None
+        self.peer = None
+
+    def set_layout(self, stream_id, layout):
+        if stream_id != self.stream_id:
+            # The rig restarted (or started streaming again): new sequence numbers
+            self.stream_id = stream_id
+            self.next_seq = None
+        self.layout = layout
+        self.streamed = {name for name, _ in layout['channels']}
+        self.metadata = layout.get('metadata') or {}
+        if 'unix_time' in self.metadata and 'timestamp' in self.metadata:
+            self.clock_offset = self.metadata['unix_time'] - self.metadata['timestamp']
+        for name, dtype in layout['channels']:
+            if name not in self.buffer.columns:
+                self.buffer.add_channel(name, dtype.type)
+
+    def store(self, first_seq, columns, peer):
+        n = len(next(iter(columns.values())))
+        if self.next_seq is not None and first_seq > self.next_seq:
+            self.lost_samples += first_seq - self.next_seq
+        self.next_seq = first_seq + n
+        self.last_seen = time.monotonic()
+        self.peer = peer
+        if 'timestamp' in columns:
+            columns = {**columns, 'timestamp': columns['timestamp'] + self.clock_offset}
+
+        start = self.buffer.count
+        self.buffer.extend(columns, n)
+        if 'lap' in columns:
+            buffer = self.buffer
+            self.laps.feed(start, buffer.since('timestamp', start), buffer.since('lap', start),
+                           buffer.since('last_lap_time', start))
+
+    def window(self, seconds=None, lap=None):
+        """[start, end) sequence numbers of the last `seconds`, or of `lap` ('last', 'current' or a number)."""
+        buffer = self.buffer
+        end = buffer.count
+        if lap is not None:
+            if lap == 'last':
+                completed = self.laps.completed()
+                lap = completed[-1].number if completed else None
+            elif lap == 'current':
+                lap = self.laps.current.number if self.laps.current else None
+            span = self.laps.sample_range(int(lap), end) if lap is not None else None
+            if span is None or span[0] < end - len(buffer):
+                return end, end # unknown, or no longer held
+            return span
+        start = end - len(buffer)
+        if seconds is not None:
+            timestamps = buffer.window('timestamp', start, end)
+            # Timestamps only grow, the window starts with a binary search
+            start += int(np.searchsorted(timestamps, timestamps[-1] - seconds)) if len(timestamps) else 0
+        return start, end
+
+    def summary(self) -> dict:
+        buffer = self.buffer
+        best = self.laps.best()
+        return {
+            'car': self.key,
+            'adapter': self.metadata.get('adapter'),
+            'peer': self.peer,
+            'live': self.last_seen is not None and time.monotonic() - self.last_seen < STALE_AFTER,
+            'samples': buffer.count,
+            'lost_samples': self.lost_samples,
+            'channels': [name for name, _ in buffer.channels if name in self.streamed],
+            'lap': int(buffer.last('lap')) if buffer.count else None,
+            'best_lap_time': best.time if best else None,
+            'laps_completed': len(self.laps.completed()),
+        }
+
+class AggregationServer:
+    """Collects the telemetry broadcasts of many rigs into one place, headless, on one asyncio loop.
+
+    Rigs stream to it with `--broadcast-udp` or `--broadcast-tcp` (see telemetry.broadcast).
+    Each car is identified by the rig name in its stream metadata, so a rig that restarts
+    continues its own history. Every car gets its own ring buffer and lap index, filled
+    batch-wise as packets arrive; queries only slice those, so their cost is independent
+    of how long the session has been running.
+
+    `query` returns a channel per car; `merged` resamples it onto one common axis (lap
+    distance for laps, wall time otherwise) as a cars x points matrix. Both are served as
+    JSON over HTTP when `http` is given: /cars, /query?channel=..., /stats.
+    """
+
+    def __init__(self, udp=None, tcp=None, http=None, capacity=DEFAULT_CAPACITY):
+        self.udp = udp # (host, port) to listen on, or None
+        self.tcp = tcp
+        self.http = http
+        self.capacity = capacity
+        self.cars = {} # rig name -> CarStream
+        self.decoder = StreamDecoder()
+        self._streams = {} # stream id -> CarStream
+        self.packets = 0
+        self.bad_packets = 0
+        self.addresses = {} # 'udp' / 'tcp' / 'http' -> bound (host, port)
+        self._stopping = None
+        self._loop = None
+
+    def run(self):
+        """Serves until interrupted."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self):
+        """Thread-safe; makes `serve` return."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def serve(self, ready=None):
+        """Listens on the configured sockets until `stop`; calls `ready()` once they're bound."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        closers = []
+        if self.udp is not None:
+            transport, _ = await self._loop.create_datagram_endpoint(lambda: _UdpIngest(self), sock=_udp_socket(*self.udp))
+            self.addresses['udp'] = transport.get_extra_info('sockname')[:2]
+            closers.append(transport.close)
+        servers = []
+        if self.tcp is not None:
+            servers.append(('tcp', await asyncio.start_server(self._tcp_client, *self.tcp)))
+        if self.http is not None:
+            servers.append(('http', await asyncio.start_server(self._http_client, *self.http)))
+        for kind, server in servers:
+            self.addresses[kind] = server.sockets[0].getsockname()[:2]
+        for kind, address in self.addresses.items():
+            print(f"Aggregating telemetry: {kind} on {address[0]}:{address[1]}")
+        if ready is not None:
+            ready()
+        try:
+            await self._stopping.wait()
+        finally:
+            for close in closers:
+                close()
+            for _, server in servers:
+                server.close()
+
+    def ingest(self, packet, peer=None):
+        """Decodes one broadcast packet and stores its samples with the car that sent them."""
+        self.packets += 1
+        try:
+            frame = self.decoder.feed(packet)
+        except ValueError:
+            self.bad_packets += 1
+            return
+        if frame is None:
+            return
+        stream_id = frame['stream']
+        car = self._streams.get(stream_id)
+        if car is None or frame['layout'] is not car.layout:
+            car = self._car_for(stream_id, frame['layout'])
+        car.store(frame['first_seq'], frame['columns'], peer)
+
+    def _car_for(self, stream_id, layout) -> CarStream:
+        key = (layout.get('metadata') or {}).get('rig') or f"{stream_id:08x}"
+        car = self.cars.get(key)
+        if car is None:
+            car = self.cars[key] = CarStream(key, self.capacity)
+        car.set_layout(stream_id, layout)
+        self._streams[stream_id] = car
+        return car
+
+    def query(self, channel, cars=None, seconds=None, lap=None) -> dict:
+        """car -> (x, values) of `channel` for `cars` (default: all that have it).
+
+        Over the last `seconds` (default: everything held) x is the wall time; for a `lap`
+        ('last' completed, 'current' or a lap number) it is the lap distance fraction when
+        the car streams 'lap_dist_pct', else the time since the start of the lap. Arrays are
+        zero-copy views of the car's ring, valid until the loop stores more packets.
+        """
+        result = {}
+        for key in cars or list(self.cars):
+            car = self.cars.get(key)
+            if car is None or channel not in car.streamed:
+                continue
+            start, end = car.window(seconds, lap)
+            buffer = car.buffer
+            if lap is not None and 'lap_dist_pct' in car.streamed:
+                x = buffer.window('lap_dist_pct', start, end)
+            elif lap is not None:
+                x = buffer.window('timestamp', start, end) - buffer.window('timestamp', start, start + 1)
+            else:
+                x = buffer.window('timestamp', start, end)
+            result[key] = (x, buffer.window(channel, start, end))
+        return result
+
+    def merged(self, channel, cars=None, seconds=None, lap=None, points=500) -> dict:
+        """`query` resampled onto one axis: {'x': points values, 'cars': [...], 'values': cars x points}.
+
+        Laps are compared by distance (0..1), so only cars streaming 'lap_dist_pct' take
+        part; other queries cover the last `seconds` (default 60) of wall time, up to the
+        newest sample of any car.
+        """
+        if lap is None and seconds is None:
+            seconds = 60.0
+        per_car = {
+            key: xy for key, xy in self.query(channel, cars, seconds, lap).items()
+            if len(xy[0]) > 1 and (lap is None or 'lap_dist_pct' in self.cars[key].streamed)
+        }
+        if lap is not None:
+            grid = np.linspace(0.0, 1.0, points)
+        else:
+            newest = max((x[-1] for x, _ in per_car.values()), default=0.0)
+            grid = np.linspace(newest - seconds, newest, points)
+
+        values = np.full((len(per_car), points), np.nan)
+        for row, (x, y) in enumerate(per_car.values()):
+            if lap is not None:
+                x = _lap_distance(x)
+            values[row] = np.interp(grid, x, y.astype(np.float64), left=np.nan, right=np.nan)
+        return {'x': grid, 'cars': list(per_car), 'values': values}
+
+    def stats(self) -> dict:
+        return {
+            'cars': len(self.cars),
+            'packets': self.packets,
+            'bad_packets': self.bad_packets,
+            'undecodable_packets': self.decoder.undecodable_packets,
+            'lost_samples': sum(car.lost_samples for car in self.cars.values()),
+            'samples': sum(car.buffer.count for car in self.cars.values()),
+        }
+
+    async def _tcp_client(self, reader, writer):
+        peer = "%s:%s" % writer.get_extra_info('peername')[:2]
+        try:
+            while True:
+                size, = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                if size > MAX_PACKET:
+                    print(f"Dropping TCP stream from {peer}: {size} byte packet")
+                    break
+                self.ingest(await reader.readexactly(size), peer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # rig went away; it reconnects on its own
+        finally:
+            writer.close()
+
+    async def _http_client(self, reader, writer):
+        # Just enough HTTP/1.0 for GET requests from dashboards and scripts
+        try:
+            request = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass # headers
+            if len(request) < 2 or request[0] != 'GET':
+                status, body = 405, {'error': "only GET is supported"}
+            else:
+                status, body = self._http_get(request[1])
+        except (ValueError, KeyError) as e:
+            status, body = 400, {'error': str(e)}
+        except ConnectionError:
+            writer.close()
+            return
+        payload = json.dumps(body).encode('utf-8')
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+        writer.write(f"HTTP/1.0 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    def _http_get(self, target):
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/cars':
+            return 200, [car.summary() for car in self.cars.values()]
+        if url.path == '/stats':
+            return 200, self.stats()
+        if url.path != '/query':
+            return 404, {'error': f"unknown path {url.path}, try /cars, /query or /stats"}
+
+        channel = params['channel']
+        cars = params['cars'].split(",") if params.get('cars') else None
+        seconds = float(params['seconds']) if 'seconds' in params else None
+        lap = params.get('lap')
+        if lap is not None and lap not in ('last', 'current'):
+            lap = int(lap)
+        if 'points' in params:
+            merged = self.merged(channel, cars, seconds, lap, int(params['points']))
+            return 200, {'channel': channel, 'x': _json_values(merged['x']), 'cars': merged['cars'],
+                         'values': [_json_values(row) for row in merged['values']]}
+        return 200, {'channel': channel, 'cars': {
+            key: {'x': _json_values(x), 'values': _json_values(y)}
+            for key, (x, y) in self.query(channel, cars, seconds, lap).items()
+        }}
+
+def _udp_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+    if is_multicast(host):
+        # Rigs broadcasting to a group: listen on every interface and join it
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('', port))
+        membership = struct.pack('4s4s', socket.inet_aton(host), socket.inet_aton('0.0.0.0'))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    else:
+        sock.bind((host, port))
+    sock.setblocking(False)
+    return sock
+
+def _lap_distance(x):
+    # np.interp needs x sorted. Around the line the lap counter and the lap distance don't
+    # flip on the same sample, so a lap can start with a few ~1.0 and end with a few ~0.0.
+    x = np.array(x, dtype=np.float64)
+    low = x < 0.5
+    if len(x) and not low[0] and low.any():
+        x[:np.argmax(low)] = 0.0
+        low = x < 0.5
+    if len(x) and low[-1] and not low.all():
+        x[len(x) - np.argmax(~low[::-1]):] = 1.0
+    return np.maximum.accumulate(x)
+
+def _json_values(array):
+    # JSON has no NaN
+    values = array.tolist()
+    if array.dtype.kind == 'f':
+        values = [None if value != value else value for value in values]
+    return values
+
+class _UdpIngest(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.ingest(data, "%s:%s" % addr[:2])
@@ -0,0 +1,174 @@
+import os
+import numpy as np
+from .session_file import SessionReader
+from .laps import LapIndex
+
+# Samples read per block; memory use of an analysis is bounded by this, not the session length
+BLOCK_SAMPLES = 65536
+# Brake pedal share at which a braking zone starts
+BRAKE_ON = 0.1
+# Below this on both pedals the car is coasting
+COAST_PEDAL = 0.05
+# Slower samples (pits, grid, spins) count neither as coasting nor as braking points
+MIN_SPEED_KPH = 20.0
+# Pedal histograms: bins over 0-1, the last one is "flat out"
+PEDAL_BINS = 10
+# Longer gaps between samples (pauses, dropped chunks) don't count as time spent
+MAX_GAP_S = 1.0
+
+CHANNELS = ['timestamp', 'throttle', 'brake', 'speed_kph', 'lap', 'lap_dist_pct', 'last_lap_time']
+
+class _LapStats:
+    __slots__ = ('segment', 'number', 'samples', 'seconds', 'max_speed_kph', 'coasting_s',
+                 'throttle_s', 'brake_s', 'braking_points')
+
+    def __init__(self, segment, number):
+        self.segment = segment
+        self.number = number
+        self.samples = 0
+        self.seconds = 0.0
+        self.max_speed_kph = 0.0
+        self.coasting_s = 0.0
+        # Seconds spent in each pedal bin
+        self.throttle_s = np.zeros(PEDAL_BINS)
+        self.brake_s = np.zeros(PEDAL_BINS)
+        self.braking_points = [] # (lap_dist_pct, speed_kph) where each braking zone started
+
+class SessionAnalysis:
+    """Per lap statistics of a recorded session, fed block by block (see SessionReader.iter_blocks).
+
+    Everything is accumulated per lap with array operations over the block; what a block
+    needs from the previous one (last timestamp, brake and lap number) is carried over, so
+    laps, braking zones and sample intervals spanning two blocks are counted once. Lap
+    times come from a LapIndex fed the same blocks. A lap counter going back (a new
+    session in the same recording) starts a new segment, so its laps aren't merged with
+    the earlier ones of the same number.
+    """
+
+    def __init__(self, metadata=None):
+        self.metadata = metadata or {}
+        self.samples = 0
+        self.seconds = 0.0
+        self._laps = {} # (segment, lap number) -> _LapStats
+        self._index = LapIndex()
+        self._tables = {} # segment -> LapIndex.laps, kept when a restart replaces it
+        self._segment = 0
+        self._last_time = None
+        self._last_lap = None
+        self._last_brake = 0.0
+
+    def feed(self, first, columns):
+        """Adds the samples of one block; `first` is the number of its first sample in the session."""
+        t = np.asarray(columns['timestamp'], dtype=np.float64)
+        n = len(t)
+        if n == 0:
+            return
+        lap = np.asarray(columns['lap'])
+        speed = columns['speed_kph']
+        throttle = columns['throttle']
+        brake = columns['brake']
+
+        # Interval ending at each sample; the first one continues from the previous block
+        dt = np.diff(t, prepend=t[0] if self._last_time is None else self._last_time)
+        dt[(dt < 0) | (dt > MAX_GAP_S)] = 0.0
+        # Segments: +1 wherever the lap counter goes back
+        previous_lap = np.empty_like(lap)
+        previous_lap[0] = lap[0] if self._last_lap is None else self._last_lap
+        previous_lap[1:] = lap[:-1]
+        restarts = np.flatnonzero(lap < previous_lap)
+        segment = self._segment + np.cumsum(lap < previous_lap)
+
+        self._feed_index(first, columns, restarts)
+        moving = speed >= MIN_SPEED_KPH
+        braking = brake >= BRAKE_ON
+        was_braking = np.empty_like(braking)
+        was_braking[0] = self._last_brake >= BRAKE_ON
+        was_braking[1:] = braking[:-1]
+        onsets = braking & ~was_braking & moving
+        coasting = (throttle < COAST_PEDAL) & (brake < COAST_PEDAL) & moving
+        throttle_bin = np.clip((throttle * PEDAL_BINS).astype(np.intp), 0, PEDAL_BINS - 1)
+        brake_bin = np.clip((brake * PEDAL_BINS).astype(np.intp), 0, PEDAL_BINS - 1)
+        pct = columns['lap_dist_pct']
+
+        # One run per lap in the block, usually one or two
+        edges = np.flatnonzero((lap[1:] != lap[:-1]) | (segment[1:] != segment[:-1])) + 1
+        for start, stop in zip(np.concatenate(([0], edges)), np.concatenate((edges, [n]))):
+            key = (int(segment[start]), int(lap[start]))
+            stats = self._laps.get(key)
+            if stats is None:
+                stats = self._laps[key] = _LapStats(*key)
+            run = slice(start, stop)
+            stats.samples += int(stop - start)
+            stats.seconds += dt[run].sum()
+            stats.max_speed_kph = max(stats.max_speed_kph, float(speed[run].max()))
+            stats.coasting_s += dt[run][coasting[run]].sum()
+            stats.throttle_s += np.bincount(throttle_bin[run], weights=dt[run], minlength=PEDAL_BINS)
+            stats.brake_s += np.bincount(brake_bin[run], weights=dt[run], minlength=PEDAL_BINS)
+            where = np.flatnonzero(onsets[run]) + start
+            stats.braking_points.extend(zip(pct[where].tolist(), speed[where].tolist()))
+
+        self.samples += n
+        self.seconds += dt.sum()
+        self._segment = int(segment[-1])
+        self._last_time = t[-1]
+        self._last_lap = lap[-1]
+        self._last_brake = float(brake[-1])
+
+    def _feed_index(self, first, columns, restarts):
+        # LapIndex starts over on a restart; keep the table of every segment it leaves behind
+        t, lap, last = columns['timestamp'], columns['lap'], columns['last_lap_time']
+        for start, stop in zip(np.concatenate(([0], restarts)), np.concatenate((restarts, [len(lap)]))):
+            if stop > start:
+                self._index.feed(first + start, t[start:stop], lap[start:stop], last[start:stop])
+                self._tables[self._segment + int(np.searchsorted(restarts, start, side='right'))] = self._index.laps
+
+    def result(self) -> dict:
+        """JSON-ready summary: session totals and one entry per lap, in driving order."""
+        track_length = self.metadata.get('track_length_m')
+        laps = []
+        for (segment, number), stats in self._laps.items():
+            lap = self._tables.get(segment, {}).get(number)
+            complete = lap is not None and lap.complete and not lap.running
+            laps.append({
+                'segment': segment,
+                'lap': number,
+                'complete': complete,
+                'time_s': lap.time if complete else None,
+                'samples': stats.samples,
+                'seconds': stats.seconds,
+                'max_speed_kph': stats.max_speed_kph,
+                'coasting_s': stats.coasting_s,
+                'full_throttle_share': stats.throttle_s[-1] / stats.seconds if stats.seconds else 0.0,
+                'throttle_histogram_s': stats.throttle_s.tolist(),
+                'brake_histogram_s': stats.brake_s.tolist(),
+                'braking_points': [
+                    {'lap_dist_pct': p, 'speed_kph': v, 'distance_m': p * track_length if track_length else None}
+                    for p, v in stats.braking_points
+                ],
+            })
+        timed = [lap for lap in laps if lap['time_s']]
+        best = min(timed, key=lambda lap: lap['time_s']) if timed else None
+        return {
+            'track': self.metadata.get('track'),
+            'car': self.metadata.get('car'),
+            'adapter': self.metadata.get('adapter'),
+            'samples': self.samples,
+            'seconds': self.seconds,
+            'best_lap': best['lap'] if best else None,
+            'best_lap_time_s': best['time_s'] if best else None,
+            'max_speed_kph': max((lap['max_speed_kph'] for lap in laps), default=0.0),
+            'laps': laps,
+        }
+
+def analyze_session(path, block_size=BLOCK_SAMPLES) -> dict:
+    """SessionAnalysis.result() of the recording at `path`, read `block_size` samples at a time."""
+    with SessionReader(path) as reader:
+        missing = [name for name in CHANNELS if name not in reader.channel_names]
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(missing)} channel(s)")
+        analysis = SessionAnalysis(reader.metadata)
+        for first, columns in reader.iter_blocks(block_size, CHANNELS):
+            analysis.feed(first, columns)
+    result = analysis.result()
+    result['path'] = os.path.abspath(path)
+    return result
@@ -0,0 +1,445 @@
+import json
+import socket
+import struct
+import random
+import asyncio
+import threading
+import ipaddress
+import numpy as np
+from dataclasses import dataclass
+
+# Broadcast stream wire format (all little-endian), one packet per UDP datagram or
+# WebSocket message:
+#
+#   header   b'SRTB' | uint8 version | uint8 kind | uint16 layout id | uint32 stream id
+#            | uint64 first sequence number | uint16 n
+#   LAYOUT   n bytes of JSON {"channels": [[name, dtype], ...], "rate_hz": ..., "metadata": {...}}
+#   SAMPLES  n samples as one column per layout channel, in layout order, packed back to back
+#
+# SAMPLES packets only decode with the LAYOUT of the same stream and layout id. A stream
+# starts with its LAYOUT, and over UDP repeats it every LAYOUT_INTERVAL for late joiners.
+# Sequence numbers are the sender's buffer sequence numbers, so gaps show lost samples.
+# Over TCP every packet is prefixed with its length as a uint32 (_FRAME).
+MAGIC = b'SRTB'
+VERSION = 1
+LAYOUT = 1
+SAMPLES = 2
+_HEADER = struct.Struct('<4sBBHIQH')
+_FRAME = struct.Struct('<I')
+
+UDP_PAYLOAD = 1400 # stays under a typical MTU, datagrams are never fragmented
+WS_PAYLOAD = 65535
+LAYOUT_INTERVAL = 1.0
+# Bytes queued in a UDP transport above which frames are dropped instead of sent
+UDP_BACKLOG = 64 * 1024
+TCP_BACKLOG = 256 * 1024
+# Seconds between attempts to (re)connect a TCP stream
+RECONNECT_INTERVAL = 2.0
+# How long a WebSocket client gets to send its subscription before the defaults apply
+HELLO_TIMEOUT = 1.0
+
+DEFAULT_CHANNELS = (
+    'timestamp', 'throttle', 'brake', 'clutch', 'rpm', 'speed_kph', 'steering_angle',
+    'gear', 'lap', 'lap_dist_pct', 'last_lap_time', 'delta',
+)
+DEFAULT_RATE_HZ = 30.0
+
+def encode_layout(stream_id, layout_id, channels, rate_hz, metadata) -> bytes:
+    payload = json.dumps({
+        'channels': [[name, np.dtype(dtype).newbyteorder('<').str] for name, dtype in channels],
+        'rate_hz': rate_hz,
+        'metadata': metadata,
+    }).encode('utf-8')
+    return _HEADER.pack(MAGIC, VERSION, LAYOUT, layout_id, stream_id, 0, len(payload)) + payload
+
+def encode_samples(stream_id, layout_id, first_seq, channels, columns) -> bytes:
+    """`columns` holds one equally long array per channel, in `channels` order."""
+    n = len(columns[0])
+    parts = [_HEADER.pack(MAGIC, VERSION, SAMPLES, layout_id, stream_id, first_seq, n)]
+    for (_, dtype), column in zip(channels, columns):
+        parts.append(np.ascontiguousarray(column, dtype=np.dtype(dtype).newbyteorder('<')).tobytes())
+    return b''.join(parts)
+
+def is_multicast(host) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_multicast
+    except ValueError:
+        return False # a host name
+
+def decode_header(packet):
+    """(kind, stream id, layout id, first seq, n, payload) of a packet; ValueError if it isn't one."""
+    if len(packet) < _HEADER.size:
+        raise ValueError("packet too short")
+    magic, version, kind, layout_id, stream_id, first_seq, n = _HEADER.unpack_from(packet)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a telemetry broadcast packet")
+    return kind, stream_id, layout_id, first_seq, n, memoryview(packet)[_HEADER.size:]
+
+class StreamDecoder:
+    """Receiver side of the broadcast format, for any number of interleaved streams.
+
+    `feed` returns the decoded columns of a SAMPLES packet (zero-copy views into it) and
+    None for layouts, duplicates and packets whose layout hasn't been seen yet.
+    """
+
+    def __init__(self):
+        self.layouts = {} # (stream id, layout id) -> {'channels': [(name, dtype)], 'rate_hz', 'metadata'}
+        self.next_seq = {} # stream id -> expected next sequence number
+        self.lost_samples = 0
+        self.undecodable_packets = 0
+
+    def feed(self, packet):
+        kind, stream_id, layout_id, first_seq, n, payload = decode_header(packet)
+        if kind == LAYOUT:
+            layout = json.loads(bytes(payload[:n]).decode('utf-8'))
+            layout['channels'] = [(name, np.dtype(dtype)) for name, dtype in layout['channels']]
+            self.layouts[(stream_id, layout_id)] = layout
+            return None
+
+        layout = self.layouts.get((stream_id, layout_id))
+        if layout is None:
+            self.undecodable_packets += 1
+            return None
+        expected = self.next_seq.get(stream_id)
+        if expected is not None:
+            if first_seq + n <= expected:
+                return None # duplicate or reordered behind what we already have
+            if first_seq > expected:
+                self.lost_samples += first_seq - expected
+        self.next_seq[stream_id] = first_seq + n
+
+        columns = {}
+        offset = 0
+        for name, dtype in layout['channels']:
+            columns[name] = np.frombuffer(payload, dtype=dtype, count=n, offset=offset)
+            offset += n * dtype.itemsize
+        return {'stream': stream_id, 'layout': layout, 'first_seq': first_seq, 'columns': columns}
+
+@dataclass
+class UdpTarget:
+    """Destination for a UDP stream; a multicast group reaches every listener on the LAN."""
+    host: str
+    port: int
+    channels: tuple = None # None = the broadcaster's defaults
+    rate_hz: float = None
+    ttl: int = 1 # multicast hops, 1 keeps it on the local network
+
+@dataclass
+class TcpTarget:
+    """Destination for a TCP stream, e.g. an aggregation server; reconnects when it goes away."""
+    host: str
+    port: int
+    channels: tuple = None
+    rate_hz: float = None
+
+class _Subscription:
+    """One consumer's view of the buffer: its channels, frame rate and read position."""
+
+    def __init__(self, broadcaster, kind, peer, channels, rate_hz, max_payload):
+        self.kind = kind
+        self.peer = peer
+        self.buffer = broadcaster.buffer
+        self.stream_id = broadcaster.stream_id
+        self.layout_id = broadcaster._next_layout_id()
+        self.channels = broadcaster._resolve(channels)
+        self.rate_hz = float(rate_hz)
+        if not self.rate_hz > 0:
+            raise ValueError(f"rate_hz must be positive, got {rate_hz}")
+        self.interval = 1.0 / self.rate_hz
+        row_bytes = sum(np.dtype(dtype).itemsize for _, dtype in self.channels)
+        self.max_rows = max(1, min(0xFFFF, (max_payload - _HEADER.size) // row_bytes))
+        self.next_seq = self.buffer.count
+
+        # Optional channels are only decoded while someone subscribes to them
+        self._registry = broadcaster.registry
+        optional = [name for name, _ in self.channels if self._registry is not None and name in self._registry.names()]
+        self._token = self._registry.subscribe(optional) if optional else None
+
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.samples_skipped = 0 # overwritten in the ring before this consumer got to them
+
+    def layout_packet(self, metadata) -> bytes:
+        return encode_layout(self.stream_id, self.layout_id, self.channels, self.rate_hz, metadata)
+
+    def collect(self):
+        """SAMPLES packets with every sample since the previous call, max_rows per packet."""
+        buffer = self.buffer
+        count = buffer.count
+        start = max(self.next_seq, count - buffer.capacity)
+        self.samples_skipped += start - self.next_seq
+        self.next_seq = count
+        packets = []
+        while start < count:
+            end = min(count, start + self.max_rows)
+            columns = [
+                buffer.window(name, start, end) if name in buffer.columns else np.full(end - start, np.nan, dtype)
+                for name, dtype in self.channels
+            ]
+            packets.append(encode_samples(self.stream_id, self.layout_id, start, self.channels, columns))
+            start = end
+        return packets
+
+    def close(self):
+        if self._token is not None:
+            self._registry.unsubscribe(self._token)
+            self._token = None
+
+    def stats(self) -> dict:
+        return {
+            'kind': self.kind,
+            'peer': self.peer,
+            'channels': len(self.channels),
+            'rate_hz': self.rate_hz,
+            'frames_sent': self.frames_sent,
+            'frames_dropped': self.frames_dropped,
+            'samples_skipped': self.samples_skipped,
+        }
+
+class TelemetryBroadcaster:
+    """Streams the telemetry buffer to second screens and pit walls, on its own asyncio loop.
+
+    Every consumer has its own channel set and frame rate. Each frame carries all the
+    samples acquired since the previous one (split into MTU sized datagrams on UDP), so a
+    low frame rate costs packets, not resolution. Consumers read the buffer by sequence
+    number like the recorder does; the engine's loop never waits for the network.
+
+    UDP targets (unicast or multicast) and TCP targets get a fixed subscription. WebSocket clients (needs
+    the optional `websockets` package) send {"channels": [...], "rate_hz": N} as their first
+    message and then receive binary packets. A client that can't keep up has frames dropped
+    once `max_pending` are queued for it, it never holds the others up.
+    """
+
+    def __init__(self, buffer, registry=None, udp=(), tcp=(), websocket=None, channels=DEFAULT_CHANNELS,
+                 rate_hz=DEFAULT_RATE_HZ, metadata=None, max_pending=8):
+        self.buffer = buffer
+        self.registry = registry # ChannelRegistry, for optional channels
+        self.udp_targets = list(udp)
+        self.tcp_targets = list(tcp)
+        self.websocket = websocket # (host, port), port 0 picks a free one
+        self.channels = tuple(channels)
+        self.rate_hz = rate_hz
+        self._resolve(self.channels) # unknown default channels fail here, not per consumer
+        # Callable returning the dict sent in LAYOUT packets
+        self.metadata = metadata or dict
+        self.max_pending = max_pending
+        self.stream_id = random.getrandbits(32)
+        self.websocket_address = None # bound (host, port) once started
+
+        self._subscriptions = []
+        self._layout_ids = 0
+        self._loop = None
+        self._stopping = None
+        self._thread = None
+        self._ready = threading.Event()
+        self.error = None
+
+    def start(self):
+        """Starts the loop thread and returns once every socket is bound (or failed)."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> list:
+        return [subscription.stats() for subscription in list(self._subscriptions)]
+
+    def _next_layout_id(self):
+        self._layout_ids = (self._layout_ids + 1) & 0xFFFF
+        return self._layout_ids
+
+    def _resolve(self, names):
+        """(name, dtype) for channel names; KeyError for names neither stored nor registered."""
+        stored = dict(self.buffer.channels)
+        channels = []
+        for name in names or self.channels:
+            if name in stored:
+                channels.append((name, stored[name]))
+            elif self.registry is not None:
+                channels.append((name, self.registry.get(name).dtype))
+            else:
+                raise KeyError(f"Unknown channel '{name}', available: {', '.join(stored)}")
+        return channels
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            print(f"Telemetry broadcast stopped: {e}")
+            self.error = e
+        finally:
+            self._ready.set()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        tasks = [asyncio.create_task(self._udp_stream(target)) for target in self.udp_targets]
+        tasks += [asyncio.create_task(self._tcp_stream(target)) for target in self.tcp_targets]
+        server = None
+        if self.websocket is not None:
+            server = await self._serve_websocket()
+        self._ready.set()
+        try:
+            await self._stopping.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _ticks(self, interval):
+        # Fixed cadence that doesn't drift with the time spent sending
+        next_tick = self._loop.time()
+        while True:
+            yield
+            next_tick += interval
+            now = self._loop.time()
+            if next_tick < now:
+                next_tick = now # fell behind, don't burst to catch up
+            await asyncio.sleep(next_tick - now)
+
+    async def _udp_stream(self, target: UdpTarget):
+        try:
+            # Resolve through the loop's executor: connect() with a host name would block the loop on DNS
+            infos = await self._loop.getaddrinfo(target.host, target.port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+            address = infos[0][4]
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if is_multicast(address[0]):
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, target.ttl)
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            sock.setblocking(False)
+            sock.connect(address)
+            transport, _ = await self._loop.create_datagram_endpoint(asyncio.DatagramProtocol, sock=sock)
+            subscription = _Subscription(self, 'udp', f"{target.host}:{target.port}", target.channels,
+                                         target.rate_hz or self.rate_hz, UDP_PAYLOAD)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Can't broadcast to {target.host}:{target.port}: {e}")
+            return
+
+        self._subscriptions.append(subscription)
+        next_layout = 0.0
+        try:
+            async for _ in self._ticks(subscription.interval):
+                now = self._loop.time()
+                if now >= next_layout:
+                    transport.sendto(subscription.layout_packet(self.metadata()))
+                    next_layout = now + LAYOUT_INTERVAL
+                for packet in subscription.collect():
+                    if transport.get_write_buffer_size() > UDP_BACKLOG:
+                        subscription.frames_dropped += 1
+                    else:
+                        transport.sendto(packet)
+                        subscription.frames_sent += 1
+        finally:
+            self._subscriptions.remove(subscription)
+            subscription.close()
+            transport.close()
+
+    async def _tcp_stream(self, target: TcpTarget):
+        peer = f"{target.host}:{target.port}"
+        reported = False
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(target.host, target.port)
+            except OSError as e:
+                if not reported:
+                    print(f"Can't stream to {peer}, retrying every {RECONNECT_INTERVAL:.0f}s: {e}")
+                    reported = True
+                await asyncio.sleep(RECONNECT_INTERVAL)
+                continue
+            reported = False
+            try:
+                subscription = _Subscription(self, 'tcp', peer, target.channels, target.rate_hz or self.rate_hz, WS_PAYLOAD)
+            except (ValueError, KeyError) as e:
+                print(f"Can't stream to {peer}: {e}")
+                writer.close()
+                return
+
+            self._subscriptions.append(subscription)
+            try:
+                packet = subscription.layout_packet(self.metadata())
+                writer.write(_FRAME.pack(len(packet)) + packet)
+                async for _ in self._ticks(subscription.interval):
+                    if writer.is_closing():
+                        break # connection lost, reconnect
+                    for packet in subscription.collect():
+                        if writer.transport.get_write_buffer_size() > TCP_BACKLOG:
+                            subscription.frames_dropped += 1
+                        else:
+                            writer.write(_FRAME.pack(len(packet)) + packet)
+                            subscription.frames_sent += 1
+            finally:
+                self._subscriptions.remove(subscription)
+                subscription.close()
+                writer.close()
+            await asyncio.sleep(RECONNECT_INTERVAL)
+
+    async def _serve_websocket(self):
+        try:
+            import websockets
+        except ImportError:
+            print("WebSocket broadcasting needs the 'websockets' package (pip install websockets)")
+            return None
+        host, port = self.websocket
+        try:
+            server = await websockets.serve(self._websocket_client, host, port)
+        except OSError as e:
+            print(f"Can't serve WebSocket telemetry on {host}:{port}: {e}")
+            return None
+        self.websocket_address = server.sockets[0].getsockname()[:2]
+        return server
+
+    async def _websocket_client(self, ws):
+        try:
+            hello = json.loads(await asyncio.wait_for(ws.recv(), HELLO_TIMEOUT))
+        except asyncio.TimeoutError:
+            hello = {}
+        except ValueError:
+            hello = None
+        if not isinstance(hello, dict):
+            await ws.close(1003, "expected a JSON subscription")
+            return
+        try:
+            subscription = _Subscription(self, 'websocket', "%s:%s" % ws.remote_address[:2], hello.get('channels'),
+                                         hello.get('rate_hz') or self.rate_hz, WS_PAYLOAD)
+        except (KeyError, ValueError, TypeError) as e:
+            await ws.close(1008, str(e)[:120])
+            return
+
+        self._subscriptions.append(subscription)
+        queue = asyncio.Queue(self.max_pending)
+        sender = asyncio.create_task(self._websocket_send(ws, queue, subscription))
+        closed = asyncio.create_task(ws.wait_closed())
+        try:
+            queue.put_nowait(subscription.layout_packet(self.metadata()))
+            async for _ in self._ticks(subscription.interval):
+                if closed.done() or sender.done():
+                    break # client went away, or the server is closing
+                for packet in subscription.collect():
+                    try:
+                        queue.put_nowait(packet)
+                    except asyncio.QueueFull:
+                        subscription.frames_dropped += 1
+        finally:
+            sender.cancel()
+            closed.cancel()
+            self._subscriptions.remove(subscription)
+            subscription.close()
+
+    async def _websocket_send(self, ws, queue, subscription):
+        import websockets
+        try:
+            while True:
+                await ws.send(await queue.get())
+                subscription.frames_sent += 1
+        except websockets.ConnectionClosed:
+            pass
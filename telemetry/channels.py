@@ -0,0 +1,129 @@
+import threading
+import numpy as np
+from dataclasses import dataclass, field
+
+STANDARD_GRAVITY = 9.80665
+PSI_TO_KPA = 6.894757
+
+@dataclass(frozen=True)
+class Source:
+    """Where an adapter finds a channel: a field or var name, an element of it if it is
+    an array (flat index), and a factor to convert it to the channel's unit."""
+    field: str
+    index: int = None
+    scale: float = 1.0
+    page: str = None # AC shared memory page: 'physics' or 'graphics'
+
+@dataclass(frozen=True)
+class Channel:
+    """An optional telemetry channel beyond the TelemetryData fields."""
+    name: str
+    unit: str
+    description: str = ""
+    dtype: type = np.float32
+    sources: dict = field(default_factory=dict, hash=False) # adapter source_key -> Source
+
+def _ac(page, name, index=None, scale=1.0):
+    return Source(name, index, scale, page)
+
+def _wheels(name, unit, description, ac_field=None, ac_scale=1.0, ir_vars=None, ir_scale=1.0):
+    # AC wheel arrays run FL, FR, RL, RR
+    channels = []
+    for i, wheel in enumerate(('fl', 'fr', 'rl', 'rr')):
+        sources = {}
+        if ac_field:
+            sources['assetto_corsa'] = _ac('physics', ac_field, i, ac_scale)
+        if ir_vars:
+            sources['iracing'] = Source(ir_vars[i], scale=ir_scale)
+        channels.append(Channel(f"{name}_{wheel}", unit, f"{description} ({wheel.upper()})", sources=sources))
+    return channels
+
+BUILTIN_CHANNELS = (
+    Channel("g_lat", "g", "Lateral acceleration", sources={
+        'assetto_corsa': _ac('physics', 'accG', 0),
+        'iracing': Source('LatAccel', scale=1 / STANDARD_GRAVITY),
+    }),
+    Channel("g_lon", "g", "Longitudinal acceleration", sources={
+        'assetto_corsa': _ac('physics', 'accG', 2),
+        'iracing': Source('LongAccel', scale=1 / STANDARD_GRAVITY),
+    }),
+    Channel("g_vert", "g", "Vertical acceleration", sources={
+        'assetto_corsa': _ac('physics', 'accG', 1),
+        'iracing': Source('VertAccel', scale=1 / STANDARD_GRAVITY),
+    }),
+    Channel("yaw_rate", "rad/s", "Yaw rate", sources={
+        'assetto_corsa': _ac('physics', 'localAngularVel', 1),
+        'iracing': Source('YawRate'),
+    }),
+    Channel("fuel", "l", "Fuel in the tank", sources={
+        'assetto_corsa': _ac('physics', 'fuel'),
+        'iracing': Source('FuelLevel'),
+    }),
+    # Player car position in world coordinates (y is up); AC lists the player's car first
+    Channel("world_x", "m", "World position X", sources={'assetto_corsa': _ac('graphics', 'carCoordinates', 0)}),
+    Channel("world_y", "m", "World position Y (up)", sources={'assetto_corsa': _ac('graphics', 'carCoordinates', 1)}),
+    Channel("world_z", "m", "World position Z", sources={'assetto_corsa': _ac('graphics', 'carCoordinates', 2)}),
+    *_wheels("tyre_temp", "C", "Tyre core temperature", 'tyreCoreTemperature',
+             ir_vars=('LFtempCM', 'RFtempCM', 'LRtempCM', 'RRtempCM')),
+    *_wheels("tyre_pressure", "kPa", "Tyre pressure", 'wheelsPressure', PSI_TO_KPA),
+    *_wheels("wheel_slip", "", "Wheel slip", 'wheelSlip'),
+    *_wheels("wheel_load", "N", "Wheel load", 'wheelLoad'),
+    *_wheels("suspension_travel", "m", "Suspension travel", 'suspensionTravel',
+             ir_vars=('LFshockDefl', 'RFshockDefl', 'LRshockDefl', 'RRshockDefl')),
+    *_wheels("brake_temp", "C", "Brake temperature", 'brakeTemp'),
+)
+
+class ChannelRegistry:
+    """Catalog of optional channels and who currently wants them.
+
+    Consumers (widgets, recorders, the command line) `subscribe` to channel names and
+    keep the returned token to `unsubscribe` later. Every change bumps `version`; the
+    engine compares it each tick and reconfigures the adapters with `subscribed()`, so
+    each adapter decodes exactly the union of subscribed channels and nothing more.
+    """
+
+    def __init__(self, channels=()):
+        self._channels = {}
+        self._subscriptions = {}
+        self._next_token = 1
+        self._lock = threading.Lock()
+        self.version = 0
+        for channel in channels:
+            self.register(channel)
+
+    def register(self, channel: Channel):
+        with self._lock:
+            self._channels[channel.name] = channel
+            self.version += 1
+
+    def get(self, name) -> Channel:
+        try:
+            return self._channels[name]
+        except KeyError:
+            raise KeyError(f"Unknown channel '{name}', available: {', '.join(self._channels)}") from None
+
+    def names(self):
+        return list(self._channels)
+
+    def subscribe(self, names) -> int:
+        names = [self.get(name).name for name in names]
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscriptions[token] = frozenset(names)
+            self.version += 1
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            if self._subscriptions.pop(token, None) is not None:
+                self.version += 1
+
+    def subscribed(self):
+        """Union of all subscriptions, as Channels in catalog order."""
+        with self._lock:
+            wanted = set().union(*self._subscriptions.values())
+            return [channel for name, channel in self._channels.items() if name in wanted]
+
+def default_channels() -> ChannelRegistry:
+    return ChannelRegistry(BUILTIN_CHANNELS)
@@ -0,0 +1,161 @@
+import math
+import numpy as np
+from .laps import LapIndex
+from .session_file import SessionReader
+
+# Reference laps are resampled onto this many equal steps of lap distance
+GRID_POINTS = 2000
+
+class ReferenceLap:
+    """Elapsed lap time at evenly spaced fractions of the lap, for O(1) lookups by position."""
+
+    def __init__(self, times, info=None):
+        # times[i] is the elapsed time at lap_dist_pct i / points; times[-1] is the lap time
+        self.times = np.asarray(times, dtype=np.float64)
+        self.points = len(self.times) - 1
+        self.lap_time = float(self.times[-1])
+        self.info = info or {}
+        self._times = self.times.tolist() # plain floats for the per-sample lookup
+
+    @classmethod
+    def from_samples(cls, timestamps, lap_dist_pct, lap_time, points=GRID_POINTS, info=None):
+        """Resamples one lap, given as its sample columns and its line-to-line time."""
+        elapsed = np.asarray(timestamps, dtype=np.float64) - timestamps[0]
+        dist = np.array(lap_dist_pct, dtype=np.float64)
+        # Around the line the position may lag the lap counter: still ~1.0 just after the
+        # crossing, or already ~0.0 just before the next one
+        half = len(dist) // 2
+        head, tail = dist[:half], dist[half:]
+        head[head > 0.9] = 0.0
+        tail[tail < 0.1] = 1.0
+        # The position never goes backwards along the reference
+        dist = np.maximum.accumulate(dist)
+
+        dist = np.concatenate(([0.0], dist, [1.0]))
+        elapsed = np.concatenate(([0.0], elapsed, [lap_time]))
+        grid = np.linspace(0.0, 1.0, points + 1)
+        return cls(np.interp(grid, dist, elapsed), info)
+
+    def time_at(self, lap_dist_pct) -> float:
+        """Reference time at a lap position: one index computation and a lerp."""
+        x = lap_dist_pct * self.points
+        i = int(x)
+        if i >= self.points:
+            return self.lap_time
+        if i < 0:
+            return 0.0
+        t0 = self._times[i]
+        return t0 + (self._times[i + 1] - t0) * (x - i)
+
+def reference_from_session(path, lap=None) -> ReferenceLap:
+    """Reference from a recorded session: lap `lap`, or its best complete lap."""
+    with SessionReader(path) as reader:
+        laps = LapIndex.from_session(reader)
+        chosen = laps.get(lap) if lap is not None else laps.best()
+        if chosen is None or chosen.running or not chosen.complete:
+            raise ValueError(f"{path} has no complete lap {lap if lap is not None else ''}".rstrip())
+        reference = ReferenceLap.from_samples(
+            reader.read('timestamp', chosen.start, chosen.end),
+            reader.read('lap_dist_pct', chosen.start, chosen.end),
+            chosen.end_time - chosen.start_time,
+            info={'source': path, 'lap': chosen.number, 'track': reader.metadata.get('track')},
+        )
+    return reference
+
+class _LapTrace:
+    """Builds a reference grid while a lap is driven, a constant amount of work per sample."""
+
+    def __init__(self, points):
+        self.points = points
+        self.times = [0.0] * (points + 1)
+        self.next = 1 # next grid index to fill; index 0 is the line itself, at 0 s
+        self.last_pct = 0.0
+        self.last_elapsed = 0.0
+
+    def add(self, elapsed, pct):
+        if pct > 0.9 and self.next < self.points // 10:
+            pct = 0.0 # position hasn't wrapped yet after the crossing
+        elif pct < 0.1 and self.next > self.points * 9 // 10:
+            pct = 1.0 # position wrapped before the lap counter did
+        if pct <= self.last_pct:
+            self.last_elapsed = elapsed
+            return
+        # Fill every grid point passed since the previous sample, usually none or one
+        target = pct * self.points
+        span = pct - self.last_pct
+        while self.next <= target and self.next <= self.points:
+            f = (self.next / self.points - self.last_pct) / span
+            self.times[self.next] = self.last_elapsed + (elapsed - self.last_elapsed) * f
+            self.next += 1
+        self.last_pct = pct
+        self.last_elapsed = elapsed
+
+    def finish(self, lap_time, info=None) -> ReferenceLap:
+        # The rest of the way to the line, straight from the last sample
+        self.add(lap_time, 1.0)
+        self.times[-1] = lap_time
+        return ReferenceLap(self.times, info)
+
+class DeltaTracker:
+    """Live time delta of the current lap against a reference lap.
+
+    `update` runs once per stored sample on the engine thread and costs the same at any
+    rate: the lap start comes from the LapIndex and the reference time from a grid lookup.
+    The lap being driven is traced onto its own grid at the same time, so with
+    `follow_best` every new best lap becomes the reference the moment it ends, however
+    long it was and without going back over its samples.
+    """
+
+    def __init__(self, laps: LapIndex, points=GRID_POINTS):
+        self.laps = laps
+        self.points = points
+        self.reference = None
+        self.follow_best = True
+        self._lap = None
+        self._trace = None
+        self._reference_lap = None # Lap the reference was traced from, when following best
+
+    def set_reference(self, reference: ReferenceLap, follow_best=False):
+        """Compares against `reference`, e.g. a loaded lap; None clears it."""
+        self.follow_best = follow_best
+        self._reference_lap = None
+        self.reference = reference
+
+    def reset(self):
+        # New source: a reference picked up from the old one no longer applies
+        if self._reference_lap is not None:
+            self.reference = None
+            self._reference_lap = None
+        self._lap = None
+        self._trace = None
+
+    def update(self, timestamp, lap_dist_pct) -> float:
+        """Delta in seconds (positive = slower than the reference), NaN when there is none."""
+        current = self.laps.current
+        if current is not self._lap:
+            self._lap_changed(current)
+        if current is None:
+            return math.nan
+
+        elapsed = timestamp - current.start_time
+        if self._trace is not None:
+            self._trace.add(elapsed, lap_dist_pct)
+
+        reference = self.reference
+        if reference is None or not current.complete:
+            return math.nan
+        if lap_dist_pct > 0.9 and elapsed < 0.1 * reference.lap_time:
+            lap_dist_pct = 0.0 # position hasn't wrapped yet after the crossing
+        return elapsed - reference.time_at(lap_dist_pct)
+
+    def _lap_changed(self, current):
+        ended, trace = self._lap, self._trace
+        self._lap = current
+        self._trace = _LapTrace(self.points) if current is not None and current.complete else None
+
+        if trace is None or ended is None or ended.end is None or not self.follow_best:
+            return
+        lap_time = ended.end_time - ended.start_time
+        if self.reference is None or lap_time < self.reference.lap_time:
+            self.reference = trace.finish(lap_time, {'lap': ended.number})
+            self._reference_lap = ended
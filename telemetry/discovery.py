@@ -0,0 +1,157 @@
+import time
+import threading
+from .instrumentation import probes
+
+SEARCHING = "searching"
+CONNECTED = "connected"
+LOST = "lost"
+UNAVAILABLE = "unavailable" # adapter failed to import or construct, not probed again
+
+class _Probe:
+    __slots__ = ('spec', 'adapter', 'state', 'delay', 'next_probe', 'attempts')
+
+    def __init__(self, spec, initial_delay, adapter=None):
+        self.spec = spec # None for a pinned adapter, see AdapterDiscovery.pin
+        self.adapter = adapter # created on the first probe
+        self.state = SEARCHING
+        self.delay = initial_delay
+        self.next_probe = 0.0
+        self.attempts = 0
+
+class AdapterDiscovery:
+    """Looks for running sims on a background thread so the engine's hot loop never has to.
+
+    `candidates` are AdapterSpecs probed in priority order. An adapter (and its module,
+    e.g. irsdk) is only imported and constructed when it is first probed. Each one is on
+    its own exponential backoff
+    (initial_delay doubling up to max_delay) while its sim isn't running. When one connects,
+    or the active one is lost, `on_change(adapter_or_None)` is called from the discovery
+    thread; the engine swaps its active adapter in one reference assignment.
+    Only sims with a higher priority than the active one keep being probed.
+
+    `pin` restricts probing to one adapter the user picked, on the same backoff.
+    """
+
+    def __init__(self, candidates, on_change, initial_delay=0.5, max_delay=10.0, check_interval=0.5):
+        self._candidates = [_Probe(spec, initial_delay) for spec in candidates]
+        self._probes = self._candidates
+        self._on_change = on_change
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        # How often the active adapter is checked for a lost connection
+        self.check_interval = check_interval
+        self.active = None
+        self.running = False
+        self._wake = threading.Event()
+        self._thread = None
+        self._connect_probe = probes.stage("adapter.connect")
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def pin(self, adapter):
+        """Probes only `adapter` from now on; None goes back to every candidate."""
+        self._probes = [_Probe(None, self.initial_delay, adapter)] if adapter is not None else self._candidates
+        self.active = None
+        self._wake.set()
+
+    def adapter(self, name):
+        """Adapter instance for the spec `name`, None if it hasn't been probed yet."""
+        for probe in self._candidates:
+            if probe.spec.name == name:
+                return probe.adapter
+        return None
+
+    def state(self) -> dict:
+        """Snapshot of the detection state for the UI."""
+        now = time.monotonic()
+        return {
+            'active': self.active.name if self.active else None,
+            'sims': [
+                {
+                    'name': probe.adapter.name if probe.adapter else probe.spec.title,
+                    'state': probe.state,
+                    'attempts': probe.attempts,
+                    'next_probe_in': max(0.0, probe.next_probe - now) if probe.state in (SEARCHING, LOST) else None,
+                }
+                for probe in self._probes
+            ],
+        }
+
+    def _loop(self):
+        while self.running:
+            now = time.monotonic()
+            self._check_active(now)
+
+            next_wake = now + self.check_interval
+            for probe in self._probes:
+                if self.active is not None and self.active is probe.adapter:
+                    break # lower priority sims don't matter while this one is connected
+                if probe.state == UNAVAILABLE:
+                    continue
+                if now >= probe.next_probe:
+                    self._probe(probe, now)
+                    if self.active is not None and self.active is probe.adapter:
+                        break
+                next_wake = min(next_wake, probe.next_probe)
+
+            self._wake.wait(max(0.0, next_wake - time.monotonic()))
+
+    def _check_active(self, now):
+        active = self.active
+        if active is None or active.connected:
+            return
+        for probe in self._probes:
+            if probe.adapter is active:
+                probe.state = LOST
+                probe.delay = self.initial_delay
+                probe.next_probe = now
+        self._switch(None)
+
+    def _probe(self, probe, now):
+        if probe.adapter is None:
+            try:
+                probe.adapter = probe.spec.create()
+            except Exception as e:
+                print(f"Adapter '{probe.spec.name}' is unavailable: {e}")
+                probe.state = UNAVAILABLE
+                return
+
+        probe.attempts += 1
+        start = time.perf_counter_ns()
+        try:
+            ok = probe.adapter.connect()
+        except Exception as e:
+            print(f"Probing {probe.adapter.name} failed: {e}")
+            ok = False
+        self._connect_probe.record(time.perf_counter_ns() - start)
+
+        if ok:
+            probe.state = CONNECTED
+            probe.delay = self.initial_delay
+            probe.attempts = 0
+            self._switch(probe.adapter)
+        else:
+            probe.state = SEARCHING if probe.state != LOST else LOST
+            probe.next_probe = now + probe.delay
+            probe.delay = min(probe.delay * 2, self.max_delay)
+
+    def _switch(self, adapter):
+        previous = self.active
+        self.active = adapter
+        if previous is not None and previous is not adapter:
+            for probe in self._probes:
+                if probe.adapter is previous and probe.state == CONNECTED:
+                    probe.state = SEARCHING
+        self._on_change(adapter)
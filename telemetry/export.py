@@ -0,0 +1,337 @@
+import json
+import time
+import numpy as np
+from .session_file import SessionReader
+from .channels import default_channels
+
+PARQUET = "parquet"
+CSV = "csv"
+MOTEC = "motec"
+FORMATS = (PARQUET, CSV, MOTEC)
+
+# Samples read per block; memory use is bounded by this, not the session length
+BLOCK_SAMPLES = 65536
+# Parquet row groups hold one lap each; a lap longer than this (e.g. hours in the pits) is split
+MAX_ROW_GROUP = 1 << 20
+# MoTeC logs are fixed rate; sessions without a known native rate are resampled to this
+DEFAULT_MOTEC_RATE_HZ = 100.0
+
+# Units of the TelemetryData columns; optional channels have theirs in the channel registry
+BASE_UNITS = {
+    'time': 's',
+    'throttle': 'ratio',
+    'brake': 'ratio',
+    'clutch': 'ratio',
+    'rpm': 'rpm',
+    'speed_kph': 'km/h',
+    'steering_angle': 'rad',
+    'gear': '',
+    'active': '',
+    'lap': '',
+    'lap_dist_pct': 'ratio',
+    'last_lap_time': 's',
+    'delta': 's',
+}
+# MoTeC shows pedals and lap position in percent
+MOTEC_PERCENT = ('throttle', 'brake', 'clutch', 'lap_dist_pct')
+
+def parse_laps(text):
+    """Lap numbers of a selection like "3-5,8"."""
+    laps = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        laps.update(range(int(first), int(last or first) + 1))
+    return sorted(laps)
+
+class _Selection:
+    """Blocks of the exported samples: the chosen channels (with 'time' in seconds since
+    the session's first sample), restricted to the chosen laps."""
+
+    def __init__(self, reader, channels=None, laps=None, block_size=BLOCK_SAMPLES):
+        names = reader.channel_names
+        if channels is not None:
+            unknown = [name for name in channels if name not in names]
+            if unknown:
+                raise KeyError(f"{reader.path} has no channel(s) {', '.join(unknown)}, it has {', '.join(names)}")
+        if laps is not None and 'lap' not in names:
+            raise KeyError(f"{reader.path} has no lap channel to select laps by")
+        self.reader = reader
+        self.names = ['time'] + [name for name in (channels or names) if name != 'timestamp']
+        self.laps = np.array(laps) if laps is not None else None
+        self.block_size = block_size
+        self.t0 = float(reader.read('timestamp', 0, 1)[0]) if reader.num_samples else 0.0
+
+    def dtypes(self):
+        dtypes = dict(self.reader.channels)
+        return [(name, np.dtype(np.float64) if name == 'time' else dtypes[name]) for name in self.names]
+
+    def blocks(self, names=None, extra=()):
+        """(sample numbers, columns) per block; `names` reads only some of the channels,
+        `extra` adds others the writer needs (when the session has them)."""
+        names = list(names or self.names) + [name for name in extra if name in self.reader.channel_names]
+        read = {'timestamp' if name == 'time' else name for name in names}
+        if self.laps is not None:
+            read.add('lap')
+        for first, columns in self.reader.iter_blocks(self.block_size, sorted(read)):
+            index = np.arange(first, first + len(columns['timestamp']))
+            if self.laps is not None:
+                keep = np.isin(columns['lap'], self.laps)
+                if not keep.any():
+                    continue
+                index = index[keep]
+                columns = {name: column[keep] for name, column in columns.items()}
+            columns['time'] = columns['timestamp'] - self.t0
+            yield index, {name: columns[name] for name in names}
+
+class _CsvWriter:
+    """Plain CSV: a header line of channel names, then one line per sample."""
+
+    def __init__(self, path, selection):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.names = selection.names
+        formats = []
+        for name, dtype in selection.dtypes():
+            if name == 'time':
+                formats.append("%.6f")
+            elif dtype.kind in "biu":
+                formats.append("%d")
+            else:
+                formats.append("%.7g")
+        self.format = ",".join(formats) + "\n"
+        self.file.write(",".join(self.names) + "\n")
+
+    def write(self, index, columns):
+        rows = zip(*(columns[name].tolist() for name in self.names))
+        self.file.write("".join(self.format % row for row in rows))
+
+    def close(self):
+        self.file.close()
+
+class _ParquetWriter:
+    """Parquet with one row group per lap, so readers can fetch single laps.
+
+    The current lap's blocks are held until it ends (or reaches MAX_ROW_GROUP samples),
+    then written as one row group. Needs the optional pyarrow package.
+    """
+
+    def __init__(self, path, selection):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export needs the 'pyarrow' package (pip install pyarrow)")
+        self.pa = pyarrow
+        self.names = selection.names
+        metadata = {'srtl.metadata': json.dumps(selection.reader.metadata), 'srtl.units': json.dumps(_units(self.names))}
+        schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(dtype)) for name, dtype in selection.dtypes()], metadata=metadata)
+        self.writer = pyarrow.parquet.ParquetWriter(path, schema, compression="zstd")
+        self.schema = schema
+        self.pending = [] # column dicts of the lap being collected
+        self.pending_rows = 0
+        self.lap = None
+        self.next_index = None # sample that would continue the pending lap
+        self.row_groups = 0
+
+    def write(self, index, columns):
+        laps = columns.get('lap')
+        if laps is None:
+            laps = np.zeros(len(index), dtype=np.int16)
+        # Cut the block where the lap changes, or where a lap filter skipped samples
+        cuts = np.flatnonzero((laps[1:] != laps[:-1]) | (np.diff(index) != 1)) + 1
+        for start, stop in zip(np.concatenate(([0], cuts)), np.concatenate((cuts, [len(index)]))):
+            if not (self.pending and laps[start] == self.lap and index[start] == self.next_index):
+                self._flush()
+                self.lap = laps[start]
+            self.pending.append({name: columns[name][start:stop] for name in self.names})
+            self.pending_rows += stop - start
+            self.next_index = index[stop - 1] + 1
+            if self.pending_rows >= MAX_ROW_GROUP:
+                self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        arrays = [self.pa.array(np.concatenate([piece[name] for piece in self.pending])) for name in self.names]
+        table = self.pa.Table.from_arrays(arrays, schema=self.schema)
+        self.writer.write_table(table, row_group_size=len(table))
+        self.row_groups += 1
+        self.pending = []
+        self.pending_rows = 0
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+class _MotecWriter:
+    """The MoTeC CSV layout i2 imports: a header block with the session details and lap
+    beacons, a row of channel names and one of units, then the samples at a fixed rate.
+
+    Samples are resampled to `rate_hz` by holding the last value (no interpolation, so
+    gears, lap numbers and the lap position wrap stay exact). Laps picked with a lap
+    filter are laid end to end on one time axis, as if driven in one outing.
+    """
+
+    def __init__(self, path, selection, rate_hz, beacons, duration):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.names = selection.names
+        self.interval = 1.0 / rate_hz
+        self.scale = {name: 100.0 for name in MOTEC_PERCENT if name in self.names}
+        units = _units(self.names)
+        units.update({name: '%' for name in self.scale})
+        metadata = selection.reader.metadata
+        started = _parse_time(metadata.get('started_at'))
+        venue = " ".join(filter(None, (metadata.get('track'), metadata.get('track_configuration'))))
+        header = [
+            ["Format", "MoTeC CSV File", "", "", "Workbook", ""],
+            ["Venue", venue, "", "", "Worksheet", ""],
+            ["Vehicle", metadata.get('car') or "", "", "", "Vehicle Desc", ""],
+            ["Driver", metadata.get('driver') or "", "", "", "Engine ID", ""],
+            ["Device", metadata.get('adapter') or "", "", "", "Session", ""],
+            ["Comment", "", "", "", "Origin Time", "0.000", "s"],
+            ["Log Date", time.strftime("%d/%m/%Y", started) if started else "", "", "", "Start Distance", "0", "m"],
+            ["Log Time", time.strftime("%H:%M:%S", started) if started else ""],
+            ["Sample Rate", f"{rate_hz:g}", "Hz"],
+            ["Duration", f"{duration:.3f}", "s"],
+            ["Range", "entire outing"],
+            ["Beacon Markers", *(f"{beacon:.3f}" for beacon in beacons)],
+        ]
+        lines = [",".join(f'"{cell}"' for cell in row) for row in header]
+        lines += ["", ""]
+        lines.append(",".join(f'"{_motec_name(name)}"' for name in self.names))
+        lines.append(",".join(f'"{units[name]}"' for name in self.names))
+        lines.append("")
+        self.file.write("\n".join(lines) + "\n")
+        formats = ["%.3f" if name == 'time' else "%d" if dtype.kind in "biu" else "%.6g" for name, dtype in selection.dtypes()]
+        self.format = ",".join(formats) + "\n"
+        self.timeline = _Timeline()
+        self.next_time = 0.0 # next output sample, on the outing time axis
+        self.held = None # last input sample of the previous block, {name: value}
+
+    def write(self, index, columns):
+        times = self.timeline.feed(index, columns['time'])
+        grid = np.arange(self.next_time, times[-1] + 1e-9, self.interval)
+        if len(grid) == 0:
+            self._hold(columns)
+            return
+        # Last input sample at or before each output time; -1 is the one held from the previous block
+        source = np.searchsorted(times, grid, side='right') - 1
+        out = []
+        for name in self.names:
+            if name == 'time':
+                values = grid
+            else:
+                column = columns[name]
+                if self.held is not None:
+                    column = np.concatenate(([self.held[name]], column))
+                    values = column[source + 1]
+                else:
+                    values = column[np.maximum(source, 0)]
+                if name in self.scale:
+                    values = values * self.scale[name]
+            out.append(values.tolist())
+        self.file.write("".join(self.format % row for row in zip(*out)))
+        self.next_time = grid[-1] + self.interval
+        self._hold(columns)
+
+    def _hold(self, columns):
+        self.held = {name: column[-1] for name, column in columns.items()}
+
+    def close(self):
+        self.file.close()
+
+class _Timeline:
+    """Outing time of selected samples: session time, with the gaps left by a lap filter closed up."""
+
+    def __init__(self):
+        self.offset = 0.0 # removed so far
+        self.last_index = None
+        self.last_time = None
+        self.step = 0.0 # typical sample interval, stands in for a removed gap
+
+    def feed(self, index, session_time):
+        times = np.asarray(session_time, dtype=np.float64)
+        prev_index = np.concatenate(([index[0] - 1 if self.last_index is None else self.last_index], index[:-1]))
+        prev_time = np.concatenate(([times[0] if self.last_time is None else self.last_time], times[:-1]))
+        if len(times) > 1:
+            self.step = float(np.median(np.diff(times)))
+        gaps = prev_index != index - 1
+        # Each gap is closed to one typical interval
+        removed = np.where(gaps, times - prev_time - self.step, 0.0)
+        if self.last_index is None:
+            removed[0] = times[0] # the outing starts at 0
+        outing = times - (self.offset + np.cumsum(removed))
+        self.offset += removed.sum()
+        self.last_index = index[-1]
+        self.last_time = times[-1]
+        return outing
+
+def _units(names):
+    registry = default_channels()
+    units = {}
+    for name in names:
+        if name in BASE_UNITS:
+            units[name] = BASE_UNITS[name]
+        else:
+            try:
+                units[name] = registry.get(name).unit
+            except KeyError:
+                units[name] = ''
+    return units
+
+def _motec_name(name):
+    return name.replace("_", " ").title()
+
+def _parse_time(text):
+    try:
+        return time.strptime(text, "%Y-%m-%dT%H:%M:%S%z")
+    except (TypeError, ValueError):
+        return None
+
+def export_session(path, output, format, channels=None, laps=None, rate_hz=None, block_size=BLOCK_SAMPLES) -> dict:
+    """Exports the recording at `path` to `output` as PARQUET, CSV or MOTEC, a block at a time.
+
+    `channels` and `laps` restrict what is exported (default: everything); `rate_hz` is
+    the MoTeC sample rate (default: the sim's native rate). Returns what was written.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format '{format}', expected one of {', '.join(FORMATS)}")
+    with SessionReader(path) as reader:
+        selection = _Selection(reader, channels, laps, block_size)
+        if format == MOTEC:
+            rate_hz = rate_hz or reader.metadata.get('native_rate_hz') or DEFAULT_MOTEC_RATE_HZ
+            writer = _MotecWriter(output, selection, rate_hz, *_motec_beacons(selection))
+        elif format == PARQUET:
+            writer = _ParquetWriter(output, selection)
+        else:
+            writer = _CsvWriter(output, selection)
+
+        samples = 0
+        try:
+            # Parquet row groups follow the laps, exported or not
+            for index, columns in selection.blocks(extra=['lap'] if format == PARQUET else ()):
+                writer.write(index, columns)
+                samples += len(index)
+        finally:
+            writer.close()
+    result = {'output': output, 'format': format, 'samples': samples, 'channels': selection.names}
+    if format == PARQUET:
+        result['row_groups'] = writer.row_groups
+    if format == MOTEC:
+        result['rate_hz'] = rate_hz
+    return result
+
+def _motec_beacons(selection):
+    # First pass over time and lap only: MoTeC wants the lap markers and duration up front
+    timeline = _Timeline()
+    beacons = []
+    last_lap = None
+    duration = 0.0
+    for index, columns in selection.blocks(['time'], extra=['lap']):
+        times = timeline.feed(index, columns['time'])
+        duration = times[-1]
+        if 'lap' in columns:
+            lap = columns['lap']
+            previous = np.concatenate(([lap[0] if last_lap is None else last_lap], lap[:-1]))
+            beacons.extend(times[lap != previous].tolist())
+            last_lap = lap[-1]
+    return beacons, duration
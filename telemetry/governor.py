@@ -0,0 +1,79 @@
+import time
+
+ACTIVE = "active"
+IDLE = "idle" # car not active: menus, paused, replay stopped, Mock fallback
+STATIC = "static" # car active but the data hasn't changed for a while
+
+class RateGovernor:
+    """Decides how fast the engine acquires and the overlay repaints.
+
+    The engine reports every poll with `observe`. While the car is active and the data
+    keeps changing the full rates apply. Once it has been inactive or unchanged for
+    `settle_s`, acquisition drops to `idle_acquisition_hz` and UI frames to `idle_ui_hz`,
+    so the overlay stops competing with the sim for CPU. The first active, changed sample
+    switches back at once; `idle_acquisition_hz` is kept at display rate by default so
+    that happens within one frame.
+
+    Effective rates are measured over `window_s` from the polls and posts actually made.
+    """
+
+    def __init__(self, idle_acquisition_hz=60.0, idle_ui_hz=10.0, settle_s=1.0, window_s=1.0):
+        self.idle_acquisition_hz = idle_acquisition_hz
+        self.idle_ui_hz = idle_ui_hz
+        self.settle_s = settle_s
+        self.window_s = window_s
+        self.enabled = True
+
+        self.state = ACTIVE
+        self._last_lively = time.perf_counter() # last time the car was active with new data
+
+        # Measured rates; counted by the engine thread, read by the GUI
+        self.acquisition_hz = 0.0
+        self.ui_hz = 0.0
+        self._polls = 0
+        self._posts = 0
+        self._window_start = self._last_lively
+
+    def observe(self, now, active, changed):
+        """Engine side, once per poll. Returns True when the state changed."""
+        self._polls += 1
+        if now - self._window_start >= self.window_s:
+            elapsed = now - self._window_start
+            self.acquisition_hz = self._polls / elapsed
+            self.ui_hz = self._posts / elapsed
+            self._polls = self._posts = 0
+            self._window_start = now
+
+        if active and changed:
+            self._last_lively = now
+        if not self.enabled or (active and changed):
+            state = ACTIVE
+        elif now - self._last_lively < self.settle_s:
+            state = self.state
+        else:
+            state = IDLE if not active else STATIC
+        if state == self.state:
+            return False
+        self.state = state
+        return True
+
+    def posted(self):
+        """Engine side, once per UI frame posted."""
+        self._posts += 1
+
+    @property
+    def idle(self):
+        return self.state != ACTIVE
+
+    def acquisition_rate(self, full_hz):
+        return full_hz if not self.idle else min(full_hz, self.idle_acquisition_hz)
+
+    def ui_rate(self, full_hz):
+        return full_hz if not self.idle else min(full_hz, self.idle_ui_hz)
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'acquisition_hz': self.acquisition_hz,
+            'ui_hz': self.ui_hz,
+        }
@@ -0,0 +1,245 @@
+import os
+import time
+import functools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Stages timed on the hot path, in pipeline order (see `probes`)
+STAGES = (
+    "adapter.connect", # discovery probing a sim (connect())
+    "adapter.update", # the engine's whole adapter.update() call, any adapter
+    "adapter.read", # AC/iRacing: fetching the raw values from shared memory
+    "adapter.decode", # AC/iRacing: mapping them into TelemetryData
+    "engine.store", # buffer append, lap index and delta
+    "engine.record", # recorder.poll()
+    "engine.emit", # car positions and posting the UI frame
+    "engine.tick_lateness", # how late each poll started against its deadline
+    "queue.wait", # frame posted -> taken by the GUI
+    "gui.frame", # OverlayWindow.update_ui
+    # ... then "paint.<widget>" for every widget's paintEvent
+)
+
+class TimingHistogram:
+    """Running histogram of durations, in power-of-two microsecond buckets.
+
+    Bucket i counts durations in [2**(i-1), 2**i) microseconds (bucket 0: under 1 us), so
+    recording is an int.bit_length and an increment; percentiles are read as the upper
+    edge of the bucket they fall in, i.e. to within a factor of two.
+    """
+    BUCKETS = 24 # up to ~8 s
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.BUCKETS
+        self.total_ns = 0
+        self.max_ns = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def record(self, ns):
+        # On the hot path: kept to the bare minimum of operations
+        if ns < 0:
+            ns = 0
+        bucket = (ns // 1000).bit_length()
+        self.counts[bucket if bucket < _LAST_BUCKET else _LAST_BUCKET] += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile_us(self, q) -> float:
+        """Upper bucket edge below which `q` percent of the durations fall, 0 when empty."""
+        count = self.count
+        if count == 0:
+            return 0.0
+        rank = q / 100.0 * count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return float(min(2 ** i, self.max_ns / 1000.0))
+        return self.max_ns / 1000.0
+
+    def stats(self) -> dict:
+        count = self.count
+        return {
+            'count': count,
+            'total_us': self.total_ns / 1000.0,
+            'mean_us': self.total_ns / count / 1000.0 if count else 0.0,
+            'p50_us': self.percentile_us(50),
+            'p99_us': self.percentile_us(99),
+            'max_us': self.max_ns / 1000.0,
+            # Upper edge in us -> count, for buckets that have any
+            'buckets': {2 ** i: n for i, n in enumerate(self.counts) if n},
+        }
+
+_LAST_BUCKET = TimingHistogram.BUCKETS - 1
+
+class Probes:
+    """Named TimingHistograms of the hot path stages, one set per process.
+
+    Code on the hot path fetches its histogram once (`stage`) and records perf_counter_ns
+    differences into it, which costs well under a microsecond; nothing is locked, each
+    stage is only written from one thread. Readers (the debug HUD, the metrics export)
+    take `stats` whenever they like.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name) -> TimingHistogram:
+        histogram = self.stages.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(name, TimingHistogram())
+        return histogram
+
+    def register(self, name, histogram: TimingHistogram):
+        """Publishes a histogram kept elsewhere (e.g. the tick scheduler's) as stage `name`."""
+        with self._lock:
+            self.stages[name] = histogram
+
+    def stats(self) -> dict:
+        """Stage name -> TimingHistogram.stats(), in pipeline order."""
+        with self._lock:
+            stages = list(self.stages.items())
+        return {name: histogram.stats() for name, histogram in sorted(stages, key=lambda item: stage_order(item[0]))}
+
+    def reset(self):
+        for histogram in list(self.stages.values()):
+            histogram.reset()
+
+# The process' probes; adapters, the engine and the widgets all record into these
+probes = Probes()
+
+def stage_order(name):
+    return (STAGES.index(name), name) if name in STAGES else (len(STAGES), name)
+
+def timed(stage):
+    """Decorator recording each call of the function into stage `stage` of `probes`."""
+    def decorate(function):
+        histogram = probes.stage(stage)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+        return wrapper
+    return decorate
+
+def prometheus_text(stages) -> str:
+    """Stage stats (as returned by Probes.stats) in the Prometheus text exposition format.
+
+    Each stage is one series of the `srt_stage_seconds` histogram, with the power-of-two
+    buckets as cumulative `le` buckets, plus its maximum as a gauge.
+    """
+    lines = [
+        "# HELP srt_stage_seconds Time spent in each hot path stage (tick_lateness: how late polls started).",
+        "# TYPE srt_stage_seconds histogram",
+    ]
+    for name, stats in stages.items():
+        label = f'stage="{name}"'
+        buckets = {int(edge): n for edge, n in stats['buckets'].items()}
+        cumulative = 0
+        # The last bucket is open ended, it only counts towards +Inf
+        for i in range(TimingHistogram.BUCKETS - 1):
+            cumulative += buckets.get(2 ** i, 0)
+            lines.append(f'srt_stage_seconds_bucket{{{label},le="{2 ** i / 1e6:g}"}} {cumulative}')
+        lines.append(f'srt_stage_seconds_bucket{{{label},le="+Inf"}} {stats["count"]}')
+        lines.append(f'srt_stage_seconds_sum{{{label}}} {stats["total_us"] / 1e6:.9g}')
+        lines.append(f'srt_stage_seconds_count{{{label}}} {stats["count"]}')
+    lines.append("# HELP srt_stage_max_seconds Longest time spent in each hot path stage.")
+    lines.append("# TYPE srt_stage_max_seconds gauge")
+    for name, stats in stages.items():
+        lines.append(f'srt_stage_max_seconds{{stage="{name}"}} {stats["max_us"] / 1e6:.9g}')
+    return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Publishes stage timings in the Prometheus text format, to a file and/or over HTTP.
+
+    `source` returns the stage stats to publish (e.g. engine.timings). The file is
+    rewritten every `interval` seconds, atomically, so a node_exporter textfile collector
+    never reads half of it; the HTTP endpoint serves /metrics on demand.
+    """
+
+    def __init__(self, source, path=None, http=None, interval=5.0):
+        self.source = source
+        self.path = path
+        self.interval = interval
+        self._server = None
+        self._stop = threading.Event()
+        self._thread = None
+        if http is not None:
+            self._server = ThreadingHTTPServer(http, self._handler())
+            self._server.daemon_threads = True
+
+    @property
+    def address(self):
+        """(host, port) the HTTP endpoint listens on, None without one."""
+        return self._server.server_address[:2] if self._server else None
+
+    def start(self):
+        if self._server:
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if self.path:
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def text(self) -> str:
+        return prometheus_text(self.source())
+
+    def write(self):
+        temp = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(self.text())
+        os.replace(temp, self.path)
+
+    def _write_loop(self):
+        while True:
+            try:
+                self.write()
+            except Exception as e:
+                print(f"Could not write metrics to {self.path}: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+    def _handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                try:
+                    body = exporter.text().encode()
+                except Exception as e:
+                    self.send_error(503, str(e))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # no line per scrape
+
+        return Handler
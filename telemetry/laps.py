@@ -0,0 +1,116 @@
+import numpy as np
+from dataclasses import dataclass
+from .session_file import SessionReader
+
+@dataclass
+class Lap:
+    number: int
+    start: int # sequence number (or session sample index) of the first sample
+    start_time: float
+    end: int = None # one past the last sample, None while the lap is being driven
+    end_time: float = None
+    # Sim reported lap time when there is one, else the time between the two line crossings
+    time: float = None
+    # False for a lap we joined after it started (first lap of a connection or recording)
+    complete: bool = True
+
+    @property
+    def running(self) -> bool:
+        return self.end is None
+
+class LapIndex:
+    """Lap number -> Lap, built from the lap counter as samples come in.
+
+    A lap starts at the first sample with a new `lap` value and ends where the next one
+    starts, so lookups are a dict access and no samples are ever scanned. The sim's
+    official lap time (`last_lap_time`) often updates a few frames after the counter; it
+    is attached to the lap that just ended when it changes.
+
+    The engine feeds it one sample at a time with `observe`; `feed` takes whole columns
+    (recorded sessions, see `from_session`) and only visits samples where something changed.
+    """
+
+    def __init__(self):
+        self.laps = {}
+        self.current = None
+        self._last_lap_time = None
+        self._awaiting_time = None # lap that ended and has no official time yet
+
+    def reset(self):
+        self.laps = {}
+        self.current = None
+        self._last_lap_time = None
+        self._awaiting_time = None
+
+    def __len__(self):
+        return len(self.laps)
+
+    def __contains__(self, number):
+        return number in self.laps
+
+    def get(self, number) -> Lap:
+        return self.laps.get(number)
+
+    def completed(self):
+        """Laps driven from line to line, oldest first."""
+        return [lap for lap in self.laps.values() if lap.complete and not lap.running]
+
+    def sample_range(self, number, end):
+        """[start, stop) of lap `number`, None if unknown; a running lap stops at `end` (e.g. buffer.count)."""
+        lap = self.laps.get(number)
+        if lap is None:
+            return None
+        return lap.start, end if lap.end is None else lap.end
+
+    def best(self) -> Lap:
+        laps = [lap for lap in self.completed() if lap.time]
+        return min(laps, key=lambda lap: lap.time) if laps else None
+
+    def observe(self, seq, timestamp, lap, last_lap_time):
+        """Engine side, once per stored sample."""
+        current = self.current
+        if current is None or lap != current.number:
+            self._new_lap(seq, timestamp, lap)
+        if last_lap_time != self._last_lap_time:
+            if self._last_lap_time is not None and last_lap_time > 0 and self._awaiting_time is not None:
+                self._awaiting_time.time = float(last_lap_time)
+                self._awaiting_time = None
+            self._last_lap_time = last_lap_time
+
+    def feed(self, first_seq, timestamps, laps, last_lap_times):
+        """Vectorised `observe` over columns of samples starting at sequence number `first_seq`."""
+        if len(laps) == 0:
+            return
+        # Only samples where the counter or the official time changed can do anything
+        changed = np.empty(len(laps), dtype=bool)
+        changed[1:] = (laps[1:] != laps[:-1]) | (last_lap_times[1:] != last_lap_times[:-1])
+        changed[0] = (self.current is None or laps[0] != self.current.number
+                      or last_lap_times[0] != self._last_lap_time)
+        for i in np.flatnonzero(changed).tolist():
+            self.observe(first_seq + i, float(timestamps[i]), int(laps[i]), float(last_lap_times[i]))
+
+    def _new_lap(self, seq, timestamp, number):
+        current = self.current
+        if current is not None and number < current.number:
+            # Counter went back: new session or a restart, earlier laps no longer apply
+            self.reset()
+            current = None
+
+        if current is not None:
+            current.end = seq
+            current.end_time = timestamp
+            current.time = timestamp - current.start_time
+            self._awaiting_time = current if current.complete else None
+        self.current = Lap(number, seq, timestamp, complete=current is not None)
+        self.laps[number] = self.current
+
+    @classmethod
+    def from_session(cls, reader: SessionReader):
+        """Index of a recorded session, in sample indices. Empty for files without lap data."""
+        index = cls()
+        if 'lap' not in reader.channel_names:
+            return index
+        for i, (first, _, _) in enumerate(reader.chunks):
+            chunk = reader.chunk(i, ['timestamp', 'lap', 'last_lap_time'])
+            index.feed(first, chunk['timestamp'], chunk['lap'], chunk['last_lap_time'])
+        return index
@@ -0,0 +1,159 @@
+import numpy as np
+from .ring_buffer import TelemetryBuffer
+
+# Each level summarises BRANCHING blocks of the level below
+BRANCHING = 4
+
+class _Level:
+    """Mirrored ring of per-block (min, max) pairs, indexed by absolute block number."""
+
+    def __init__(self, block, size):
+        self.block = block # samples per block
+        self.size = size
+        self.mins = np.zeros(size * 2, dtype=np.float32)
+        self.maxs = np.zeros(size * 2, dtype=np.float32)
+        self.count = 0 # blocks started so far
+        self.dirty = 0 # first block written since the level above last folded this one in
+
+    def write(self, first, mins, maxs):
+        # Mirrored like TelemetryBuffer so any run of blocks is one contiguous slice
+        n = len(mins)
+        i = first % self.size
+        if i + n <= self.size:
+            for column, values in ((self.mins, mins), (self.maxs, maxs)):
+                column[i:i + n] = values
+                column[i + self.size:i + self.size + n] = values
+        else:
+            idx = np.arange(first, first + n) % self.size
+            for column, values in ((self.mins, mins), (self.maxs, maxs)):
+                column[idx] = values
+                column[idx + self.size] = values
+        self.count = max(self.count, first + n)
+        self.dirty = min(self.dirty, first)
+
+    def window(self, start, end):
+        start = max(start, self.count - self.size, 0)
+        end = min(end, self.count)
+        if start >= end:
+            return start, self.mins[:0], self.maxs[:0]
+        stop = (end - 1) % self.size + self.size + 1
+        first = stop - (end - start)
+        return start, self.mins[first:stop], self.maxs[first:stop]
+
+class MinMaxPyramid:
+    """Multi-resolution min/max summary of one buffer channel, for drawing long traces.
+
+    Level k holds the min and max of every aligned block of BRANCHING**k samples.
+    `update` folds in whatever was appended to the buffer since the last call, touching
+    only the blocks those samples fall in, so keeping it current costs O(new samples).
+    Levels are folded lazily, `column_extents` only brings the level it reads up to date.
+    `column_extents` then answers "min/max per pixel column" for any window from the
+    coarsest level that still resolves one column, so spikes like brake stabs survive
+    however many samples land in a column.
+    """
+
+    def __init__(self, buffer: TelemetryBuffer, channel: str, levels=6):
+        self.buffer = buffer
+        self.channel = channel
+        self.levels = []
+        block = 1
+        for _ in range(levels):
+            block *= BRANCHING
+            self.levels.append(_Level(block, buffer.capacity // block + 2))
+        self._seen = buffer.count
+
+    def reset(self):
+        for level in self.levels:
+            level.count = level.dirty = 0
+        self._seen = max(0, self.buffer.count - self.buffer.capacity)
+
+    def update(self, levels=None):
+        """Folds new samples into the first `levels` levels (all by default)."""
+        for i in range(len(self.levels) if levels is None else levels):
+            self._fold(i)
+
+    def _fold(self, i):
+        # Level 1 from raw samples, every further level from the one below
+        level = self.levels[i]
+        if i == 0:
+            child_start, child_end = self._seen, self.buffer.count
+            child_start = max(child_start, child_end - self.buffer.capacity)
+            self._seen = child_end
+        else:
+            child = self.levels[i - 1]
+            child_start, child_end = max(child.dirty, child.count - child.size), child.count
+            child.dirty = child.count
+        if child_start >= child_end:
+            return
+
+        first_block = child_start // BRANCHING
+        last_block = (child_end - 1) // BRANCHING
+        lo = first_block * BRANCHING
+        hi = (last_block + 1) * BRANCHING
+        if i == 0:
+            child_lo = child_hi = self.buffer.window(self.channel, lo, child_end)
+            offset = max(lo, child_end - self.buffer.capacity, 0)
+        else:
+            offset, child_lo, child_hi = self.levels[i - 1].window(lo, hi)
+        n_blocks = last_block - first_block + 1
+
+        # Pad partial (newest) or already overwritten children so they never win
+        mins = np.full(n_blocks * BRANCHING, np.inf, dtype=np.float32)
+        maxs = np.full(n_blocks * BRANCHING, -np.inf, dtype=np.float32)
+        k = offset - lo
+        mins[k:k + len(child_lo)] = child_lo
+        maxs[k:k + len(child_hi)] = child_hi
+        level.write(first_block, mins.reshape(n_blocks, BRANCHING).min(axis=1),
+                    maxs.reshape(n_blocks, BRANCHING).max(axis=1))
+
+    def column_extents(self, bounds):
+        """Min and max per column, where column i covers samples [bounds[i], bounds[i+1]).
+
+        Boundaries are snapped to the blocks of the chosen level, so a sample may land in
+        the neighbouring column, but every sample in range counts toward exactly one column.
+        Empty columns come back as NaN.
+        """
+        bounds = np.asarray(bounds, dtype=np.int64)
+        spans = np.diff(bounds)
+        positive = spans[spans > 0]
+        if len(positive) == 0:
+            empty = np.full(len(spans), np.nan, dtype=np.float32)
+            return empty, empty.copy()
+
+        # Coarsest level whose blocks still fit in the narrowest column
+        narrowest = int(positive.min())
+        depth = 0
+        while depth < len(self.levels) and self.levels[depth].block <= narrowest:
+            depth += 1
+        self.update(depth)
+        level = self.levels[depth - 1] if depth else None
+        block = level.block if level else 1
+
+        snapped = bounds // block
+        # Round the far end up so the newest, still filling block is included
+        snapped[-1] = -(-bounds[-1] // block)
+        if level is None:
+            # Columns narrower than a level 1 block, reduce raw samples
+            lo_values = hi_values = self.buffer.window(self.channel, int(snapped[0]), int(snapped[-1]))
+            first = max(int(snapped[0]), self.buffer.count - self.buffer.capacity, 0)
+        else:
+            first, lo_values, hi_values = level.window(int(snapped[0]), int(snapped[-1]))
+
+        mins = np.full(len(spans), np.nan, dtype=np.float32)
+        maxs = np.full(len(spans), np.nan, dtype=np.float32)
+        if len(lo_values) == 0:
+            return mins, maxs
+
+        # Column starts relative to the retrieved slice; columns entirely outside are empty
+        starts = np.clip(snapped[:-1] - first, 0, len(lo_values))
+        ends = np.clip(snapped[1:] - first, 0, len(lo_values))
+        has_data = ends > starts
+        idx = starts[has_data]
+        if len(idx):
+            mins[has_data] = np.minimum.reduceat(lo_values, idx)
+            maxs[has_data] = np.maximum.reduceat(hi_values, idx)
+            # reduceat runs each segment up to the next index, cap the last one at its end
+            last = np.flatnonzero(has_data)[-1]
+            mins[last] = lo_values[starts[last]:ends[last]].min()
+            maxs[last] = hi_values[starts[last]:ends[last]].max()
+        return mins, maxs
@@ -0,0 +1,72 @@
+import time
+from .adapters.base import TelemetryData
+from .ring_buffer import TelemetryBuffer, TelemetryBatch
+from .instrumentation import probes
+
+class FrameMailbox:
+    """Latest-value handoff of UI frames from the engine thread to the GUI thread.
+
+    The engine posts the newest TelemetryData and the buffer sequence number it reached,
+    the GUI takes whatever is there on its own (display synchronized) timer and gets one
+    TelemetryBatch covering every sample since its previous take. A frame the GUI didn't
+    get to in time is coalesced into the next one instead of queued, so a stalled GUI never
+    replays a burst of stale frames.
+
+    No locks: the engine only ever replaces `_slot` and the GUI only ever reads it, and a
+    reference assignment is atomic under the GIL.
+    """
+
+    def __init__(self, buffer: TelemetryBuffer):
+        self.buffer = buffer
+        self._slot = None # (post number, TelemetryData, buffer end, post time)
+        self._taken_post = 0
+        self._taken_end = buffer.count
+
+        # Backpressure counters, written by the GUI side only
+        self.posted = 0
+        self.delivered = 0
+        self.coalesced_frames = 0 # posted frames superseded before the GUI took them
+        self.dropped_samples = 0 # samples overwritten in the ring buffer before the GUI took them
+        self.last_latency = 0.0 # seconds between post and take of the last delivered frame
+        self.max_latency = 0.0
+        self._wait_probe = probes.stage("queue.wait")
+
+    def post(self, latest: TelemetryData, end: int):
+        """Engine side: publish a new frame, replacing any frame not taken yet."""
+        slot = self._slot
+        number = slot[0] + 1 if slot else 1
+        self._slot = (number, latest, end, time.perf_counter())
+
+    def take(self):
+        """GUI side: TelemetryBatch of everything since the previous take, or None if nothing was posted."""
+        slot = self._slot
+        if slot is None or slot[0] == self._taken_post:
+            return None
+        number, latest, end, posted_at = slot
+
+        self.posted = number
+        self.coalesced_frames += number - self._taken_post - 1
+        self._taken_post = number
+
+        start = self._taken_end
+        oldest = end - self.buffer.capacity
+        if start < oldest:
+            self.dropped_samples += oldest - start
+            start = oldest
+        self._taken_end = end
+
+        self.delivered += 1
+        self.last_latency = time.perf_counter() - posted_at
+        self.max_latency = max(self.max_latency, self.last_latency)
+        self._wait_probe.record(int(self.last_latency * 1e9))
+        return TelemetryBatch(latest, start, end, self.buffer)
+
+    def stats(self) -> dict:
+        return {
+            'posted': self.posted,
+            'delivered': self.delivered,
+            'coalesced_frames': self.coalesced_frames,
+            'dropped_samples': self.dropped_samples,
+            'last_latency_ms': self.last_latency * 1000.0,
+            'max_latency_ms': self.max_latency * 1000.0,
+        }
@@ -0,0 +1,84 @@
+import os
+import queue
+import threading
+from .ring_buffer import TelemetryBuffer
+from .session_file import encode_header, encode_chunk
+
+class SessionRecorder:
+    """Appends every acquired sample to a chunked binary session file (see session_file).
+
+    The engine thread only calls `poll`, which copies finished chunks out of the ring
+    buffer and hands them to a bounded queue without ever blocking. Encoding and disk I/O
+    happen on the recorder's own writer thread. If the writer can't keep up the chunk is
+    dropped and counted rather than stalling acquisition.
+    """
+
+    def __init__(self, path, buffer: TelemetryBuffer, metadata=None, chunk_size=1024, max_pending=64):
+        if chunk_size > buffer.capacity:
+            raise ValueError("chunk_size can't exceed the buffer capacity")
+        self.path = path
+        self.buffer = buffer
+        self.metadata = metadata or {}
+        self.chunk_size = chunk_size
+        # Columns the buffer has now; channels subscribed later go to the next recording
+        self.channels = list(buffer.channels)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._next_seq = buffer.count # record from the moment we were created
+        self._thread = None
+
+        self.samples_written = 0
+        self.dropped_chunks = 0
+        self.dropped_samples = 0
+        self.error = None
+
+    def start(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def poll(self):
+        """Engine thread: queue every full chunk acquired since the last call."""
+        while self.buffer.count - self._next_seq >= self.chunk_size:
+            self._submit(self._next_seq + self.chunk_size)
+
+    def stop(self):
+        """Flushes the partial last chunk and waits for the writer to finish."""
+        if self._thread is None:
+            return
+        if self.buffer.count > self._next_seq:
+            self._submit(self.buffer.count)
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _submit(self, end):
+        start = self._next_seq
+        self._next_seq = end
+        # Copy out of the ring now, the writer may only get to it after the buffer wrapped
+        columns = {name: self.buffer.window(name, start, end).copy() for name, _ in self.channels}
+        try:
+            self._queue.put_nowait(columns)
+        except queue.Full:
+            self.dropped_chunks += 1
+            self.dropped_samples += end - start
+
+    def _writer_loop(self):
+        try:
+            with open(self.path, 'wb') as f:
+                f.write(encode_header(self.channels, self.metadata))
+                while True:
+                    columns = self._queue.get()
+                    if columns is None:
+                        break
+                    f.write(encode_chunk(self.channels, columns))
+                    self.samples_written += len(columns['timestamp'])
+        except Exception as e:
+            # Disk errors, but also a chunk that fails to encode: either way the writer is done
+            print(f"Session recording to {self.path} failed: {e if isinstance(e, OSError) else f'{type(e).__name__}: {e}'}")
+            self.error = e
+            # Keep draining so the engine side never sees a full queue because of a dead writer,
+            # and stop() never blocks putting its end marker
+            while self._queue.get() is not None:
+                pass
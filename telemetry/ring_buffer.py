@@ -0,0 +1,176 @@
+import numpy as np
+from .adapters.base import TelemetryData
+
+# Column layout shared by the engine and every consumer: (name, dtype).
+# ENGINE_CHANNELS are filled by the engine, every other column maps 1:1 to a TelemetryData
+# field (not every field needs a column, e.g. best_lap_time is derived from the lap index).
+CHANNELS = (
+    ('timestamp', np.float64),
+    ('throttle', np.float32),
+    ('brake', np.float32),
+    ('clutch', np.float32),
+    ('rpm', np.float32),
+    ('speed_kph', np.float32),
+    ('steering_angle', np.float32),
+    ('gear', np.int8),
+    ('active', np.bool_),
+    ('lap', np.int16),
+    ('lap_dist_pct', np.float32),
+    ('last_lap_time', np.float32),
+    ('delta', np.float32), # seconds against the reference lap, NaN without one
+)
+ENGINE_CHANNELS = ('timestamp', 'delta')
+# Optional channels (telemetry.channels) are added per buffer with add_channel and filled
+# from TelemetryData.channels.
+
+# ~3 minutes at AC's native 333Hz physics rate
+DEFAULT_CAPACITY = 65536
+
+
+class TelemetryBuffer:
+    """Preallocated columnar ring buffer holding the recent telemetry history.
+
+    Each column is stored twice back to back (mirrored), so the newest ``n`` samples
+    are always one contiguous slice and reads never have to copy or concatenate.
+    Designed for a single writer (the engine thread) and any number of readers.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity * 2, dtype=dtype) for name, dtype in CHANNELS}
+        # Every column's (name, dtype), CHANNELS followed by the optional channels added so far
+        self.channels = list(CHANNELS)
+        self._bind_columns()
+        # Total number of samples ever written; also the sequence number of the next sample
+        self.count = 0
+
+    def _bind_columns(self):
+        # Precomputed (column, TelemetryData attribute) pairs for the hot append path
+        self._field_columns = [(self.columns[name], name) for name, _ in CHANNELS if name not in ENGINE_CHANNELS]
+        self._timestamps = self.columns['timestamp']
+        self._deltas = self.columns['delta']
+        self._extra_columns = [] # (column, channel name) of optional channels
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def add_channel(self, name: str, dtype=np.float32):
+        """Adds a column for optional channel `name`; samples without a value read as NaN.
+
+        Engine thread only. Existing columns are untouched and readers keep working:
+        every shared attribute is replaced in one assignment rather than mutated.
+        """
+        if name in self.columns:
+            return
+        column = np.full(self.capacity * 2, np.nan, dtype=dtype)
+        self.columns = {**self.columns, name: column}
+        self.channels = self.channels + [(name, dtype)]
+        self._extra_columns = self._extra_columns + [(column, name)]
+
+    def append(self, data: TelemetryData, timestamp: float, delta: float = np.nan):
+        i = self.count % self.capacity
+        j = i + self.capacity
+        self._timestamps[i] = timestamp
+        self._timestamps[j] = timestamp
+        self._deltas[i] = delta
+        self._deltas[j] = delta
+        for column, attr in self._field_columns:
+            value = getattr(data, attr)
+            column[i] = value
+            column[j] = value
+        if self._extra_columns:
+            channels = data.channels
+            for column, name in self._extra_columns:
+                value = channels.get(name, np.nan)
+                column[i] = value
+                column[j] = value
+        # Publish only after the sample is fully written so readers never see a half-written row
+        self.count += 1
+
+    def extend(self, columns: dict, n: int):
+        """Appends `n` samples given as whole columns (name -> array of n values).
+
+        For samples that arrive in batches (e.g. off the network). Columns missing from
+        `columns` read as zero, or NaN for optional channels, like a fresh buffer.
+        """
+        if n > self.capacity:
+            # Only the newest capacity samples would survive anyway
+            columns = {name: values[n - self.capacity:] for name, values in columns.items()}
+            self.count += n - self.capacity
+            n = self.capacity
+        capacity = self.capacity
+        i = self.count % capacity
+        first = min(n, capacity - i) # samples before the write wraps around
+        for index, (name, column) in enumerate(self.columns.items()):
+            values = columns.get(name)
+            if values is None:
+                values = np.zeros(n, column.dtype) if index < len(CHANNELS) else np.full(n, np.nan, column.dtype)
+            column[i:i + first] = values[:first]
+            column[i + capacity:i + capacity + first] = values[:first]
+            if first < n:
+                column[:n - first] = values[first:]
+                column[capacity:capacity + n - first] = values[first:]
+        self.count += n
+
+    def clear(self):
+        self.count = 0
+
+    def window(self, name: str, start: int, end: int) -> np.ndarray:
+        """Zero-copy view of samples with sequence numbers in [start, end).
+
+        The range is clamped to what is still held in the buffer. The returned view
+        aliases the ring storage and will be overwritten once the writer wraps around,
+        so copy it if it needs to outlive the current frame.
+        """
+        count = self.count
+        end = min(end, count)
+        start = max(start, count - self.capacity, 0)
+        if start >= end:
+            return self.columns[name][:0]
+        stop = (end - 1) % self.capacity + self.capacity + 1
+        return self.columns[name][stop - (end - start):stop]
+
+    def latest(self, name: str, n: int) -> np.ndarray:
+        """Zero-copy view of the newest ``n`` samples (fewer if not yet written), oldest first."""
+        count = self.count
+        return self.window(name, count - n, count)
+
+    def since(self, name: str, seq: int) -> np.ndarray:
+        """Zero-copy view of every sample written from sequence number ``seq`` onwards."""
+        return self.window(name, seq, self.count)
+
+    def sample(self, seq: int) -> TelemetryData:
+        """TelemetryData rebuilt from the stored sample `seq`, which must still be held."""
+        i = seq % self.capacity
+        data = TelemetryData(**{attr: column[i].item() for column, attr in self._field_columns})
+        data.channels = {name: self.columns[name][i].item() for name, _ in self.channels[len(CHANNELS):]}
+        return data
+
+    def last(self, name: str):
+        """Value of the newest sample, or None if the buffer is empty."""
+        if self.count == 0:
+            return None
+        return self.columns[name][(self.count - 1) % self.capacity]
+
+
+class TelemetryBatch:
+    """Samples acquired since the previous UI frame, as a [start, end) range of buffer sequence numbers.
+
+    `latest` is the newest TelemetryData (also set when the range is empty, e.g. while paused).
+    """
+
+    __slots__ = ('latest', 'start', 'end', 'buffer')
+
+    def __init__(self, latest: TelemetryData, start: int, end: int, buffer: TelemetryBuffer):
+        self.latest = latest
+        self.start = start
+        self.end = end
+        self.buffer = buffer
+
+    def __len__(self):
+        return self.end - self.start
+
+    def column(self, name: str) -> np.ndarray:
+        return self.buffer.window(name, self.start, self.end)
@@ -0,0 +1,95 @@
+import time
+from .instrumentation import TimingHistogram
+
+# What to do about ticks whose deadline passed while the previous one was still running
+SKIP = "skip" # run once, late, and continue at the next deadline still ahead
+CATCH_UP = "catch-up" # run the missed ticks back to back, up to max_catch_up of them
+POLICIES = (SKIP, CATCH_UP)
+
+class TickScheduler:
+    """Runs a loop on absolute deadlines of the monotonic perf_counter_ns clock.
+
+    Deadlines are start + k * interval, so time spent working never shifts the cadence
+    and the rate doesn't drift, whatever the wall clock does. `wait` sleeps until the next
+    deadline; since sleeps tend to overshoot by up to a scheduler quantum, it can sleep
+    only until `spin_ns` before the deadline and busy-wait the rest, trading CPU for
+    precision. Missed deadlines are handled by `policy` (SKIP or CATCH_UP).
+
+    How late each tick started is kept in `lateness`, and `skipped` counts the ticks
+    dropped by the policy.
+    """
+
+    def __init__(self, rate_hz, policy=SKIP, spin_ns=0, max_catch_up=4):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown tick policy '{policy}', expected one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self.spin_ns = spin_ns
+        self.max_catch_up = max_catch_up
+        self.lateness = TimingHistogram()
+        self.skipped = 0
+        self.rate_hz = None
+        self.interval_ns = None
+        self._deadline = None
+        self.set_rate(rate_hz)
+
+    def set_rate(self, rate_hz):
+        """Changes the rate from the next deadline on; cheap to call every tick with the same rate.
+
+        math.inf runs the loop unpaced: `wait` returns right away.
+        """
+        if rate_hz == self.rate_hz:
+            return
+        interval_ns = round(1e9 / rate_hz)
+        if not interval_ns or not self.interval_ns:
+            # Into or out of unpaced mode: a new grid starts at the next wait
+            self._deadline = None
+        elif self._deadline is not None:
+            # Keep the pending deadline's base, only the spacing changes
+            self._deadline += interval_ns - self.interval_ns
+        self.rate_hz = rate_hz
+        self.interval_ns = interval_ns
+
+    def reset(self):
+        """Starts a new grid at the next `wait` (e.g. after a pause) and clears the statistics."""
+        self._deadline = None
+        self.lateness.reset()
+        self.skipped = 0
+
+    def wait(self):
+        """Blocks until the next tick is due."""
+        if not self.interval_ns:
+            return
+        now = time.perf_counter_ns()
+        deadline = self._deadline
+        if deadline is None:
+            # First tick runs right away
+            self._deadline = now + self.interval_ns
+            return
+
+        remaining = deadline - now
+        if remaining > 0:
+            sleep_ns = remaining - self.spin_ns
+            if sleep_ns > 0:
+                time.sleep(sleep_ns / 1e9)
+            if self.spin_ns:
+                while time.perf_counter_ns() < deadline:
+                    pass
+            now = time.perf_counter_ns()
+        self.lateness.record(now - deadline)
+
+        interval = self.interval_ns
+        deadline += interval
+        if deadline <= now:
+            # Already due again: the loop is running behind
+            behind = (now - deadline) // interval + 1
+            if self.policy == CATCH_UP and behind <= self.max_catch_up:
+                pass # keep the deadline, the next ticks run back to back
+            else:
+                deadline += behind * interval
+                self.skipped += behind
+        self._deadline = deadline
+
+    def stats(self) -> dict:
+        stats = self.lateness.stats()
+        stats.update(rate_hz=self.rate_hz, policy=self.policy, spin_us=self.spin_ns / 1000.0, skipped=self.skipped)
+        return stats
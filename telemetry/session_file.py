@@ -0,0 +1,183 @@
+import json
+import mmap
+import struct
+import numpy as np
+
+# Recorded session layout (all little-endian):
+#
+#   file header   b'SRTL' | uint16 version | uint32 header length | header JSON (utf-8)
+#   chunk         b'CHNK' | uint32 sample count n | one column per channel, in header order
+#
+# Each column is n raw values of the channel's dtype, zero-padded to a multiple of 8 bytes
+# so every column starts aligned and can be mapped straight into a NumPy array.
+# The header JSON holds {"channels": [[name, dtype], ...], "metadata": {...}}.
+
+MAGIC = b'SRTL'
+CHUNK_MAGIC = b'CHNK'
+VERSION = 1
+FILE_EXTENSION = '.srtl'
+
+_FILE_HEADER = struct.Struct('<4sHI')
+_CHUNK_HEADER = struct.Struct('<4sI')
+_ALIGN = 8
+
+def _padding(nbytes):
+    return -nbytes % _ALIGN
+
+def encode_header(channels, metadata) -> bytes:
+    header = json.dumps({
+        'channels': [[name, np.dtype(dtype).newbyteorder('<').str] for name, dtype in channels],
+        'metadata': metadata,
+    }).encode('utf-8')
+    header += b' ' * _padding(_FILE_HEADER.size + len(header))
+    return _FILE_HEADER.pack(MAGIC, VERSION, len(header)) + header
+
+def encode_chunk(channels, columns) -> bytes:
+    """Encodes one chunk; `columns` maps channel name to an equally long array."""
+    n = len(columns[channels[0][0]])
+    parts = [_CHUNK_HEADER.pack(CHUNK_MAGIC, n)]
+    for name, dtype in channels:
+        raw = np.ascontiguousarray(columns[name], dtype=np.dtype(dtype).newbyteorder('<')).tobytes()
+        parts.append(raw)
+        parts.append(b'\0' * _padding(len(raw)))
+    return b''.join(parts)
+
+class SessionReader:
+    """Memory-maps a recorded session file.
+
+    Nothing is decoded up front: opening only walks the chunk headers, and `chunk`
+    returns zero-copy NumPy views straight into the mapping. A chunk cut short by a
+    crash while recording is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty, not a session file")
+
+        if len(self._mm) < _FILE_HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is too short to be a session file")
+        magic, version, header_len = _FILE_HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a session file")
+        if version > VERSION:
+            self.close()
+            raise ValueError(f"{path} uses session format v{version}, newer than supported v{VERSION}")
+        try:
+            header = json.loads(bytes(self._mm[_FILE_HEADER.size:_FILE_HEADER.size + header_len]))
+            self.channels = [(name, np.dtype(dtype)) for name, dtype in header['channels']]
+            self.metadata = header['metadata']
+            if not isinstance(self.metadata, dict):
+                raise TypeError("metadata is not an object")
+        except (ValueError, TypeError, KeyError) as e:
+            # Truncated or hand-edited header: not valid JSON, or missing what a recorder writes
+            self.close()
+            raise ValueError(f"{path} has a damaged header ({type(e).__name__}: {e})") from None
+
+        # (first sample number, sample count, file offset of the first column)
+        self.chunks = []
+        self._index_chunks(_FILE_HEADER.size + header_len)
+        self.chunk_starts = np.array([c[0] for c in self.chunks], dtype=np.int64)
+        self.num_samples = self.chunks[-1][0] + self.chunks[-1][1] if self.chunks else 0
+        self._released = 0 # mapping offset below which pages were released, see iter_blocks
+
+    def _index_chunks(self, pos):
+        # Headers are read from the file, not the mapping: touching the mapping would map
+        # the pages around every header, i.e. most of the file, before anything is read
+        size = len(self._mm)
+        first = 0
+        while pos + _CHUNK_HEADER.size <= size:
+            self._file.seek(pos)
+            magic, n = _CHUNK_HEADER.unpack(self._file.read(_CHUNK_HEADER.size))
+            if magic != CHUNK_MAGIC:
+                break
+            data_pos = pos + _CHUNK_HEADER.size
+            end = data_pos + sum(n * dtype.itemsize + _padding(n * dtype.itemsize) for _, dtype in self.channels)
+            if end > size:
+                break # partially written
+            self.chunks.append((first, n, data_pos))
+            first += n
+            pos = end
+
+    @property
+    def channel_names(self):
+        return [name for name, _ in self.channels]
+
+    def chunk(self, index, channels=None) -> dict:
+        """Zero-copy column views of one chunk, optionally restricted to `channels`."""
+        _, n, pos = self.chunks[index]
+        wanted = set(channels) if channels is not None else None
+        columns = {}
+        for name, dtype in self.channels:
+            nbytes = n * dtype.itemsize
+            if wanted is None or name in wanted:
+                columns[name] = np.frombuffer(self._mm, dtype=dtype, count=n, offset=pos)
+            pos += nbytes + _padding(nbytes)
+        return columns
+
+    def iter_chunks(self, channels=None):
+        for i in range(len(self.chunks)):
+            yield self.chunk(i, channels)
+
+    def iter_blocks(self, size, channels=None, start=0, stop=None):
+        """(first sample number, columns) of consecutive blocks of up to `size` samples of [start, stop).
+
+        Blocks are cut independently of the recorded chunks: one inside a chunk is made of
+        views, one spanning chunks is copied. Either way memory use is bounded by `size`,
+        however long the session is.
+        """
+        names = list(channels) if channels is not None else self.channel_names
+        stop = self.num_samples if stop is None else min(stop, self.num_samples)
+        for first in range(max(0, start), stop, size):
+            last = min(first + size, stop)
+            yield first, {name: self.read(name, first, last) for name in names}
+            self._release_before(last)
+
+    def _release_before(self, sample):
+        # Pages read once stay resident and count towards the process' memory; let the OS
+        # drop those of the chunks wholly before `sample`. Reading them again faults them
+        # back in from the file. Not available on Windows, where this does nothing.
+        if not hasattr(mmap, 'MADV_DONTNEED') or not self.chunks:
+            return
+        end = self.chunks[self.chunk_of(sample)][2] // mmap.PAGESIZE * mmap.PAGESIZE
+        if end > self._released:
+            self._mm.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+            self._released = end
+
+    def read(self, name, start, stop) -> np.ndarray:
+        """Samples [start, stop) of one channel; a view if they sit in one chunk, else a copy."""
+        start = max(0, start)
+        stop = min(stop, self.num_samples)
+        if start >= stop:
+            return np.empty(0, dtype=dict(self.channels)[name])
+        first_chunk, last_chunk = self.chunk_of(start), self.chunk_of(stop - 1)
+        parts = []
+        for i in range(first_chunk, last_chunk + 1):
+            first, n, _ = self.chunks[i]
+            column = self.chunk(i, [name])[name]
+            parts.append(column[max(0, start - first):min(n, stop - first)])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def chunk_of(self, sample) -> int:
+        """Index of the chunk holding sample number `sample`."""
+        return int(np.searchsorted(self.chunk_starts, sample, side='right')) - 1
+
+    def close(self):
+        # Views handed out keep the mapping alive, in which case we leave it to the GC
+        try:
+            self._mm.close()
+        except (BufferError, AttributeError):
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
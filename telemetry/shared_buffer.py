@@ -0,0 +1,163 @@
+import os
+import json
+import numpy as np
+from multiprocessing import shared_memory
+from .ring_buffer import TelemetryBuffer, CHANNELS, DEFAULT_CAPACITY
+
+# Shared segment layout:
+#
+#   header    fixed fields below, count is the only one written per sample
+#   layout    JSON {"channels": [[name, dtype], ...]} listing every column, in order
+#   columns   one mirrored column (capacity * 2 values) per channel, 8-byte aligned
+#
+# Status fields let other processes follow the writer without asking it: the adapter
+# feeding it, the governor state, whether it records, and where its control socket is.
+MAGIC = b'SRTLRING'
+_HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('layout_size', '<i8'),
+    ('capacity', '<i8'),
+    ('count', '<i8'),
+    ('pid', '<i8'),
+    ('recording', '<i8'),
+    ('governor', 'S16'),
+    ('adapter', 'S64'),
+    ('control', 'S256'), # multiprocessing.connection address
+    ('authkey', 'S64'), # hex
+])
+_ALIGN = 8
+
+def _aligned(n):
+    return n + (-n % _ALIGN)
+
+class SharedTelemetryBuffer(TelemetryBuffer):
+    """TelemetryBuffer in a named shared memory segment, readable from other processes.
+
+    One process `create`s it and is the only writer; any number of processes `attach`
+    and read it exactly like a local buffer (zero-copy windows, `last`, `sample`). The
+    writer publishes a sample by bumping `count` after the row is written, the same
+    single-writer ordering the in-process buffer relies on, so no locks are involved.
+
+    The segment can't grow, so `create` reserves a column for every optional channel that
+    may be subscribed later; `add_channel` starts filling a reserved column.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner
+        self._header = np.ndarray((), dtype=_HEADER, buffer=shm.buf)
+        if self._header['magic'].item() != MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a telemetry buffer")
+        self._count = self._header['count'] # 0-d view, reads and writes go to the segment
+        self.capacity = int(self._header['capacity'])
+
+        layout_size = int(self._header['layout_size'])
+        layout = json.loads(bytes(shm.buf[_HEADER.itemsize:_HEADER.itemsize + layout_size]).decode('utf-8'))
+        self.columns = {}
+        offset = _aligned(_HEADER.itemsize + layout_size)
+        for name, dtype in layout['channels']:
+            dtype = np.dtype(dtype)
+            self.columns[name] = np.ndarray(self.capacity * 2, dtype=dtype, buffer=shm.buf, offset=offset)
+            offset += _aligned(self.capacity * 2 * dtype.itemsize)
+
+        base = [name for name, _ in CHANNELS]
+        if owner:
+            # Reserved columns join `channels` (and recordings) once subscribed
+            self.channels = list(CHANNELS)
+        else:
+            self.channels = list(CHANNELS) + [
+                (name, column.dtype.type) for name, column in self.columns.items() if name not in base
+            ]
+        self._bind_columns()
+
+    @classmethod
+    def create(cls, name, extra_channels=(), capacity=DEFAULT_CAPACITY):
+        """New segment `name` with CHANNELS and a reserved column per (name, dtype) in `extra_channels`."""
+        channels = list(CHANNELS) + [(n, d) for n, d in extra_channels if n not in dict(CHANNELS)]
+        layout = json.dumps({
+            'channels': [[n, np.dtype(d).newbyteorder('<').str] for n, d in channels],
+        }).encode('utf-8')
+        size = _aligned(_HEADER.itemsize + len(layout))
+        size += sum(_aligned(capacity * 2 * np.dtype(d).itemsize) for _, d in channels)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=_HEADER, buffer=shm.buf)
+        header['layout_size'] = len(layout)
+        header['capacity'] = capacity
+        header['count'] = 0
+        header['pid'] = os.getpid()
+        shm.buf[_HEADER.itemsize:_HEADER.itemsize + len(layout)] = layout
+        header['magic'] = MAGIC # last, a half-initialised segment is never taken for a valid one
+        del header
+
+        buffer = cls(shm, owner=True)
+        # Optional channels read as NaN until subscribed, like in TelemetryBuffer.add_channel
+        for column_name, _ in channels[len(CHANNELS):]:
+            buffer.columns[column_name].fill(np.nan)
+        return buffer
+
+    @classmethod
+    def attach(cls, name):
+        """Reader side; raises FileNotFoundError if no process created `name`."""
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            # Before Python 3.13 attaching registers the segment with this process's
+            # resource tracker, which would unlink it when we exit; it isn't ours to remove
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    @property
+    def count(self):
+        return int(self._count)
+
+    @count.setter
+    def count(self, value):
+        self._count[...] = value
+
+    def add_channel(self, name: str, dtype=np.float32):
+        if any(name == existing for existing, _ in self.channels):
+            return
+        column = self.columns.get(name)
+        if column is None:
+            print(f"Channel '{name}' has no column in shared buffer '{self.name}', it won't be stored")
+            return
+        self.channels = self.channels + [(name, column.dtype.type)]
+        self._extra_columns = self._extra_columns + [(column, name)]
+
+    def status(self) -> dict:
+        header = self._header
+        text = lambda key: header[key].item().decode('utf-8', 'replace')
+        return {
+            'pid': int(header['pid']),
+            'adapter': text('adapter'),
+            'governor': text('governor'),
+            'recording': bool(header['recording']),
+            'control': text('control'),
+            'authkey': text('authkey'), # hex
+        }
+
+    def set_status(self, **fields):
+        """Writer side: updates status fields (adapter, governor, recording, control, authkey)."""
+        for key, value in fields.items():
+            if isinstance(value, str):
+                value = value.encode('utf-8')[:_HEADER[key].itemsize]
+            self._header[key] = value
+
+    def close(self):
+        """Releases this process's mapping; the owner also removes the segment."""
+        shm = self.shm
+        # Views into the segment have to go before the mapping can be closed
+        self.columns = {}
+        self._field_columns = self._extra_columns = []
+        self._timestamps = self._deltas = self._count = self._header = None
+        try:
+            shm.close()
+        except BufferError:
+            pass # a reader still holds a view; the mapping goes away with the process
+        if self.owner:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
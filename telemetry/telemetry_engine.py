@@ -1,26 +1,93 @@
+import os
+import math
 import time
+import socket
 import threading
 from PySide6.QtCore import QObject, Signal
 from .adapters.base import GameAdapter, TelemetryData
-from .adapters.mock import MockAdapter
-from .adapters.iracing import IRacingAdapter
-from .adapters.assetto_corsa import AssettoCorsaAdapter
+from .adapters.registry import default_registry, FALLBACK_ADAPTER
+from .ring_buffer import TelemetryBuffer
+from .mailbox import FrameMailbox
+from .recorder import SessionRecorder
+from .session_file import FILE_EXTENSION
+from .discovery import AdapterDiscovery
+from .governor import RateGovernor, ACTIVE
+from .laps import LapIndex
+from .delta import DeltaTracker
+from .channels import default_channels
+from .broadcast import TelemetryBroadcaster
+from .scheduler import TickScheduler, SKIP
+from .instrumentation import probes
 
 class TelemetryEngine(QObject):
-    data_updated = Signal(object) # Emits TelemetryData
+    adapter_changed = Signal(str) # Name of the adapter now feeding the engine
+    governor_changed = Signal(str) # Governor state, see telemetry.governor
 
-    def __init__(self):
+    # Sims with a frame counter are polled faster than they publish, so phase drift
+    # between our loop and theirs never costs a sample; duplicates are dropped by frame_id.
+    POLL_OVERSAMPLE = 2
+    DEFAULT_POLL_HZ = 60.0
+    # Seconds car positions keep being read after the last car_positions() call
+    CARS_HOLD = 1.0
+
+    def __init__(self, acquisition_hz=None, ui_hz=60.0, registry=None, channels=None, buffer=None,
+                 tick_policy=SKIP, spin_us=0):
         super().__init__()
-        # Initialize adapters list
-        self.mock_adapter = MockAdapter()
-        self.iracing_adapter = IRacingAdapter()
-        self.ac_adapter = AssettoCorsaAdapter()
+        # None = acquire as fast as the active sim publishes
+        self.acquisition_hz = acquisition_hz
+        # Rate at which frames are posted to the UI, independent of acquisition.
+        # OverlayWindow sets it to the display refresh rate.
+        self.ui_hz = ui_hz
+
+        # Adapters are imported and constructed lazily through the registry;
+        # only Mock is created up front since it is the fallback.
+        self.registry = registry or default_registry()
+        self.mock_adapter = self.registry.create(FALLBACK_ADAPTER)
         
-        # Default to Mock, but we can have a logic to auto-switch
-        # For this stage, let's use a simple strategy:
-        # If iRacing is connected (startup returns true), use it.
-        # Otherwise use Mock.
-        self.adapter: GameAdapter = self.iracing_adapter 
+        # Sims are detected in the background, in registry priority order (iRacing, then AC).
+        # The hot loop only ever reads the connected one, or Mock while nothing is found.
+        self.discovery = AdapterDiscovery(self.registry.autodetect_specs(), self._on_adapter_found)
+        self.active_adapter = None
+
+        # Adapter that produced the latest sample
+        self.adapter: GameAdapter = self.mock_adapter
+        # Adapter forced via set_adapter (e.g. a replay), bypasses auto-detection
+        self.pinned_adapter = None
+
+        # Central history store; widgets read zero-copy slices from it.
+        # A SharedTelemetryBuffer makes it readable from other processes (see telemetry.acquisition).
+        self.buffer = buffer if buffer is not None else TelemetryBuffer()
+        # Lap number -> sample range in the buffer, updated as samples are stored
+        self.laps = LapIndex()
+        # Live delta against the best lap so far (or a loaded one), stored in the 'delta' channel
+        self.delta = DeltaTracker(self.laps)
+        # Frames for the GUI thread; it drains them on its own timer
+        self.mailbox = FrameMailbox(self.buffer)
+        # Lowers acquisition and UI rates while the car is inactive or the data is frozen
+        self.governor = RateGovernor()
+        # Paces the loop on absolute deadlines and keeps the tick lateness histogram
+        self.scheduler = TickScheduler(self.DEFAULT_POLL_HZ, tick_policy, spin_us * 1000)
+        probes.register("engine.tick_lateness", self.scheduler.lateness)
+
+        # Optional channels; adapters decode the union of what consumers subscribed to
+        self.channels = channels or default_channels()
+        self._channels_version = None
+        self._subscribed = []
+        self._adapter_channels = {} # adapter -> channels version it was configured for
+
+        self._last_adapter = None
+        self._last_frame_id = None
+
+        # Optional recorder stage, see start_recording
+        self.recorder = None
+        self._recorder_lock = threading.Lock()
+        # Optional network stage, see start_broadcast
+        self.broadcaster = None
+        # Identifies this rig's streams, e.g. on an aggregation server
+        self.rig_name = socket.gethostname()
+        # Every car's position (CarPositions), refreshed at display rate while someone asks
+        self.cars = None
+        self._cars_wanted_until = 0.0
 
         self.running = False
         self._thread = None
@@ -29,50 +96,233 @@ class TelemetryEngine(QObject):
         if self.running:
             return
         self.running = True
+        self.scheduler.reset()
+        self.discovery.start()
         self._thread = threading.Thread(target=self._pollen_loop, daemon=True)
         self._thread.start()
 
     def stop(self):
         self.running = False
+        self.discovery.stop()
         if self._thread:
             self._thread.join()
+        self.stop_recording()
+        self.stop_broadcast()
+
+    def detection_state(self) -> dict:
+        """Which adapter is feeding the engine and what discovery knows about each sim."""
+        state = self.discovery.state()
+        state['source'] = self.adapter.name
+        state['pinned'] = self.pinned_adapter is not None
+        return state
+
+    def rates(self) -> dict:
+        """Governor state with the target and measured acquisition/UI rates."""
+        state = self.governor.stats()
+        state['target_acquisition_hz'] = self.governor.acquisition_rate(self.poll_rate(self.adapter))
+        state['target_ui_hz'] = self.governor.ui_rate(self.ui_hz)
+        state['ticks'] = self.scheduler.stats()
+        return state
+
+    def timings(self) -> dict:
+        """Per stage timing stats of this process (see telemetry.instrumentation)."""
+        return probes.stats()
+
+    def _on_adapter_found(self, adapter):
+        # Discovery thread; the hot loop picks this up on its next tick
+        self.active_adapter = adapter
+        self.adapter_changed.emit(adapter.name if adapter else (self.pinned_adapter or self.mock_adapter).name)
+
+    def start_recording(self, path=None, directory="recordings") -> SessionRecorder:
+        """Starts recording every acquired sample to a session file, returns the recorder."""
+        self.stop_recording()
+        adapter = self.adapter
+        if path is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(directory, f"{stamp}_{adapter.name.replace(' ', '_')}{FILE_EXTENSION}")
+        metadata = {
+            'adapter': adapter.name,
+            'native_rate_hz': adapter.native_rate_hz,
+            'started_at': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            # Sample timestamps are perf_counter() values; this anchors them to wall time
+            'started_at_unix': time.time(),
+            'started_at_timestamp': time.perf_counter(),
+        }
+        metadata.update(adapter.session_info())
+        recorder = SessionRecorder(path, self.buffer, metadata)
+        recorder.start()
+        with self._recorder_lock:
+            self.recorder = recorder
+        return recorder
+
+    def stop_recording(self):
+        with self._recorder_lock:
+            recorder, self.recorder = self.recorder, None
+        if recorder:
+            recorder.stop()
+        return recorder
+
+    def start_broadcast(self, **options) -> TelemetryBroadcaster:
+        """Streams the buffer to network consumers, see TelemetryBroadcaster for `options`."""
+        self.stop_broadcast()
+        broadcaster = TelemetryBroadcaster(self.buffer, self.channels, metadata=self._stream_metadata, **options)
+        broadcaster.start()
+        self.broadcaster = broadcaster
+        return broadcaster
+
+    def stop_broadcast(self):
+        broadcaster, self.broadcaster = self.broadcaster, None
+        if broadcaster:
+            broadcaster.stop()
+        return broadcaster
+
+    def _stream_metadata(self) -> dict:
+        # Sent with every stream layout; called from the broadcaster's thread
+        return {
+            'adapter': self.adapter.name,
+            'native_rate_hz': self.adapter.native_rate_hz,
+            'rig': self.rig_name,
+            # Sample timestamps are perf_counter() values; this anchors them to wall time
+            'unix_time': time.time(),
+            'timestamp': time.perf_counter(),
+        }
+
+    def car_positions(self):
+        """Latest CarPositions of the active source, None if it has none.
+
+        Asking keeps them refreshed for CARS_HOLD seconds; while nobody asks they're not read.
+        """
+        self._cars_wanted_until = time.perf_counter() + self.CARS_HOLD
+        return self.cars
+
+    def session_info(self) -> dict:
+        """Session metadata (track, car...) of the active source."""
+        return self.adapter.session_info()
 
     def set_adapter(self, adapter: GameAdapter):
-        self.adapter = adapter
+        """Uses `adapter` exclusively instead of auto-detecting; None goes back to auto-detection."""
+        self.pinned_adapter = adapter
+        # Discovery keeps (re)connecting it, with backoff, instead of every adapter
+        self.discovery.pin(adapter)
+        if adapter is not None:
+            self.adapter = adapter
+
+    def poll_rate(self, adapter: GameAdapter) -> float:
+        """Acquisition rate for `adapter`: the configured rate, capped by what the sim can deliver.
+
+        An adapter with frame ids but no native rate (a replay at max speed) hands out a new
+        sample on every poll, so it is polled as fast as the loop runs: math.inf.
+        """
+        limit = adapter.native_rate_hz
+        if adapter.frame_id is not None:
+            limit = math.inf if limit is None else limit * self.POLL_OVERSAMPLE
+        if self.acquisition_hz is None:
+            return limit or self.DEFAULT_POLL_HZ
+        return min(self.acquisition_hz, limit) if limit else self.acquisition_hz
+
+    def _sync_channels(self):
+        # Subscriptions changed: make room in the buffer before any adapter decodes into it
+        version = self.channels.version
+        if version == self._channels_version:
+            return
+        self._subscribed = self.channels.subscribed()
+        for channel in self._subscribed:
+            self.buffer.add_channel(channel.name, channel.dtype)
+        self._channels_version = version
+
+    def _update(self, adapter: GameAdapter) -> TelemetryData:
+        if self._adapter_channels.get(adapter) != self._channels_version:
+            adapter.set_channels(self._subscribed)
+            self._adapter_channels[adapter] = self._channels_version
+        return adapter.update()
+
+    def _read_active_adapter(self):
+        self._sync_channels()
+        pinned = self.pinned_adapter
+        if pinned is not None:
+            return pinned, self._update(pinned)
+
+        # Read the adapter discovery picked, as long as it is still connected.
+        # A lost connection falls back right away; discovery notices and rescans.
+        active = self.active_adapter
+        if active is not None and active.connected:
+            return active, self._update(active)
+
+        # Fallback to Mock so we have visuals
+        return self.mock_adapter, self._update(self.mock_adapter)
+
+    def _store(self, adapter: GameAdapter, data: TelemetryData) -> bool:
+        # Only append samples the sim hasn't already given us
+        frame_id = adapter.frame_id
+        if frame_id is not None and adapter is self._last_adapter and frame_id == self._last_frame_id:
+            return False
+        if adapter is not self._last_adapter:
+            self.laps.reset() # another source counts its own laps
+            self.delta.reset()
+        self._last_adapter = adapter
+        self._last_frame_id = frame_id
+        timestamp = time.perf_counter()
+        # Laps and the delta run on the sample's own clock when it has one: a replay at
+        # --speed N or --max-speed is timed, and compared to a recorded reference, in session time
+        session_time = adapter.sample_time
+        if session_time is None:
+            session_time = timestamp
+        # The sample about to be appended gets sequence number buffer.count
+        self.laps.observe(self.buffer.count, session_time, data.lap, data.last_lap_time)
+        delta = self.delta.update(session_time, data.lap_dist_pct)
+        self.buffer.append(data, timestamp, delta)
+        return True
 
     def _pollen_loop(self):
-        while self.running:
-            # Poll at 60Hz
-            start_time = time.time()
-            
-            data = None
-            
-            # Auto-detection logic
-            
-            # 1. Check iRacing
-            if not self.iracing_adapter.connected:
-                # Try to connect
-                self.iracing_adapter.update() 
-            
-            if self.iracing_adapter.connected:
-                data = self.iracing_adapter.update()
-            
-            # 2. Check Assetto Corsa (if iRacing not active)
-            if not data:
-                if not self.ac_adapter.connected:
-                    self.ac_adapter.update() # Try connect
-                
-                if self.ac_adapter.connected:
-                    data = self.ac_adapter.update()
-
-            # 3. Fallback to Mock
-            if not data:
-                # Fallback to Mock so we have visuals
-                data = self.mock_adapter.update()
+        next_ui = time.perf_counter()
+        latest = None
 
+        scheduler = self.scheduler
+        # Stage timings, see telemetry.instrumentation
+        clock = time.perf_counter_ns
+        update_probe = probes.stage("adapter.update")
+        store_probe = probes.stage("engine.store")
+        record_probe = probes.stage("engine.record")
+        emit_probe = probes.stage("engine.emit")
+        while self.running:
+            t0 = clock()
+            adapter, data = self._read_active_adapter()
+            t1 = clock()
+            update_probe.record(t1 - t0)
+            changed = False
             if data:
-                self.data_updated.emit(data)
+                self.adapter = adapter
+                changed = self._store(adapter, data)
+                store_probe.record(clock() - t1)
+                if changed and adapter.frame_id is None:
+                    changed = data != latest
+                latest = data
+
+            # Mock standing in for a missing sim counts as inactive, a pinned Mock doesn't
+            active = bool(data and data.active) and (adapter is not self.mock_adapter or self.pinned_adapter is not None)
+            if self.governor.observe(time.perf_counter(), active, changed):
+                self.governor_changed.emit(self.governor.state)
+                if self.governor.state == ACTIVE:
+                    next_ui = 0.0 # show the car coming back right away
+
+            if self.recorder:
+                t0 = clock()
+                with self._recorder_lock:
+                    if self.recorder:
+                        self.recorder.poll()
+                record_probe.record(clock() - t0)
+
+            # Post a frame at display rate; the GUI takes everything acquired since its last frame
+            now = time.perf_counter()
+            if latest and now >= next_ui:
+                t0 = clock()
+                if now < self._cars_wanted_until:
+                    self.cars = self.adapter.car_positions()
+                self.mailbox.post(latest, self.buffer.count)
+                emit_probe.record(clock() - t0)
+                self.governor.posted()
+                # Don't try to make up for frames missed while we were busy
+                next_ui = max(next_ui + 1.0 / self.governor.ui_rate(self.ui_hz), now)
 
-            elapsed = time.time() - start_time
-            sleep_time = max(0, (1.0 / 60.0) - elapsed)
-            time.sleep(sleep_time)
+            scheduler.set_rate(self.governor.acquisition_rate(self.poll_rate(self.adapter)))
+            scheduler.wait()
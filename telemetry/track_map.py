@@ -0,0 +1,216 @@
+import os
+import re
+import numpy as np
+
+# Points in a learned outline, by lap distance (a few meters apart on most tracks)
+OUTLINE_POINTS = 1024
+# Share of the outline that needs samples before it is shown
+MIN_COVERAGE = 0.9
+# Samples below this speed (pits, grid, spins) don't teach the outline anything
+MIN_SPEED_KPH = 20.0
+# Learned outlines, one file per track and layout
+TRACK_MAP_DIR = "track_maps"
+
+class TrackOutline:
+    """Track centre line learned from driven laps: OUTLINE_POINTS world (x, z) positions by lap distance.
+
+    Samples are summed into lap distance bins, so every lap refines the average line and
+    a partial lap already teaches the part it covered. `points` is rebuilt only when
+    `publish` is called (the learner does it once per lap), so consumers can cache
+    anything derived from it until `version` changes.
+    """
+
+    def __init__(self, size=OUTLINE_POINTS):
+        self.size = size
+        self.sums = np.zeros((size, 2))
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.points = None # (size, 2) float64 once published with enough coverage
+        self.version = 0
+
+    @property
+    def coverage(self) -> float:
+        return np.count_nonzero(self.counts) / self.size
+
+    def add(self, x, z, lap_dist_pct):
+        bins = np.clip((lap_dist_pct * self.size).astype(np.intp), 0, self.size - 1)
+        self.sums[:, 0] += np.bincount(bins, weights=x, minlength=self.size)
+        self.sums[:, 1] += np.bincount(bins, weights=z, minlength=self.size)
+        self.counts += np.bincount(bins, minlength=self.size)
+
+    def publish(self) -> bool:
+        """Rebuilds `points` from the samples so far; False while coverage is too low."""
+        if self.coverage < MIN_COVERAGE:
+            return False
+        filled = self.counts > 0
+        index = np.arange(self.size)
+        points = np.empty((self.size, 2))
+        for axis in range(2):
+            mean = self.sums[filled, axis] / self.counts[filled]
+            # Bins nobody drove through yet are interpolated around the lap
+            points[:, axis] = np.interp(index, index[filled], mean, period=self.size)
+        self.points = points
+        self.version += 1
+        return True
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, sums=self.sums, counts=self.counts)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            outline = cls(len(data['counts']))
+            outline.sums = data['sums'].astype(np.float64)
+            outline.counts = data['counts'].astype(np.int64)
+        outline.publish()
+        return outline
+
+class SpatialGrid:
+    """Uniform grid over a closed outline, for mapping many world positions to lap distance at once.
+
+    Every cell lists the outline segments within one cell of it, so the nearest segment
+    to a point near the track is always among its cell's candidates; `locate` projects a
+    whole batch of points onto their candidates with array operations and no Python loop
+    over points. Points further away than that fall back to checking every segment.
+    """
+    CELLS = 64 # along the longer side of the track
+
+    def __init__(self, points):
+        self.points = points
+        n = len(points)
+        self.size = n
+        self._starts = points
+        self._vectors = np.roll(points, -1, axis=0) - points
+        self._lengths2 = np.maximum((self._vectors ** 2).sum(axis=1), 1e-12)
+
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        self.cell = max(float((hi - lo).max()) / self.CELLS, 1e-6)
+        self.origin = lo - self.cell
+        self.shape = tuple(int(v) for v in np.ceil((hi - lo) / self.cell).astype(int) + 3)
+
+        # Each segment goes into the cells its bounding box covers, grown by one cell
+        ends = np.roll(points, -1, axis=0)
+        first = np.floor((np.minimum(points, ends) - self.origin) / self.cell).astype(int) - 1
+        last = np.floor((np.maximum(points, ends) - self.origin) / self.cell).astype(int) + 1
+        cells = [[] for _ in range(self.shape[0] * self.shape[1])]
+        for segment in range(n):
+            (x0, y0), (x1, y1) = np.clip(first[segment], 0, None), np.minimum(last[segment], np.array(self.shape) - 1)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cells[cx * self.shape[1] + cy].append(segment)
+        width = max(1, max(len(candidates) for candidates in cells))
+        self._candidates = np.full((len(cells), width), -1, dtype=np.intp)
+        for i, candidates in enumerate(cells):
+            self._candidates[i, :len(candidates)] = candidates
+
+    def locate(self, positions):
+        """(lap distance, snapped (x, z), distance off the line in m) of an (m, 2) array of world positions."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        cell = np.floor((positions - self.origin) / self.cell).astype(int)
+        cell = np.clip(cell, 0, np.array(self.shape) - 1)
+        candidates = self._candidates[cell[:, 0] * self.shape[1] + cell[:, 1]] # (m, k)
+        segment, t, distance2 = self._project(positions[:, None, :], candidates)
+
+        # Far off the track: no candidates in the cell, check every segment
+        far = np.flatnonzero(np.isinf(distance2))
+        if len(far):
+            everything = np.broadcast_to(np.arange(self.size), (len(far), self.size))
+            segment[far], t[far], distance2[far] = self._project(positions[far, None, :], everything)
+
+        snapped = self._starts[segment] + t[:, None] * self._vectors[segment]
+        # Outline point i sits at the centre of lap distance bin i
+        lap_distance = ((segment + 0.5 + t) / self.size) % 1.0
+        return lap_distance, snapped, np.sqrt(distance2)
+
+    def _project(self, positions, candidates):
+        # Closest point on each candidate segment, then the best candidate per position
+        valid = candidates >= 0
+        segments = np.where(valid, candidates, 0)
+        relative = positions - self._starts[segments]
+        vectors = self._vectors[segments]
+        t = np.clip((relative * vectors).sum(axis=2) / self._lengths2[segments], 0.0, 1.0)
+        distance2 = ((relative - t[..., None] * vectors) ** 2).sum(axis=2)
+        distance2[~valid] = np.inf
+        best = np.argmin(distance2, axis=1)
+        rows = np.arange(len(best))
+        return segments[rows, best], t[rows, best], distance2[rows, best]
+
+def outline_path(track, configuration=None, directory=TRACK_MAP_DIR):
+    """File the outline of `track` (and layout) is cached in."""
+    name = track if not configuration else f"{track}-{configuration}"
+    return os.path.join(directory, re.sub(r'[^\w.-]+', '_', name).strip('_') + ".npz")
+
+class TrackMapLearner:
+    """Learns the outline of the current track from the buffer's world position channels.
+
+    `update` feeds the samples stored since its previous call (needs the 'world_x' and
+    'world_z' channels subscribed) and publishes and saves the outline once per lap, and
+    as soon as it covers enough of the lap to be shown.
+    Outlines are cached per track and layout, so a known track is mapped right away.
+    """
+
+    def __init__(self, buffer, directory=TRACK_MAP_DIR):
+        self.buffer = buffer
+        self.directory = directory
+        self.track = None
+        self.path = None
+        self.outline = TrackOutline()
+        self.grid = None
+        self._seen = buffer.count
+        self._lap = None
+        self._dirty = False # samples added since the last publish
+
+    def set_track(self, track, configuration=None):
+        """Switches to the outline of `track`, from the cache when it was learned before."""
+        key = (track, configuration or None)
+        if key == self.track:
+            return
+        self.save()
+        self.track = key
+        self.path = outline_path(track, configuration, self.directory) if track else None
+        self.outline = TrackOutline()
+        if self.path and os.path.exists(self.path):
+            try:
+                self.outline = TrackOutline.load(self.path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring track map cache {self.path}: {e}")
+        self._index()
+        self._lap = None
+
+    def update(self) -> bool:
+        """Learns from new samples; True when the published outline (and grid) changed."""
+        buffer = self.buffer
+        end = buffer.count
+        start = max(self._seen, end - len(buffer))
+        self._seen = end
+        if start >= end or 'world_x' not in buffer.columns or 'world_z' not in buffer.columns:
+            return False
+
+        x = buffer.window('world_x', start, end)
+        z = buffer.window('world_z', start, end)
+        pct = buffer.window('lap_dist_pct', start, end)
+        moving = (buffer.window('speed_kph', start, end) >= MIN_SPEED_KPH) & np.isfinite(x) & np.isfinite(z)
+        if moving.any():
+            self.outline.add(x[moving], z[moving], pct[moving])
+            self._dirty = True
+
+        # Publish when a lap ends, or as soon as there is enough to show
+        lap = int(buffer.last('lap'))
+        new_lap = self._lap is not None and lap != self._lap
+        self._lap = lap
+        if self._dirty and (new_lap or self.outline.points is None) and self.outline.publish():
+            self._dirty = False
+            self._index()
+            self.save()
+            return True
+        return False
+
+    def save(self):
+        if self.path and self.outline.points is not None:
+            try:
+                self.outline.save(self.path)
+            except OSError as e:
+                print(f"Could not save track map {self.path}: {e}")
+
+    def _index(self):
+        self.grid = SpatialGrid(self.outline.points) if self.outline.points is not None else None
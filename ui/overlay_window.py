@@ -5,13 +5,22 @@ from PySide6.QtGui import QAction, QColor, QPalette
 from .widgets.trace_graph import TraceGraphWidget
 from .widgets.input_bars import InputBarsWidget
 from .widgets.dashboard_gauge import DashboardGaugeWidget
+from .widgets.delta_bar import DeltaWidget
+from .widgets.track_map import TrackMapWidget
+from .widgets.debug_hud import DebugHudWidget
+from telemetry.instrumentation import timed
 
 class OverlayWindow(QWidget):
+    # Trace graph history choices in seconds
+    TRACE_WINDOWS = (5, 30, 60, 120)
+
     def __init__(self, telemetry_engine):
         super().__init__()
         self.telemetry_engine = telemetry_engine
         self.locked = False
         self.dashboard_visible = True
+        self.track_map_visible = False
+        self.debug_hud_visible = False
         
         self.setWindowTitle("Sim Racing Overlay")
         self.resize(512, 96)
@@ -45,22 +54,48 @@ class OverlayWindow(QWidget):
         # For prototype we'll keep it simple vertical text or just horizontal.
         # Let's make it vertical via newlines for now to save complexity
         self.strip.setText("T\nE\nL\nE\nM\nE\nT\nR\nY")
+        self.strip.setToolTip(f"Source: {self.telemetry_engine.detection_state()['source']}")
         self.main_layout.addWidget(self.strip)
 
         # 2. Trace Graph (Center)
-        self.graph = TraceGraphWidget()
+        self.graph = TraceGraphWidget(self.telemetry_engine.buffer)
         self.main_layout.addWidget(self.graph, stretch=3)
 
-        # 3. Input Bars
+        # 3. Delta to the reference lap
+        self.delta = DeltaWidget()
+        self.main_layout.addWidget(self.delta)
+
+        # 4. Input Bars
         self.bars = InputBarsWidget()
         self.main_layout.addWidget(self.bars)
 
-        # 4. Dashboard (Right)
+        # 5. Dashboard (Right)
         self.dashboard = DashboardGaugeWidget()
         self.main_layout.addWidget(self.dashboard)
 
-        # Connect Telemetry
-        self.telemetry_engine.data_updated.connect(self.update_ui)
+        # 6. Track map, off until enabled from the menu
+        self.track_map = TrackMapWidget(self.telemetry_engine)
+        self.track_map.setVisible(False)
+        self.main_layout.addWidget(self.track_map)
+
+        # Stage timings in their own window under the overlay, off until enabled from the menu
+        self.debug_hud = DebugHudWidget(self.telemetry_engine, self)
+
+        # Connect Telemetry: drain the engine's mailbox once per display refresh.
+        # Frames the GUI misses while stalled are coalesced, never queued up.
+        refresh_hz = self.screen().refreshRate() or 60.0
+        self.telemetry_engine.ui_hz = refresh_hz
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.timeout.connect(self.drain_telemetry)
+        self.frame_interval_ms = max(1, int(1000 / refresh_hz))
+        self.frame_timer.start(self.frame_interval_ms)
+
+        # Slow the frame timer down with the engine while the car is inactive
+        self.telemetry_engine.governor_changed.connect(self.on_governor_changed)
+
+        # Sim detection runs in the background; show which source is live
+        self.telemetry_engine.adapter_changed.connect(self.on_adapter_changed)
         
         # Logic for dragging
         self.old_pos = None
@@ -73,11 +108,34 @@ class OverlayWindow(QWidget):
         # Init functionality
         self.update_lock_state()
 
-    def update_ui(self, data):
-        self.graph.update_data(data.throttle, data.brake)
+    def on_adapter_changed(self, name):
+        self.strip.setToolTip(f"Source: {name}")
+
+    def on_governor_changed(self, state):
+        governor = self.telemetry_engine.governor
+        if governor.idle:
+            self.frame_timer.setInterval(max(self.frame_interval_ms, int(1000 / governor.idle_ui_hz)))
+        else:
+            self.frame_timer.setInterval(self.frame_interval_ms)
+            self.drain_telemetry() # Don't wait for the slow timer tick that was pending
+
+    def drain_telemetry(self):
+        batch = self.telemetry_engine.mailbox.take()
+        # An empty batch still carries a new latest state (e.g. AC paused), only None means nothing was posted
+        if batch is not None:
+            self.update_ui(batch)
+
+    @timed("gui.frame")
+    def update_ui(self, batch):
+        # batch holds every sample since the last frame; the graph reads them from the buffer
+        data = batch.latest
+        self.graph.refresh()
         self.bars.update_data(data.clutch, data.brake, data.throttle)
+        self.delta.update_data(self.telemetry_engine.buffer.last('delta'))
         if self.dashboard_visible:
             self.dashboard.update_data(data.gear, data.speed_kph, data.rpm, data.steering_angle)
+        if self.track_map_visible:
+            self.track_map.refresh()
 
     def change_scale(self, delta):
         new_scale = self.current_scale + delta
@@ -102,15 +160,20 @@ class OverlayWindow(QWidget):
         """)
         
         # Scale Dashboard
-        dash_size = int(64 * new_scale)
-        self.dashboard.setFixedSize(dash_size, dash_size)
+        self.dashboard.set_scale(new_scale)
 
-        # Scale Input Bars
+        # Scale Input Bars and Delta
         self.bars.set_scale(new_scale)
+        self.delta.set_scale(new_scale)
+        self.track_map.set_scale(new_scale)
+        self.debug_hud.set_scale(new_scale)
         
         new_w = int(self.base_width * self.current_scale)
+        if self.track_map_visible:
+            new_w += self.track_map.width()
         new_h = int(self.base_height * self.current_scale)
         self.resize(new_w, new_h)
+        self.place_debug_hud()
 
     def contextMenuEvent(self, event):
         menu = QMenu(self)
@@ -122,7 +185,20 @@ class OverlayWindow(QWidget):
         dash_action = QAction("Hide Dashboard" if self.dashboard_visible else "Show Dashboard", self)
         dash_action.triggered.connect(self.toggle_dashboard)
         menu.addAction(dash_action)
+
+        map_action = QAction("Hide Track Map" if self.track_map_visible else "Show Track Map", self)
+        map_action.triggered.connect(self.toggle_track_map)
+        menu.addAction(map_action)
+
+        hud_action = QAction("Hide Debug HUD" if self.debug_hud_visible else "Show Debug HUD", self)
+        hud_action.triggered.connect(self.toggle_debug_hud)
+        menu.addAction(hud_action)
         
+        recording = self.telemetry_engine.recorder is not None
+        record_action = QAction("Stop Recording" if recording else "Start Recording", self)
+        record_action.triggered.connect(self.toggle_recording)
+        menu.addAction(record_action)
+
         menu.addSeparator()
         
         # Resize Actions
@@ -133,20 +209,99 @@ class OverlayWindow(QWidget):
         dec_action = QAction("Decrease Size (-5%)", self)
         dec_action.triggered.connect(lambda: self.change_scale(-0.05))
         menu.addAction(dec_action)
+
+        # Trace history length; long windows are drawn from the min/max pyramids
+        window_menu = menu.addMenu("Trace Window")
+        for seconds in self.TRACE_WINDOWS:
+            window_action = QAction(f"{seconds} s", self)
+            window_action.setCheckable(True)
+            window_action.setChecked(self.graph.window_s == seconds)
+            window_action.triggered.connect(lambda checked=False, s=seconds: self.graph.set_window(s))
+            window_menu.addAction(window_action)
         
         menu.addSeparator()
 
+        # Sim detection state
+        detection = self.telemetry_engine.detection_state()
+        source_action = QAction(f"Source: {detection['source']}", self)
+        source_action.setEnabled(False)
+        menu.addAction(source_action)
+        if not detection['pinned']:
+            for sim in detection['sims']:
+                text = f"{sim['name']}: {sim['state']}"
+                if sim['next_probe_in'] is not None:
+                    text += f" (next check in {sim['next_probe_in']:.0f}s)"
+                sim_action = QAction(text, self)
+                sim_action.setEnabled(False)
+                menu.addAction(sim_action)
+
+        # Backpressure between engine and GUI
+        stats = self.telemetry_engine.mailbox.stats()
+        frames_action = QAction(
+            f"Frames: {stats['delivered']} shown, {stats['coalesced_frames']} coalesced, "
+            f"{stats['dropped_samples']} samples dropped, {stats['max_latency_ms']:.1f} ms max latency",
+            self
+        )
+        frames_action.setEnabled(False)
+        menu.addAction(frames_action)
+
+        rates = self.telemetry_engine.rates()
+        rates_action = QAction(
+            f"Rates ({rates['state']}): acquiring at {rates['acquisition_hz']:.0f} Hz, "
+            f"drawing at {rates['ui_hz']:.0f} Hz",
+            self
+        )
+        rates_action.setEnabled(False)
+        menu.addAction(rates_action)
+
+        # How late acquisition polls ran against their deadlines
+        ticks = rates['ticks']
+        ticks_action = QAction(
+            f"Poll lateness: p50 {ticks['p50_us']:.0f} us, p99 {ticks['p99_us']:.0f} us, "
+            f"max {ticks['max_us'] / 1000:.1f} ms, {ticks['skipped']} skipped",
+            self
+        )
+        ticks_action.setEnabled(False)
+        menu.addAction(ticks_action)
+
+        menu.addSeparator()
+
         exit_action = QAction("Exit", self)
         exit_action.triggered.connect(QApplication.instance().quit)
         menu.addAction(exit_action)
 
         menu.exec(event.globalPos())
 
+    def toggle_recording(self):
+        if self.telemetry_engine.recorder is None:
+            recorder = self.telemetry_engine.start_recording()
+            print(f"Recording session to {recorder.path}")
+        else:
+            recorder = self.telemetry_engine.stop_recording()
+            print(f"Saved {recorder.samples_written} samples to {recorder.path} ({recorder.dropped_samples} dropped)")
+
     def toggle_dashboard(self):
         self.dashboard_visible = not self.dashboard_visible
         self.dashboard.setVisible(self.dashboard_visible)
         # Adjust window size if needed, or layout handles it
         
+    def toggle_track_map(self):
+        self.track_map_visible = not self.track_map_visible
+        # World positions are only acquired while the map is shown
+        self.track_map.set_active(self.track_map_visible)
+        self.track_map.setVisible(self.track_map_visible)
+        # Grow the window by the map instead of squeezing the trace graph
+        self.change_scale(0)
+
+    def toggle_debug_hud(self):
+        self.debug_hud_visible = not self.debug_hud_visible
+        self.place_debug_hud()
+        self.debug_hud.setVisible(self.debug_hud_visible)
+
+    def place_debug_hud(self):
+        # Right under the overlay, following it around
+        self.debug_hud.move(self.x(), self.y() + self.height() + 4)
+
     def toggle_lock(self):
         self.locked = not self.locked
         self.update_lock_state()
@@ -185,6 +340,7 @@ class OverlayWindow(QWidget):
         if not self.locked and self.old_pos:
             delta = QPoint(event.globalPos() - self.old_pos)
             self.move(self.x() + delta.x(), self.y() + delta.y())
+            self.place_debug_hud()
             self.old_pos = event.globalPos()
 
     def mouseReleaseEvent(self, event):
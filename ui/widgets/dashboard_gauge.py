@@ -1,7 +1,13 @@
 import math
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PySide6.QtCore import Qt, QRect, QPoint
-from PySide6.QtGui import QPainter, QPen, QColor
+from PySide6.QtGui import QPainter, QPen, QColor, QPixmap, QFont
+from telemetry.instrumentation import timed
+
+# Resolution of the values that change the picture: RPM arc in 1/16 degree (drawArc
+# units), steering marker in half degrees. Updates within one step are not repainted.
+RPM_ARC_SPAN = 270 * 16
+STEERING_STEPS_PER_DEG = 2
 
 class DashboardGaugeWidget(QWidget):
     def __init__(self, parent=None):
@@ -13,6 +19,24 @@ class DashboardGaugeWidget(QWidget):
         self.rpm_pct = 0.0 # 0.0 to 1.0
         self.steering_angle = 0.0
 
+        # Quantized (gear, speed, rpm span, steering step) currently on screen
+        self._state = None
+        self._rpm_span = 0
+        self._steering_deg = 0.0
+        self._gear_str = "N"
+        self._speed_str = "0"
+
+        # Fonts in logical (100x100) coordinates, the painter scale sizes them
+        self._gear_font = QFont()
+        self._gear_font.setPixelSize(24)
+        self._gear_font.setBold(True)
+        self._speed_font = QFont(self._gear_font)
+        self._speed_font.setPixelSize(22)
+
+        # Pre-rendered background, rings and unit label, keyed by (width, height, dpr)
+        self._static = None
+        self._static_key = None
+
         self.setStyleSheet("background-color: transparent;")
 
     def update_data(self, gear, speed, rpm, steering_angle=0.0, max_rpm=8000):
@@ -20,27 +44,56 @@ class DashboardGaugeWidget(QWidget):
         self.speed = int(speed)
         self.rpm_pct = min(1.0, rpm / max_rpm)
         self.steering_angle = steering_angle
+
+        state = (
+            gear,
+            self.speed,
+            round(max(0.0, self.rpm_pct) * RPM_ARC_SPAN),
+            round(math.degrees(steering_angle) * STEERING_STEPS_PER_DEG),
+        )
+        if state == self._state:
+            return # Nothing visible changed
+        if self._state is None or state[0] != self._state[0]:
+            self._gear_str = "N" if gear == 0 else "R" if gear == -1 else str(gear)
+        if self._state is None or state[1] != self._state[1]:
+            self._speed_str = str(self.speed)
+        self._state = state
+        self._rpm_span = state[2]
+        self._steering_deg = state[3] / STEERING_STEPS_PER_DEG
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Determine the scale based on the actual widget size vs logical size (100x100)
-        side = min(self.width(), self.height())
+    def set_scale(self, scale):
+        self.setFixedSize(int(64 * scale), int(64 * scale))
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """Drops the static layer, it is rebuilt on the next paint."""
+        self._static = None
+        self._static_key = None
+        self.update()
+
+    def _begin_logical(self, painter, width, height):
+        # Center the drawing and scale the logical 100x100 box into the widget
+        side = min(width, height)
         scale = side / 100.0
-        
-        # Center the drawing
-        painter.translate(self.width() / 2, self.height() / 2)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(width / 2, height / 2)
         painter.scale(scale, scale)
         painter.translate(-50, -50) # Move origin back to top-left of logical 100x100 box
-        
-        # Now drawing in logical coordinates (0,0) to (100,100)
-        rect = self.rect() # Accessing standard rect might be wrong if we scaled. 
-        # But wait, self.rect() returns the widget size (e.g. 50x50), not logical size.
-        # We need a logical rect.
+
+    def _static_layer(self):
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr)
+        if self._static is not None and self._static_key == key:
+            return self._static
+
+        pixmap = QPixmap(max(1, round(self.width() * dpr)), max(1, round(self.height() * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        self._begin_logical(painter, self.width(), self.height())
+
         logical_rect = QRect(0, 0, 100, 100)
-        
         c = QPoint(50, 50)
         
         # Radii definitions
@@ -58,11 +111,44 @@ class DashboardGaugeWidget(QWidget):
         painter.setBrush(Qt.NoBrush)
         painter.drawEllipse(c, outer_radius, outer_radius)
 
+        # RPM Arc (Background) - Inner Radius
+        painter.setPen(QPen(QColor(50, 50, 50), 6))
+        painter.setBrush(Qt.NoBrush)
+        # Calculate rect for inner radius
+        # logical_rect is 0,0,100,100. Center 50,50.
+        # radius 35 means rect from 15,15 to 85,85. Width/Height = 70.
+        # inset = 50 - 35 = 15.
+        arc_rect = logical_rect.adjusted(15, 15, -15, -15)
+        painter.drawArc(arc_rect, -45 * 16, 270 * 16)
+
+        # Unit label (kph)
+        painter.setPen(QColor(255, 255, 255))
+        f = QFont(self._gear_font)
+        f.setPixelSize(10)
+        f.setBold(False)
+        painter.setFont(f)
+        painter.drawText(logical_rect.translated(0, 34), Qt.AlignCenter, "kph")
+        painter.end()
+
+        self._static = pixmap
+        self._static_key = key
+        return pixmap
+
+    @timed("paint.dashboard")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer())
+        self._begin_logical(painter, self.width(), self.height())
+
+        # Now drawing in logical coordinates (0,0) to (100,100)
+        logical_rect = QRect(0, 0, 100, 100)
+        c = QPoint(50, 50)
+        outer_radius = 45
+
         # Steering Marker
         painter.save()
         painter.translate(c)
-        deg = math.degrees(self.steering_angle)
-        painter.rotate(-deg) 
+        painter.rotate(-self._steering_deg)
         
         # Draw marker at outer radius
         marker_y = -outer_radius 
@@ -71,47 +157,25 @@ class DashboardGaugeWidget(QWidget):
         painter.drawEllipse(QPoint(0, marker_y), 4, 4)
         
         painter.restore()
-        
-        # RPM Arc (Background) - Inner Radius
-        painter.setPen(QPen(QColor(50, 50, 50), 6))
-        painter.setBrush(Qt.NoBrush)
-        # Calculate rect for inner radius
-        # logical_rect is 0,0,100,100. Center 50,50.
-        # radius 35 means rect from 15,15 to 85,85. Width/Height = 70.
-        # inset = 50 - 35 = 15.
-        arc_rect = logical_rect.adjusted(15, 15, -15, -15)
-        painter.drawArc(arc_rect, -45 * 16, 270 * 16)
 
         # RPM Arc (Active)
         color = QColor(0, 255, 0)
-        if self.rpm_pct > 0.8: color = QColor(255, 0, 0)
-        elif self.rpm_pct > 0.5: color = QColor(255, 255, 0)
+        if self._rpm_span > 0.8 * RPM_ARC_SPAN: color = QColor(255, 0, 0)
+        elif self._rpm_span > 0.5 * RPM_ARC_SPAN: color = QColor(255, 255, 0)
         
         painter.setPen(QPen(color, 6))
+        painter.setBrush(Qt.NoBrush)
         start_angle = 225 * 16
-        span_angle = - (self.rpm_pct * 270) * 16
-        painter.drawArc(arc_rect, start_angle, span_angle)
+        arc_rect = logical_rect.adjusted(15, 15, -15, -15)
+        painter.drawArc(arc_rect, start_angle, -self._rpm_span)
 
         # Text Drawing
         painter.setPen(QColor(255, 255, 255))
         
         # Gear (Top half, smaller)
-        f = painter.font()
-        f.setPixelSize(24)
-        f.setBold(True)
-        painter.setFont(f)
-        
-        gear_str = "N" if self.gear == 0 else "R" if self.gear == -1 else str(self.gear)
-        painter.drawText(logical_rect.translated(0, -20), Qt.AlignCenter, gear_str)
+        painter.setFont(self._gear_font)
+        painter.drawText(logical_rect.translated(0, -20), Qt.AlignCenter, self._gear_str)
 
         # Speed (Bottom half, larger)
-        f.setPixelSize(22)
-        f.setBold(True)
-        painter.setFont(f)
-        painter.drawText(logical_rect.translated(0, 12), Qt.AlignCenter, str(self.speed))
-
-        # Unit label (kph)
-        f.setPixelSize(10)
-        f.setBold(False)
-        painter.setFont(f)
-        painter.drawText(logical_rect.translated(0, 34), Qt.AlignCenter, "kph")
+        painter.setFont(self._speed_font)
+        painter.drawText(logical_rect.translated(0, 12), Qt.AlignCenter, self._speed_str)
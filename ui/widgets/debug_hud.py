@@ -0,0 +1,88 @@
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF, QTimer
+from PySide6.QtGui import QPainter, QColor, QFont, QFontMetrics
+
+def _format_us(us):
+    return f"{us:.0f} us" if us < 1000 else f"{us / 1000:.1f} ms"
+
+class DebugHudWidget(QWidget):
+    """Floating table of the per stage timings (telemetry.instrumentation): calls, p50, p99 and max.
+
+    Refreshed every REFRESH_MS while shown. Stages whose p99 goes over one display frame
+    are drawn in red: those are the ones that make the overlay stutter.
+    """
+    BACKGROUND = QColor(0, 0, 0, 220)
+    TEXT = QColor(0xdd, 0xdd, 0xdd)
+    HEADER = QColor(0x88, 0x88, 0x88)
+    SLOW = QColor(255, 80, 80)
+    REFRESH_MS = 500
+    COLUMNS = ("stage", "calls", "p50", "p99", "max")
+
+    def __init__(self, telemetry_engine, parent=None):
+        super().__init__(parent)
+        self.telemetry_engine = telemetry_engine
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self._font = QFont("monospace")
+        self._font.setStyleHint(QFont.Monospace)
+        self._rows = []
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self.set_scale(1.0)
+
+    def set_scale(self, scale):
+        self._font.setPixelSize(max(8, round(11 * scale)))
+        self._resize()
+
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start(self.REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        budget_us = 1e6 / (self.telemetry_engine.ui_hz or 60.0)
+        rows = []
+        for name, stats in self.telemetry_engine.timings().items():
+            if stats['count']:
+                rows.append(((name, str(stats['count']), _format_us(stats['p50_us']),
+                              _format_us(stats['p99_us']), _format_us(stats['max_us'])),
+                             stats['p99_us'] > budget_us))
+        self._rows = rows
+        self._resize()
+        self.update()
+
+    def _resize(self):
+        metrics = QFontMetrics(self._font)
+        self._line = metrics.height()
+        self._char = metrics.horizontalAdvance("0")
+        widths = [len(column) for column in self.COLUMNS]
+        for cells, _ in self._rows:
+            widths = [max(w, len(cell)) for w, cell in zip(widths, cells)]
+        self._widths = widths
+        pad = self._char
+        self.setFixedSize(round(sum(widths) * self._char + pad * (len(widths) + 1)),
+                          round(self._line * (len(self._rows) + 1) + pad))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.BACKGROUND)
+        painter.drawRoundedRect(QRectF(self.rect()), 5, 5)
+        painter.setFont(self._font)
+
+        pad = self._char
+        y = pad / 2
+        for cells, color in [(self.COLUMNS, self.HEADER)] + [(cells, self.SLOW if slow else self.TEXT) for cells, slow in self._rows]:
+            painter.setPen(color)
+            x = pad
+            for i, (cell, width) in enumerate(zip(cells, self._widths)):
+                rect = QRectF(x, y, width * self._char, self._line)
+                # Stage names left, numbers right aligned
+                painter.drawText(rect, (Qt.AlignLeft if i == 0 else Qt.AlignRight) | Qt.AlignVCenter, cell)
+                x += width * self._char + pad
+            y += self._line
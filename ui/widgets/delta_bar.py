@@ -0,0 +1,73 @@
+import math
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF, QSize
+from PySide6.QtGui import QPainter, QColor, QFont
+from telemetry.instrumentation import timed
+
+class DeltaWidget(QWidget):
+    """Live delta to the reference lap: signed time plus a bar growing from the center.
+
+    Repaints only when the shown hundredths change.
+    """
+    BACKGROUND = QColor(0, 0, 0, 200)
+    TRACK = QColor(0x22, 0x22, 0x22)
+    AHEAD = QColor(0, 255, 0) # faster than the reference
+    BEHIND = QColor(255, 0, 0)
+    TEXT = QColor(255, 255, 255)
+    # Delta at which the bar reaches the edge
+    RANGE_S = 2.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._hundredths = None # shown value, None without a reference
+        self._font = QFont()
+        self._font.setBold(True)
+        self.set_scale(1.0)
+
+    def sizeHint(self):
+        return QSize(round(56 * self._scale), round(96 * self._scale))
+
+    def update_data(self, delta):
+        hundredths = None if delta is None or math.isnan(delta) else round(delta * 100)
+        if hundredths == self._hundredths:
+            return
+        self._hundredths = hundredths
+        self.update()
+
+    def set_scale(self, scale):
+        self._scale = scale
+        self.setFixedWidth(round(56 * scale))
+        self._font.setPixelSize(max(6, round(13 * scale)))
+        self.update()
+
+    @timed("paint.delta")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.BACKGROUND)
+        painter.drawRoundedRect(QRectF(self.rect()), 5, 5)
+
+        margin = max(2, round(5 * self._scale))
+        bar_h = max(3, round(8 * self._scale))
+        track = QRectF(margin, self.height() - margin - bar_h, self.width() - 2 * margin, bar_h)
+        painter.fillRect(track, self.TRACK)
+
+        painter.setFont(self._font)
+        painter.setPen(self.TEXT)
+        text_rect = QRectF(0, 0, self.width(), track.top())
+        if self._hundredths is None:
+            painter.drawText(text_rect, Qt.AlignCenter, "--.--")
+            return
+
+        delta = self._hundredths / 100.0
+        color = self.BEHIND if delta > 0 else self.AHEAD
+        painter.setPen(color)
+        painter.drawText(text_rect, Qt.AlignCenter, f"{delta:+.2f}")
+
+        # Behind grows right, ahead grows left
+        half = track.width() / 2
+        length = min(1.0, abs(delta) / self.RANGE_S) * half
+        center = track.left() + half
+        left = center if delta > 0 else center - length
+        painter.fillRect(QRectF(left, track.top(), length, bar_h), color)
@@ -1,76 +1,126 @@
-from PySide6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QProgressBar
-from PySide6.QtCore import Qt
-
-class VerticalBar(QWidget):
-    def __init__(self, name, color, initial_val=0):
-        super().__init__()
-        layout = QVBoxLayout()
-        layout.setContentsMargins(2, 0, 2, 0)
-        layout.setSpacing(2)
-        
-        self.color = color
-        self.label = QLabel("0")
-        self.label.setAlignment(Qt.AlignCenter)
-        self.label.setStyleSheet("color: white; font-weight: bold; font-size: 10px;")
-        
-        self.bar = QProgressBar()
-        self.bar.setOrientation(Qt.Vertical)
-        self.bar.setRange(0, 100)
-        self.bar.setValue(initial_val)
-        self.bar.setTextVisible(False)
-        self.update_style(1.0) # Initial style
-        
-        layout.addWidget(self.label)
-        layout.addWidget(self.bar)
-        self.setLayout(layout)
-
-    def set_value(self, val_float):
-        # val_float 0.0 to 1.0
-        val_int = int(val_float * 100)
-        self.bar.setValue(val_int)
-        self.label.setText(str(val_int))
-
-    def update_style(self, scale):
-        width = int(10 * scale)
-        font_size = max(6, int(6 * scale)) # Minimum readable font
-        
-        self.label.setStyleSheet(f"color: white; font-weight: bold; font-size: {font_size}px;")
-        self.bar.setStyleSheet(f"""
-            QProgressBar {{
-                border: 1px solid #444;
-                background-color: #222;
-                border-radius: 2px;
-                width: {width}px;
-            }}
-            QProgressBar::chunk {{
-                background-color: {self.color};
-            }}
-        """)
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRect, QRectF, QSize
+from PySide6.QtGui import QPainter, QPen, QColor, QFont, QPixmap
+from telemetry.instrumentation import timed
+
+# Label text for every value a bar can show, formatted once
+_LABELS = [str(i) for i in range(101)]
 
 class InputBarsWidget(QWidget):
+    """Clutch, brake and throttle as vertical bars, painted in one pass.
+
+    Geometry and the static parts (background, label plates, empty tracks) are built on
+    resize/scale only. `update_data` repaints only when a bar fill moves by at least one
+    device pixel or a label changes its number.
+    """
+    BACKGROUND = QColor(0, 0, 0, 200)
+    TRACK = QColor(0x22, 0x22, 0x22)
+    TRACK_BORDER = QColor(0x44, 0x44, 0x44)
+    TEXT = QColor(255, 255, 255)
+    BARS = (('clutch', QColor(0x88, 0x88, 0x88)), ('brake', QColor(255, 0, 0)), ('throttle', QColor(0, 255, 0)))
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        layout = QHBoxLayout()
-        layout.setContentsMargins(5, 5, 5, 5)
-        layout.setSpacing(2)
-        
-        self.clutch = VerticalBar("C", "#888888")
-        self.brake = VerticalBar("B", "#FF0000")
-        self.throttle = VerticalBar("T", "#00FF00")
-        
-        layout.addWidget(self.clutch)
-        layout.addWidget(self.brake)
-        layout.addWidget(self.throttle)
-        
-        self.setLayout(layout)
-        self.setStyleSheet("background-color: rgba(0,0,0,200); border-radius: 5px;")
+
+        self.values = [0.0, 0.0, 0.0] # clutch, brake, throttle, 0.0 to 1.0
+        self._state = None # (fill px, label value) per bar currently on screen
+        self._static = None # pre-rendered static layer, rebuilt by _layout_bars
+
+        self._font = QFont()
+        self._font.setBold(True)
+        self.set_scale(1.0)
+
+    def sizeHint(self):
+        return QSize(2 * self._margin + 3 * self._bar_width + 2 * self._spacing, round(96 * self._scale))
+
+    def minimumSizeHint(self):
+        return QSize(self.sizeHint().width(), self._label_height + 3 * self._margin)
 
     def update_data(self, clutch, brake, throttle):
-        self.clutch.set_value(clutch)
-        self.brake.set_value(brake)
-        self.throttle.set_value(throttle)
+        self.values = [min(1.0, max(0.0, v)) for v in (clutch, brake, throttle)]
+        state = self._quantize()
+        if state == self._state:
+            return # No bar moved a pixel and no label changed
+        self._state = state
+        self.update()
 
     def set_scale(self, scale):
-        self.clutch.update_style(scale)
-        self.brake.update_style(scale)
-        self.throttle.update_style(scale)
+        self._scale = scale
+        self._margin = max(2, round(5 * scale))
+        self._spacing = max(4, round(6 * scale))
+        self._bar_width = max(8, round(14 * scale))
+        self._font.setPixelSize(max(6, round(9 * scale)))
+        self._label_height = self._font.pixelSize() + 4
+        self._layout_bars()
+        self.updateGeometry()
+        self.update()
+
+    def resizeEvent(self, event):
+        self._layout_bars()
+        super().resizeEvent(event)
+
+    def _layout_bars(self):
+        # Bars are centered horizontally, labels above them
+        width = 3 * self._bar_width + 2 * self._spacing
+        x = max(self._margin, (self.width() - width) // 2)
+        label_top = self._margin
+        track_top = label_top + self._label_height + 2
+        track_height = max(3, self.height() - track_top - self._margin)
+        self._labels = []
+        self._tracks = []
+        for i in range(len(self.BARS)):
+            left = x + i * (self._bar_width + self._spacing)
+            # Labels may use the gap between bars, "100" is wider than a small bar
+            pad = self._spacing // 2
+            self._labels.append(QRect(left - pad, label_top, self._bar_width + 2 * pad, self._label_height))
+            self._tracks.append(QRect(left, track_top, self._bar_width, track_height))
+        # Fill area inside the 1px border
+        self._fill_height = track_height - 2
+        self._state = self._quantize()
+        self._static = None
+
+    def _quantize(self):
+        dpr = self.devicePixelRatioF()
+        return tuple(
+            (round(v * self._fill_height * dpr), int(v * 100)) for v in self.values
+        )
+
+    def _static_layer(self):
+        dpr = self.devicePixelRatioF()
+        if self._static is not None and self._static.devicePixelRatio() == dpr:
+            return self._static
+
+        pixmap = QPixmap(max(1, round(self.width() * dpr)), max(1, round(self.height() * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.BACKGROUND)
+        painter.drawRoundedRect(QRectF(self.rect()), 5, 5)
+        for label, track in zip(self._labels, self._tracks):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.BACKGROUND)
+            painter.drawRoundedRect(QRectF(label).adjusted(1, 0, -1, 0), 2, 2)
+            painter.setPen(QPen(self.TRACK_BORDER, 1))
+            painter.setBrush(self.TRACK)
+            painter.drawRoundedRect(QRectF(track).adjusted(0.5, 0.5, -0.5, -0.5), 2, 2)
+        painter.end()
+
+        self._static = pixmap
+        return pixmap
+
+    @timed("paint.input_bars")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer())
+
+        painter.setFont(self._font)
+        painter.setPen(self.TEXT)
+        dpr = self.devicePixelRatioF()
+        for (_, color), label, track, (fill_px, value) in zip(self.BARS, self._labels, self._tracks, self._state):
+            painter.drawText(label, Qt.AlignCenter, _LABELS[value])
+            if fill_px > 0:
+                fill = fill_px / dpr
+                inner = QRectF(track).adjusted(1, 1, -1, -1)
+                painter.fillRect(QRectF(inner.left(), inner.bottom() - fill, inner.width(), fill), color)
@@ -1,71 +1,225 @@
+import math
+import numpy as np
 from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPainter, QPen, QColor, QPainterPath
-from PySide6.QtCore import Qt, QTimer
-from collections import deque
+from PySide6.QtGui import QPainter, QPen, QColor, QPainterPath, QPixmap
+from PySide6.QtCore import Qt, QRect, QLineF
+from telemetry.lod import MinMaxPyramid
+from telemetry.instrumentation import timed
 
 class TraceGraphWidget(QWidget):
-    def __init__(self, parent=None):
+    BACKGROUND = QColor(20, 20, 20, 220)
+    GRID = QColor(60, 60, 60)
+    TRACES = (('throttle', QColor(0, 255, 0)), ('brake', QColor(255, 0, 0)))
+    # Samples per device column above which traces are drawn as per-column min/max
+    # bars from the pyramids instead of sample-to-sample lines (with some hysteresis)
+    LOD_ENTER = 8.0
+    LOD_EXIT = 4.0
+
+    def __init__(self, buffer, window_s=5.0, parent=None):
         super().__init__(parent)
         self.setMinimumWidth(10)
         self.setMinimumHeight(10)
         self.setStyleSheet("background-color: transparent;")
-        
-        # History size: 60Hz * 5 seconds = 300 points
-        self.history_len = 300
-        self.throttle_hist = deque([0.0]*self.history_len, maxlen=self.history_len)
-        self.brake_hist = deque([0.0]*self.history_len, maxlen=self.history_len)
 
-    def update_data(self, throttle: float, brake: float):
-        self.throttle_hist.append(throttle)
-        self.brake_hist.append(brake)
-        self.update() # Trigger repaint
+        # Shared TelemetryBuffer owned by the engine; we only read views from it
+        self.buffer = buffer
+
+        # Visible history in seconds. Samples are placed by timestamp, so every
+        # acquired sample is drawn whatever rate the active sim runs at.
+        self.window_s = window_s
+
+        # Backing store in device pixels. Each frame it is scrolled left by the time that
+        # passed and only the new segments are drawn at the right edge; it is rebuilt
+        # from the buffer only on resize, scale or window change.
+        self._pixmap = None
+        self._origin = 0.0 # timestamp at absolute device column 0
+        self._right = 0 # absolute device column at the right edge of the pixmap
+        self._drawn_end = 0 # buffer sequence number up to which samples are drawn
+        self._last_points = {} # trace name -> (absolute x, y) of its newest drawn sample
+
+        # Min/max pyramids keep long windows (30-120 s at sim rate) cheap to draw
+        self._pyramids = {name: MinMaxPyramid(buffer, name) for name, _ in self.TRACES}
+        for pyramid in self._pyramids.values():
+            pyramid.reset()
+        self._lod = False
+        self._lod_prev = {} # trace name -> (lo, hi) of the last finished column
+
+    def refresh(self):
+        self.update() # Trigger repaint, new samples are pulled from the buffer in paintEvent
+
+    def set_window(self, seconds):
+        self.window_s = seconds
+        self.invalidate()
+
+    def invalidate(self):
+        """Forces a full redraw from the buffer on the next paint."""
+        self._pixmap = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._pixmap = None
+        super().resizeEvent(event)
 
+    @timed("paint.trace_graph")
     def paintEvent(self, event):
+        self._advance()
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        w = self.width()
-        h = self.height()
-        
-        # Draw Background
-        painter.fillRect(0, 0, w, h, QColor(20, 20, 20, 220))
-        
+        painter.drawPixmap(self.rect(), self._pixmap)
+
+    # --- Backing store ---------------------------------------------------
+
+    def _device_size(self):
+        dpr = self.devicePixelRatioF()
+        return max(1, round(self.width() * dpr)), max(1, round(self.height() * dpr)), dpr
+
+    def _advance(self):
+        w, h, dpr = self._device_size()
+        pixmap = self._pixmap
+        if pixmap is None or pixmap.width() != w or pixmap.height() != h:
+            self._redraw(w, h, dpr)
+            return
+
+        # Pin the range once, the engine thread keeps appending while we paint
+        end = self.buffer.count
+        if end == self._drawn_end:
+            return
+        timestamps = self.buffer.window('timestamp', self._drawn_end, end)
+        if end - self._drawn_end != len(timestamps):
+            # Samples we never drew were already overwritten
+            self._redraw(w, h, dpr)
+            return
+
+        px_per_s = w / self.window_s
+        right = math.ceil((timestamps[-1] - self._origin) * px_per_s)
+        shift = right - self._right
+        if shift >= w or shift < 0:
+            self._redraw(w, h, dpr)
+            return
+
+        # Switch between line and min/max drawing when the sample density changes (e.g. new sim)
+        new_columns = (timestamps[-1] - timestamps[0]) * px_per_s
+        if new_columns >= 1:
+            density = (len(timestamps) - 1) / new_columns
+            if (not self._lod and density > self.LOD_ENTER) or (self._lod and density < self.LOD_EXIT):
+                self._redraw(w, h, dpr)
+                return
+
+        if shift > 0:
+            pixmap.scroll(-shift, 0, pixmap.rect())
+        painter = QPainter(pixmap)
+        if self._lod:
+            # The previously newest column was still filling, redo it with the new columns
+            self._right = right
+            strip = min(w, shift + 1)
+            self._paint_background(painter, QRect(w - strip, 0, strip, h), w, h, dpr)
+            self._paint_columns(painter, w - strip, w, end, w, h, dpr)
+        else:
+            if shift > 0:
+                self._paint_background(painter, QRect(w - shift, 0, shift, h), w, h, dpr)
+            self._right = right
+            self._paint_samples(painter, self._drawn_end, end, timestamps, w, h, dpr)
+        painter.end()
+        self._drawn_end = end
+
+    def _redraw(self, w, h, dpr):
+        self._pixmap = QPixmap(w, h)
+        self._last_points = {}
+        self._lod_prev = {}
+        painter = QPainter(self._pixmap)
+        self._paint_background(painter, self._pixmap.rect(), w, h, dpr)
+
+        end = self.buffer.count
+        timestamps = self.buffer.window('timestamp', end - self.buffer.capacity, end)
+        if len(timestamps) == 0:
+            self._origin = 0.0
+            self._right = w
+            self._drawn_end = end
+            painter.end()
+            return
+
+        # Newest sample sits on the right edge, window_s seconds ago on the left edge
+        self._origin = timestamps[-1] - self.window_s
+        self._right = w
+        first_idx = int(np.searchsorted(timestamps, self._origin))
+        start = end - (len(timestamps) - first_idx)
+        density = (end - start) / w
+        self._lod = density > (self.LOD_EXIT if self._lod else self.LOD_ENTER)
+        if self._lod:
+            self._paint_columns(painter, 0, w, end, w, h, dpr)
+        else:
+            self._paint_samples(painter, start, end, timestamps[first_idx:], w, h, dpr)
+        painter.end()
+        self._drawn_end = end
+
+    def _paint_background(self, painter, rect, w, h, dpr):
+        # Source mode so the translucent background replaces what was scrolled in
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(rect, self.BACKGROUND)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+
         # Draw Grid Lines
-        painter.setPen(QPen(QColor(60, 60, 60), 1))
-        painter.drawLine(0, h * 0.25, w, h * 0.25)
-        painter.drawLine(0, h * 0.50, w, h * 0.50)
-        painter.drawLine(0, h * 0.75, w, h * 0.75)
-
-        # Helper to map data index to x coordinate
-        # Newest data at right (w), oldest at left (0)
-        step_x = w / (self.history_len - 1) if self.history_len > 1 else 0
-
-        # Draw Throttle (Green)
-        path_t = QPainterPath()
-        first = True
-        for i, val in enumerate(self.throttle_hist):
-            x = i * step_x
-            y = h - (val * h)
-            if first:
-                path_t.moveTo(x, y)
-                first = False
-            else:
-                path_t.lineTo(x, y)
-        
-        painter.setPen(QPen(QColor(0, 255, 0), 2))
-        painter.drawPath(path_t)
-
-        # Draw Brake (Red)
-        path_b = QPainterPath()
-        first = True
-        for i, val in enumerate(self.brake_hist):
-            x = i * step_x
-            y = h - (val * h)
-            if first:
-                path_b.moveTo(x, y)
-                first = False
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setPen(QPen(self.GRID, max(1, round(dpr))))
+        for frac in (0.25, 0.50, 0.75):
+            y = int(h * frac)
+            painter.drawLine(rect.left(), y, rect.right(), y)
+
+    def _paint_samples(self, painter, start, end, timestamps, w, h, dpr):
+        """Draws samples [start, end) as a continuation of what is already in the pixmap."""
+        painter.setRenderHint(QPainter.Antialiasing)
+        px_per_s = w / self.window_s
+        # Absolute column -> pixmap x
+        x_shift = self._right - w
+        xs = ((timestamps - self._origin) * px_per_s).tolist()
+
+        for name, color in self.TRACES:
+            ys = (h - self.buffer.window(name, start, end) * h).tolist()
+            path = QPainterPath()
+            last = self._last_points.get(name)
+            if last is not None:
+                path.moveTo(last[0] - x_shift, last[1])
             else:
-                path_b.lineTo(x, y)
-        
-        painter.setPen(QPen(QColor(255, 0, 0), 2))
-        painter.drawPath(path_b)
+                path.moveTo(xs[0] - x_shift, ys[0])
+            for x, y in zip(xs, ys):
+                path.lineTo(x - x_shift, y)
+            self._last_points[name] = (xs[-1], ys[-1])
+
+            painter.setPen(QPen(color, 2 * dpr))
+            painter.drawPath(path)
+
+    def _paint_columns(self, painter, x0, x1, end, w, h, dpr):
+        """Draws pixmap columns [x0, x1) as one min/max bar per trace, from the pyramids."""
+        px_per_s = w / self.window_s
+        x_shift = self._right - w
+        # Column i spans timestamps [t_i, t_i+1); translate those into sample numbers.
+        # One extra column on the left joins the first bar to what is already drawn.
+        left = max(0, x0 - 1)
+        times = self._origin + (np.arange(left, x1 + 1) + x_shift) / px_per_s
+        timestamps = self.buffer.window('timestamp', end - self.buffer.capacity, end)
+        first = end - len(timestamps)
+        bounds = first + np.searchsorted(timestamps, times)
+        bounds[-1] = end # the newest column takes everything up to now
+
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        pen_half = dpr # bars get the same visual weight as the 2px lines
+        for name, color in self.TRACES:
+            mins, maxs = self._pyramids[name].column_extents(bounds)
+            if x0 > left and not np.isnan(mins[0]):
+                self._lod_prev[name] = (float(mins[0]), float(maxs[0]))
+            mins, maxs = mins[x0 - left:], maxs[x0 - left:]
+
+            # Stretch each bar to reach its left neighbour so the trace stays connected
+            prev = self._lod_prev.get(name)
+            lines = []
+            for i, (lo, hi) in enumerate(zip(mins.tolist(), maxs.tolist())):
+                if lo != lo: # NaN, no samples in this column
+                    continue
+                top, bottom = hi, lo
+                if prev is not None:
+                    top, bottom = max(hi, prev[0]), min(lo, prev[1])
+                prev = (lo, hi)
+                x = x0 + i + 0.5
+                lines.append(QLineF(x, h - top * h - pen_half, x, h - bottom * h + pen_half))
+
+            painter.setPen(QPen(color, 1))
+            painter.drawLines(lines)
@@ -0,0 +1,190 @@
+import time
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF, QPointF, QSize
+from PySide6.QtGui import QPainter, QPen, QColor, QPixmap, QPolygonF, QFont
+from telemetry.track_map import TrackMapLearner
+from telemetry.adapters.base import CarPositions
+from telemetry.instrumentation import timed
+
+class TrackMapWidget(QWidget):
+    """Track outline with every car on it.
+
+    The outline is learned from the player's world position (TrackMapLearner) and drawn
+    once into a cached pixmap; each frame only the car dots are painted over it. All car
+    positions go through one vectorized transform: snapped to the outline with the spatial
+    grid, then scaled to widget coordinates. Cars within NEAR_LAP of the player, ahead or
+    behind along the track, are highlighted.
+    """
+    BACKGROUND = QColor(0, 0, 0, 200)
+    OUTLINE = QColor(0x88, 0x88, 0x88)
+    PLAYER = QColor(255, 0, 0)
+    NEAR = QColor(255, 200, 0)
+    CAR = QColor(255, 255, 255)
+    TEXT = QColor(0xaa, 0xaa, 0xaa)
+    CHANNELS = ['world_x', 'world_z']
+    # Share of a lap around the player within which other cars count as near
+    NEAR_LAP = 0.02
+    # Cars further than this off the outline are drawn where they are, not snapped to it
+    SNAP_M = 30.0
+    # Car positions and the track name are fetched at most this often (calls to another process out-of-process)
+    CARS_HZ = 20.0
+    SESSION_INTERVAL = 5.0
+
+    def __init__(self, telemetry_engine, parent=None):
+        super().__init__(parent)
+        self.telemetry_engine = telemetry_engine
+        self.learner = TrackMapLearner(telemetry_engine.buffer)
+        self._token = None
+        self._cars = None # (screen points (n, 2), colors) to paint
+        self._cars_at = 0.0
+        self._session_at = 0.0
+        self._layer = None # cached outline pixmap
+        self._layer_key = None
+        self._transform = None # (scale, offset) world x/z -> widget pixels
+        self._transform_key = None
+        self._font = QFont()
+        self.set_scale(1.0)
+
+    def sizeHint(self):
+        return QSize(round(96 * self._scale), round(96 * self._scale))
+
+    def set_scale(self, scale):
+        self._scale = scale
+        self.setFixedWidth(round(96 * scale))
+        self._font.setPixelSize(max(6, round(9 * scale)))
+        self._layer = None
+        self.update()
+
+    def set_active(self, active):
+        """Subscribes the world position channels while the map is shown."""
+        channels = self.telemetry_engine.channels
+        if active and self._token is None:
+            try:
+                self._token = channels.subscribe(self.CHANNELS)
+            except KeyError as e:
+                print(f"Track map unavailable: {e.args[0]}")
+        elif not active and self._token is not None:
+            channels.unsubscribe(self._token)
+            self._token = None
+            self.learner.save()
+
+    def refresh(self):
+        now = time.perf_counter()
+        if now - self._session_at >= self.SESSION_INTERVAL:
+            self._session_at = now
+            info = self.telemetry_engine.session_info() or {}
+            self.learner.set_track(info.get('track'), info.get('track_configuration'))
+        if self.learner.update():
+            self._layer = None # new outline
+        if now - self._cars_at >= 1.0 / self.CARS_HZ:
+            self._cars_at = now
+            self._cars = self._place_cars(self.telemetry_engine.car_positions())
+            self.update()
+
+    def resizeEvent(self, event):
+        self._layer = None
+        super().resizeEvent(event)
+
+    # --- Cars ------------------------------------------------------------
+
+    def _place_cars(self, cars):
+        if cars is None:
+            cars = self._player_only()
+        if cars is None or len(cars.ids) == 0 or self._fit() is None:
+            return None
+        world = cars.positions[:, [0, 2]].astype(np.float64)
+        player = cars.ids == cars.player_id
+        colors = np.zeros(len(world), dtype=np.int8) # 0 car, 1 near, 2 player
+
+        grid = self.learner.grid
+        if grid is not None:
+            lap_distance, snapped, offset = grid.locate(world)
+            on_track = offset < self.SNAP_M
+            world[on_track] = snapped[on_track]
+            if player.any():
+                gap = (lap_distance - lap_distance[np.argmax(player)] + 0.5) % 1.0 - 0.5
+                colors[np.abs(gap) < self.NEAR_LAP] = 1
+        colors[player] = 2
+
+        scale, offset = self._transform
+        return world * scale + offset, colors
+
+    def _player_only(self):
+        # Sources without other cars (replays, iRacing): the player from the buffer, if it has a position
+        buffer = self.telemetry_engine.buffer
+        if buffer.count == 0 or 'world_x' not in buffer.columns or 'world_z' not in buffer.columns:
+            return None
+        x, z = buffer.last('world_x'), buffer.last('world_z')
+        if not (np.isfinite(x) and np.isfinite(z)):
+            return None
+        return CarPositions(np.zeros(1, dtype=np.int32), np.array([[x, 0.0, z]], dtype=np.float32), 0)
+
+    def _fit(self):
+        """(scale, offset) mapping world x/z into the widget with a margin, None without an outline."""
+        outline = self.learner.outline
+        if outline.points is None:
+            self._transform = None
+            return None
+        key = (outline.version, self.width(), self.height())
+        if self._transform_key != key:
+            self._transform_key = key
+            margin = max(4.0, 8 * self._scale)
+            lo, hi = outline.points.min(axis=0), outline.points.max(axis=0)
+            extent = np.maximum(hi - lo, 1e-6)
+            scale = min((self.width() - 2 * margin) / extent[0], (self.height() - 2 * margin) / extent[1])
+            # Centered, same scale on both axes so the shape isn't distorted
+            offset = np.array([self.width(), self.height()]) / 2 - (lo + hi) / 2 * scale
+            self._transform = (scale, offset)
+        return self._transform
+
+    # --- Painting --------------------------------------------------------
+
+    def _outline_layer(self):
+        outline = self.learner.outline
+        # While learning, the layer shows the coverage reached so far
+        progress = None if outline.points is not None else round(outline.coverage * 100)
+        key = (outline.version, progress, self.width(), self.height())
+        if self._layer is not None and self._layer_key == key:
+            return self._layer
+        dpr = self.devicePixelRatioF()
+        layer = QPixmap(max(1, round(self.width() * dpr)), max(1, round(self.height() * dpr)))
+        layer.setDevicePixelRatio(dpr)
+        layer.fill(Qt.transparent)
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.BACKGROUND)
+        painter.drawRoundedRect(QRectF(self.rect()), 5, 5)
+
+        if self._fit() is not None:
+            scale, offset = self._transform
+            screen = outline.points * scale + offset
+            painter.setBrush(Qt.NoBrush)
+            painter.setPen(QPen(self.OUTLINE, max(1.5, 3 * self._scale), Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+            painter.drawPolygon(QPolygonF([QPointF(x, y) for x, y in screen.tolist()]))
+        else:
+            painter.setPen(self.TEXT)
+            painter.setFont(self._font)
+            text = f"Learning track\n{progress}%" if progress else "No track map"
+            painter.drawText(QRectF(self.rect()), Qt.AlignCenter, text)
+        painter.end()
+        self._layer = layer
+        self._layer_key = key
+        return layer
+
+    @timed("paint.track_map")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._outline_layer())
+        if self._cars is None:
+            return
+        points, colors = self._cars
+        painter.setRenderHint(QPainter.Antialiasing)
+        size = max(3.0, 6 * self._scale)
+        # Player last, on top
+        for kind, color in ((0, self.CAR), (1, self.NEAR), (2, self.PLAYER)):
+            selected = points[colors == kind]
+            if len(selected):
+                painter.setPen(QPen(color, size + (2 if kind == 2 else 0), Qt.SolidLine, Qt.RoundCap))
+                painter.drawPoints(QPolygonF([QPointF(x, y) for x, y in selected.tolist()]))